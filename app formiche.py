@@ -1,44 +1,3023 @@
-import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog, filedialog, scrolledtext
-from PIL import Image, ImageTk, ImageDraw
 import os
+import sys
+import gc
 import json
-import calendar
-from datetime import datetime, timedelta
-from tkcalendar import DateEntry
-import threading
 import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class StartupTracer:
+    # Misura i tempi di avvio (import e fasi di inizializzazione) con un orologio monotono.
+    # Si attiva con --trace-startup o con la variabile d'ambiente ANTCOLONY_TRACE_STARTUP=1.
+    REPORT_FILE = "startup_report.json"
+    BASELINE_FILE = "startup_baseline.json"
+    # Una fase è una regressione se supera la baseline del 25% e di almeno 20 ms
+    REGRESSION_RATIO = 1.25
+    REGRESSION_MIN_MS = 20.0
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.finished = False
+        self._t0 = time.perf_counter()
+        # La profondità è per thread: il caricamento dei dati avviene in un thread separato
+        self._local = threading.local()
+        self.phases = []
+
+    @classmethod
+    def from_environment(cls):
+        enabled = ("--trace-startup" in sys.argv
+                   or os.environ.get("ANTCOLONY_TRACE_STARTUP", "") not in ("", "0"))
+        return cls(enabled)
+
+    def _elapsed_ms(self):
+        return (time.perf_counter() - self._t0) * 1000
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled or self.finished:
+            yield
+            return
+        depth = getattr(self._local, "depth", 0)
+        entry = {"name": name, "depth": depth, "thread": threading.current_thread().name,
+                 "start_ms": round(self._elapsed_ms(), 2)}
+        self.phases.append(entry)
+        self._local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            entry["duration_ms"] = round(self._elapsed_ms() - entry["start_ms"], 2)
+
+    def finish(self):
+        if not self.enabled or self.finished:
+            return
+        self.finished = True
+        report = {
+            "timestamp": datetime.now().isoformat(),
+            "python": sys.version.split()[0],
+            "frozen": bool(getattr(sys, "frozen", False)),
+            "total_ms": round(self._elapsed_ms(), 2),
+            "phases": self.phases,
+            "regressions": [],
+        }
+
+        baseline = None
+        if os.path.exists(self.BASELINE_FILE):
+            try:
+                with open(self.BASELINE_FILE, 'r', encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"Baseline di avvio non leggibile: {e}")
+
+        if baseline:
+            report["regressions"] = self._find_regressions(report, baseline)
+
+        try:
+            with open(self.REPORT_FILE, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            # La prima misura (o --update-startup-baseline) diventa la baseline
+            if baseline is None or "--update-startup-baseline" in sys.argv:
+                with open(self.BASELINE_FILE, 'w', encoding='utf-8') as f:
+                    json.dump(report, f, indent=2, ensure_ascii=False)
+        except OSError as e:
+            print(f"Impossibile scrivere il report di avvio: {e}")
+
+        print(f"Avvio completato in {report['total_ms']:.0f} ms (report: {self.REPORT_FILE})")
+        for entry in self.phases:
+            print(f"  {'  ' * entry['depth']}{entry['name']}: {entry.get('duration_ms', 0):.1f} ms")
+        for regression in report["regressions"]:
+            print(f"  REGRESSIONE {regression['name']}: {regression['duration_ms']:.1f} ms "
+                  f"(baseline {regression['baseline_ms']:.1f} ms)")
+
+    def _find_regressions(self, report, baseline):
+        baseline_phases = {p["name"]: p.get("duration_ms", 0) for p in baseline.get("phases", [])}
+        baseline_phases["totale"] = baseline.get("total_ms", 0)
+        current = [(p["name"], p.get("duration_ms", 0)) for p in report["phases"]]
+        current.append(("totale", report["total_ms"]))
+
+        regressions = []
+        for name, duration in current:
+            base = baseline_phases.get(name)
+            if base is None:
+                continue
+            if duration > base * self.REGRESSION_RATIO and duration - base >= self.REGRESSION_MIN_MS:
+                regressions.append({"name": name, "baseline_ms": base, "duration_ms": duration})
+        return regressions
+
+
+STARTUP_TRACER = StartupTracer.from_environment()
+
+with STARTUP_TRACER.phase("import tkinter"):
+    import tkinter as tk
+    from tkinter import ttk, messagebox, simpledialog, filedialog, scrolledtext
+import calendar
+from datetime import timedelta
+import bisect
 import shutil
 import math
-import smtplib
-import ssl
+import re
+import csv
+import zlib
+import asyncio
+import socket
+import urllib.parse
+import uuid
+import hashlib
+import hmac
+import ipaddress
+import secrets
+import importlib.util
+from collections import OrderedDict, deque
+from collections.abc import Mapping, MutableMapping
+from array import array
+from concurrent.futures import ThreadPoolExecutor, Future
 from io import BytesIO
 
-try:
-    from plyer import notification
-    NOTIFICATIONS_AVAILABLE = True
-except ImportError:
-    NOTIFICATIONS_AVAILABLE = False
+
+class LazyModule:
+    # Segnaposto per un modulo pesante o opzionale: l'import avviene al primo
+    # accesso a un attributo. Gli import veri stanno nelle funzioni _import_*,
+    # così PyInstaller li trova comunque durante l'analisi.
+    def __init__(self, name, loader):
+        self._name = name
+        self._loader = loader
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    with STARTUP_TRACER.phase(f"import {self._name}"):
+                        self._module = self._loader()
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+
+def module_available(name):
+    # Verifica la presenza di un pacchetto senza importarlo
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def _import_pil_image():
+    from PIL import Image
+    return Image
+
+def _import_pil_imagetk():
+    from PIL import ImageTk
+    return ImageTk
+
+def _import_pil_imagedraw():
+    from PIL import ImageDraw
+    return ImageDraw
+
+def _import_tkcalendar():
+    import tkcalendar
+    return tkcalendar
+
+def _import_smtplib():
+    import smtplib
+    return smtplib
+
+def _import_ssl():
+    import ssl
+    return ssl
+
+def _import_plyer():
+    import plyer
+    return plyer
+
+def _import_pystray():
+    import pystray
+    return pystray
+
+def _import_pyarrow():
+    import pyarrow
+    return pyarrow
+
+def _import_pyarrow_parquet():
+    import pyarrow.parquet
+    return pyarrow.parquet
+
+
+Image = LazyModule("PIL.Image", _import_pil_image)
+ImageTk = LazyModule("PIL.ImageTk", _import_pil_imagetk)
+ImageDraw = LazyModule("PIL.ImageDraw", _import_pil_imagedraw)
+tkcalendar = LazyModule("tkcalendar", _import_tkcalendar)
+smtplib = LazyModule("smtplib", _import_smtplib)
+ssl = LazyModule("ssl", _import_ssl)
+plyer = LazyModule("plyer", _import_plyer)
+pystray = LazyModule("pystray", _import_pystray)
+pyarrow = LazyModule("pyarrow", _import_pyarrow)
+pyarrow_parquet = LazyModule("pyarrow.parquet", _import_pyarrow_parquet)
+
+
+def DateEntry(*args, **kwargs):
+    # tkcalendar viene caricato alla prima finestra con un selettore di date
+    return tkcalendar.DateEntry(*args, **kwargs)
+
+
+# Moduli opzionali mostrati nelle impostazioni: la disponibilità non richiede l'import
+OPTIONAL_MODULES = (
+    ("plyer", "Notifiche desktop"),
+    ("pystray", "Icona nella barra di sistema"),
+    ("tkcalendar", "Selettore delle date"),
+    ("PIL", "Immagini"),
+    ("pyarrow", "Esportazione Parquet"),
+)
+
+NOTIFICATIONS_AVAILABLE = module_available("plyer")
+if not NOTIFICATIONS_AVAILABLE:
     print("Nota: Per le notifiche installa: pip install plyer")
 
-try:
-    from pystray import MenuItem as item, Menu
-    from pystray import Icon as TrayIcon
-    PYSTRAY_AVAILABLE = True
-except ImportError:
-    PYSTRAY_AVAILABLE = False
+PYSTRAY_AVAILABLE = module_available("pystray")
+if not PYSTRAY_AVAILABLE:
     print("Nota: Per la riduzione a icona nella barra di sistema installa: pip install pystray")
 
 # --- Costanti ---
 DATA_FILE = "colonies.json"
 IMAGE_DIR = "colony_images"
 BACKUP_DIR = "backups"
+INSTANCE_LOCK_FILE = "antcolony.lock"
+SENSOR_DIR = "sensor_data"
+SYNC_STATE_FILE = "sync_state.json"
+NOTIFICATION_LEDGER_FILE = "notification_ledger.txt"
+NOTIFIER_STATE_FILE = "notifier_state.json"
+NOTIFIER_SECRET_FILE = "notifier_secret"
 DEFAULT_BG_COLOR = "#1a233b"  # Blu scuro
 CARD_BG_COLOR = "#212e4d"   # Blu più chiaro per i pannelli
 TEXT_COLOR = "#ecf0f1"
 ACCENT_COLOR = "#3498db"
 GRAPH_COLOR = "#2ecc71" # Verde per il grafico
 
+# Galleria: miniature per pagina, dimensione e numero di miniature decodificate tenute in cache
+GALLERY_PAGE_SIZE = 24
+GALLERY_COLUMNS = 3
+THUMBNAIL_SIZE = (150, 150)
+THUMBNAIL_CACHE_SIZE = 200
+
+# Oltre questa dimensione la schermata di avvio mostra l'avanzamento della lettura
+LARGE_DATA_FILE_BYTES = 2 * 1024 * 1024
+READ_CHUNK_BYTES = 1024 * 1024
+# Controllo delle modifiche esterne al file dei dati (sync, ripristini, script)
+DATA_FILE_POLL_MS = 2000
+
+
+class Record(MutableMapping):
+    # Record di una colonia (rilevazione, pasto, promemoria): i campi noti stanno in __slots__
+    # invece che in un dizionario per record, e la data viene convertita una sola volta in .dt
+    # (None se non valida). Si usa come un dizionario, quindi il resto del codice e il formato
+    # del file non cambiano; eventuali campi sconosciuti restano in extra e vengono riscritti.
+    __slots__ = ("dt", "extra")
+    FIELDS = ()
+    DATE_FIELD = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+
+    def __init__(self, data=()):
+        self.dt = None
+        self.extra = None
+        for key, value in (data.items() if isinstance(data, Mapping) else data):
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        return data if type(data) is cls else cls(data)
+
+    def require_dt(self):
+        # Per i cicli che scartano i record con una data non valida
+        if self.dt is None:
+            raise ValueError(f"Data non valida: {self.get(self.DATE_FIELD)!r}")
+        return self.dt
+
+    def __getitem__(self, key):
+        if key in self._FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.extra is None:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def get(self, key, default=None):
+        if key in self._FIELD_SET:
+            return getattr(self, key, default)
+        return self.extra.get(key, default) if self.extra else default
+
+    def __setitem__(self, key, value):
+        if key in self._FIELD_SET:
+            setattr(self, key, value)
+            if key == self.DATE_FIELD:
+                try:
+                    self.dt = datetime.fromisoformat(value)
+                except (TypeError, ValueError):
+                    self.dt = None
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+            if key == self.DATE_FIELD:
+                self.dt = None
+        elif self.extra is not None and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self._FIELD_SET:
+            return hasattr(self, key)
+        return self.extra is not None and key in self.extra
+
+    def __iter__(self):
+        for key in self.FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_dict(self):
+        return {key: self[key] for key in self}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class MonitoringRecord(Record):
+    __slots__ = FIELDS = ("timestamp", "population", "mortalita",
+                          "presenza_uova_larve", "stato_salute_generale")
+    DATE_FIELD = "timestamp"
+
+
+class FeedingEvent(Record):
+    __slots__ = FIELDS = ("datetime", "food_type", "quantity", "description")
+    DATE_FIELD = "datetime"
+
+
+class Reminder(Record):
+    __slots__ = FIELDS = ("datetime", "description", "food_type", "quantity")
+    DATE_FIELD = "datetime"
+
+
+# Opzioni dei promemoria ricorrenti oltre a "ogni N giorni dalla data di inizio"
+RECURRENCE_OPTION_FIELDS = ("weekdays", "times_per_week", "time", "end_date", "pauses", "cron")
+WEEKDAY_NAMES = ("lun", "mar", "mer", "gio", "ven", "sab", "dom")
+
+
+class RecurringRule(Record):
+    FIELDS = ("start_date", "interval", "food_type", "quantity") + RECURRENCE_OPTION_FIELDS
+    __slots__ = FIELDS + ("_matcher",)
+    DATE_FIELD = "start_date"
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._matcher = None
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._matcher = None
+
+    def options(self):
+        return {field: self[field] for field in RECURRENCE_OPTION_FIELDS if field in self}
+
+    def matcher(self):
+        # Compilata al primo uso e riutilizzata finché la regola non cambia
+        matcher = getattr(self, "_matcher", None)
+        if matcher is None:
+            matcher = self._matcher = RecurrenceMatcher(self)
+        return matcher
+
+
+def _parse_month_day(text):
+    month, day = (int(part) for part in text.split("-"))
+    datetime(2000, month, day)   # valida mese e giorno
+    # Il 29 febbraio non esiste ogni anno: vale il 28
+    return (2, 28) if (month, day) == (2, 29) else (month, day)
+
+
+def _cron_field(text, low, high):
+    values = set()
+    for part in text.split(","):
+        part, slash, step = part.partition("/")
+        step = int(step) if step else 1
+        if part == "*":
+            first, last = low, high
+        elif "-" in part:
+            first, last = (int(value) for value in part.split("-", 1))
+        else:
+            first = int(part)
+            last = high if slash else first
+        if first < low or last > high or first > last or step <= 0:
+            raise ValueError(f"Campo cron non valido: {text}")
+        values.update(range(first, last + 1, step))
+    return values
+
+
+class RecurrenceMatcher:
+    # Regola ricorrente compilata una volta: insiemi, tabelle e orari ordinati permettono di
+    # trovare il prossimo giorno valido in O(1) (ogni N giorni, giorni della settimana) e il
+    # prossimo orario con una ricerca binaria, senza provare i giorni uno per uno.
+    # Modalità, in ordine di precedenza: espressione cron "min ora giorno mese giorno_sett",
+    # giorni della settimana, N volte a settimana, ogni N giorni. Valgono per tutte la data di
+    # fine e le pause stagionali (per esempio l'ibernazione), anche a cavallo dell'anno.
+    SEARCH_DAYS = 4 * 366
+
+    def __init__(self, rule):
+        self.start = rule.require_dt().date()
+        end = rule.get("end_date")
+        self.end = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+        self.pauses = [(_parse_month_day(first), _parse_month_day(last))
+                       for first, last in rule.get("pauses") or []]
+        self.interval = None
+        self.weekdays = None
+        self.months = None
+        self.cron = rule.get("cron") or ""
+        self.time_text = rule.get("time") or ""
+        if self.cron:
+            self._compile_cron(self.cron)
+        else:
+            hour, minute = (int(part) for part in (self.time_text or "00:00").split(":"))
+            if not (0 <= hour < 24 and 0 <= minute < 60):
+                raise ValueError(f"Orario non valido: {self.time_text}")
+            self.times = [(hour, minute)]
+            if rule.get("weekdays"):
+                self.weekdays = {int(day) % 7 for day in rule["weekdays"]}
+            elif rule.get("times_per_week"):
+                per_week = int(rule["times_per_week"])
+                if not 1 <= per_week <= 7:
+                    raise ValueError("Le volte a settimana vanno da 1 a 7")
+                # Giorni distribuiti in modo uniforme a partire dal giorno di inizio
+                self.weekdays = {(self.start.weekday() + i * 7 // per_week) % 7 for i in range(per_week)}
+                self.per_week = per_week
+            else:
+                self.interval = int(rule.get("interval"))
+                if self.interval <= 0:
+                    raise ValueError("L'intervallo deve essere positivo")
+        if self.weekdays is not None:
+            # Giorni da aggiungere per arrivare al prossimo giorno valido, per ogni giorno della settimana
+            self._skip = [next(k for k in range(7) if (w + k) % 7 in self.weekdays) for w in range(7)]
+
+    def _compile_cron(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"L'espressione cron deve avere 5 campi: {expression}")
+        minutes = _cron_field(fields[0], 0, 59)
+        hours = _cron_field(fields[1], 0, 23)
+        self.days_of_month = _cron_field(fields[2], 1, 31)
+        self.months = _cron_field(fields[3], 1, 12)
+        # Nel cron 0 e 7 sono la domenica; in Python il lunedì è 0
+        self.cron_weekdays = {(day - 1) % 7 for day in _cron_field(fields[4], 0, 7)}
+        self.any_day_of_month = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+        self.times = sorted((hour, minute) for hour in hours for minute in minutes)
+
+    def _cron_day(self, day):
+        by_month_day = day.day in self.days_of_month
+        by_weekday = day.weekday() in self.cron_weekdays
+        if self.any_day_of_month:
+            return by_weekday
+        if self.any_weekday:
+            return by_month_day
+        # Come nel cron: con entrambi i campi specificati basta uno dei due
+        return by_month_day or by_weekday
+
+    def _next_base_day(self, day):
+        if self.interval is not None:
+            return day + timedelta(days=-(day - self.start).days % self.interval)
+        if self.weekdays is not None:
+            return day + timedelta(days=self._skip[day.weekday()])
+        for _ in range(self.SEARCH_DAYS):
+            if day.month not in self.months:
+                year, month = day.year, day.month
+                while True:
+                    month += 1
+                    if month > 12:
+                        year, month = year + 1, 1
+                    if month in self.months:
+                        break
+                day = datetime(year, month, 1).date()
+                continue
+            if self._cron_day(day):
+                return day
+            day += timedelta(days=1)
+        return None
+
+    def _pause_end(self, day):
+        # Primo giorno dopo la pausa che contiene day, None se day non è in pausa
+        key = (day.month, day.day)
+        for first, last in self.pauses:
+            inside = first <= key <= last if first <= last else (key >= first or key <= last)
+            if inside:
+                year = day.year if key <= last else day.year + 1
+                return datetime(year, *last).date() + timedelta(days=1)
+        return None
+
+    def next_day(self, day):
+        # Primo giorno valido a partire da day (compreso), None se la regola è terminata
+        day = max(day, self.start)
+        for _ in range(len(self.pauses) * 2 + 8):
+            day = self._next_base_day(day)
+            if day is None or (self.end is not None and day > self.end):
+                return None
+            resume = self._pause_end(day)
+            if resume is None:
+                return day
+            day = resume
+        return None
+
+    def occurrences(self, start, end):
+        # Orari delle occorrenze in [start, end)
+        day = self.next_day(start.date())
+        while day is not None:
+            for hour, minute in self.times:
+                when = datetime(day.year, day.month, day.day, hour, minute)
+                if when >= end:
+                    return
+                if when >= start:
+                    yield when
+            day = self.next_day(day + timedelta(days=1))
+
+    def next_after(self, moment):
+        # Prima occorrenza successiva a moment
+        day = self.next_day(moment.date())
+        if day is None:
+            return None
+        if day == moment.date():
+            idx = bisect.bisect_right(self.times, (moment.hour, moment.minute))
+            if idx < len(self.times):
+                hour, minute = self.times[idx]
+                return datetime(day.year, day.month, day.day, hour, minute)
+            day = self.next_day(day + timedelta(days=1))
+            if day is None:
+                return None
+        hour, minute = self.times[0]
+        return datetime(day.year, day.month, day.day, hour, minute)
+
+    def describe(self):
+        if self.cron:
+            text = f"cron {self.cron}"
+        elif self.interval is not None:
+            text = f"ogni {self.interval} giorni"
+        elif getattr(self, "per_week", None):
+            text = f"{self.per_week} volte a settimana"
+        else:
+            text = ", ".join(WEEKDAY_NAMES[day] for day in sorted(self.weekdays))
+        if self.time_text and not self.cron:
+            text += f" alle {self.time_text}"
+        if self.end is not None:
+            text += f", fino al {self.end.isoformat()}"
+        for first, last in self.pauses:
+            text += f", pausa {first[1]:02d}/{first[0]:02d}-{last[1]:02d}/{last[0]:02d}"
+        return text
+
+
+RECORD_TYPES = {
+    "history": MonitoringRecord,
+    "feeding_history": FeedingEvent,
+    "feeding_schedule": Reminder,
+    "recurring_schedule": RecurringRule,
+}
+
+
+def load_records(colony):
+    # Converte gli elenchi di una colonia nei tipi di record; le liste restano le stesse
+    for field, record_type in RECORD_TYPES.items():
+        records = colony.get(field)
+        if records and not all(type(r) is record_type for r in records):
+            records[:] = [record_type.from_dict(r) for r in records]
+
+
+def json_default(value):
+    # Per json.dump: i record vengono scritti come i dizionari di prima
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Oggetto di tipo {type(value).__name__} non serializzabile in JSON")
+
+
+def default_settings():
+    return {
+        "notifications": True,
+        "notifications_email": False,
+        "notifications_desktop": True,
+        "email_sender": "",
+        "email_password": "",
+        "email_recipient": "",
+        "smtp_server": "smtp.gmail.com",
+        "smtp_port": 587,
+        "theme": "dark",
+        "background_image_path": None,
+        "image_memory_budget_mb": 256,
+        "api_enabled": False,
+        "api_host": "127.0.0.1",
+        "api_port": 8765,
+        "api_token": "",
+        "sensors_enabled": False,
+        "sensor_udp_port": 47616,
+        "sensor_file": "",
+        "sync_folder": "",
+    }
+
+
+def migrate_colony(colony, index=None):
+    # Logica di migrazione per i vecchi formati di dati
+    # Identificativo stabile: il nome può cambiare, l'id no. Per i file precedenti viene
+    # derivato dai dati e dalla posizione nel file (index), così GUI e notificatore ottengono
+    # lo stesso id anche prima che il file venga risalvato; la posizione distingue le colonie
+    # con stesso nome e data. Fuori dal file dei dati (importazioni) l'id è casuale.
+    if not colony.get("id"):
+        if index is None:
+            colony["id"] = uuid.uuid4().hex
+        else:
+            seed = (f"{colony.get('name', '')}|{colony.get('collection_date', '')}|"
+                    f"{colony.get('created_at', '')}|{index}")
+            colony["id"] = uuid.uuid5(uuid.NAMESPACE_URL, seed).hex
+    # Migrazione del campo population in history
+    if "population" in colony and "history" not in colony:
+        try:
+            pop = int(colony["population"])
+            colony["history"] = [{
+                "timestamp": datetime.now().isoformat(),
+                "population": pop,
+                "mortalita": 0,
+                "presenza_uova_larve": "non registrato",
+                "stato_salute_generale": "non registrato"
+            }]
+        except ValueError:
+            colony["history"] = []
+        del colony["population"]
+    elif "history" not in colony:
+        colony["history"] = []
+
+    # Migrazione del campo feeding_schedule
+    if "feeding_schedule" in colony:
+        new_schedule = []
+        for item in colony["feeding_schedule"]:
+            if isinstance(item, str):
+                new_schedule.append({"datetime": item, "description": "", "food_type": "", "quantity": ""})
+            else:
+                # Aggiungi i nuovi campi se non esistono
+                item.setdefault("food_type", "")
+                item.setdefault("quantity", "")
+                item.setdefault("description", "")
+                new_schedule.append(item)
+        colony["feeding_schedule"] = new_schedule
+
+    # Inizializza i nuovi campi se non esistono
+    colony.setdefault("recurring_schedule", [])
+    colony.setdefault("feeding_history", [])
+    colony.setdefault("notes", "")
+    # Contatore delle modifiche: le ETag dell'API ne derivano
+    colony.setdefault("revision", 0)
+    load_records(colony)
+
+    # Promemoria e cronologia restano ordinati per data: gli inserimenti usano insert_sorted.
+    # Su liste già ordinate l'ordinamento all'avvio costa un solo passaggio.
+    colony["feeding_schedule"].sort(key=lambda x: x.get('datetime', ''))
+    colony["feeding_history"].sort(key=lambda x: x.get('datetime', ''))
+
+
+def insert_sorted(entries, entry, key="datetime"):
+    # Inserisce mantenendo l'ordine per data (O(log n) per la ricerca della posizione)
+    idx = bisect.bisect_right(entries, entry.get(key, ''), key=lambda e: e.get(key, ''))
+    entries.insert(idx, entry)
+    return idx
+
+
+def read_data_file(path, progress=None):
+    # Legge e migra il file dei dati senza toccare l'interfaccia, così può girare
+    # in un thread separato. progress(letti, totali) viene chiamato solo per i file grandi.
+    settings = default_settings()
+    if not os.path.exists(path):
+        return [], settings
+
+    total = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        if progress is None or total < LARGE_DATA_FILE_BYTES:
+            raw = f.read()
+        else:
+            chunks = []
+            read = 0
+            while True:
+                chunk = f.read(READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                read += len(chunk)
+                progress(read, total)
+            raw = b"".join(chunks)
+
+    data = json.loads(raw.decode('utf-8'))
+    colonies = data.get("colonies", [])
+    settings.update(data.get("settings", {}))
+    ids = set()
+    for index, colony in enumerate(colonies):
+        migrate_colony(colony, index)
+        # Id ripetuti (es. colonia copiata a mano nel file): unione, sincronizzazione, API
+        # e notificatore lavorano per id, quindi la copia riceve un id proprio
+        while colony["id"] in ids:
+            colony["id"] = uuid.uuid5(uuid.NAMESPACE_URL, f"{colony['id']}|{index}").hex
+        ids.add(colony["id"])
+    return colonies, settings
+
+
+def write_data_file(path, colonies, settings):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"colonies": colonies, "settings": settings}, f, indent=2, ensure_ascii=False,
+                  default=json_default)
+
+
+def data_fingerprint(value):
+    # Impronta del contenuto, per capire quali colonie sono cambiate tra due versioni del file
+    return hash(json.dumps(value, sort_keys=True, ensure_ascii=False, default=json_default))
+
+
+def data_file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Campi di testo libero indicizzati dalla ricerca
+SEARCH_FIELDS = ("name", "description", "notes", "feeding_schedule", "feeding_history")
+SEARCH_FIELD_LABELS = {
+    "name": "Nome",
+    "description": "Descrizione",
+    "notes": "Appunti",
+    "feeding_schedule": "Promemoria",
+    "feeding_history": "Cronologia pasti",
+}
+
+
+class SearchIndex:
+    # Indice invertito sui testi delle colonie: token -> documenti.
+    # Un documento è (id colonia, campo, posizione) e viene aggiornato
+    # campo per campo, senza ricostruire l'intero indice.
+    _TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}      # token -> set di chiavi documento
+        self._docs = {}          # chiave -> (colonia, campo, posizione, testo)
+        self._field_docs = {}    # (id colonia, campo) -> lista di chiavi
+        self._sorted_tokens = []
+        self._tokens_dirty = False
+
+    @classmethod
+    def tokenize(cls, text):
+        return cls._TOKEN_RE.findall(text.casefold())
+
+    def rebuild(self, colonies):
+        with self._lock:
+            self._postings.clear()
+            self._docs.clear()
+            self._field_docs.clear()
+            self._tokens_dirty = True
+            for colony in colonies:
+                for field in SEARCH_FIELDS:
+                    self._index_field(colony, field)
+
+    def update(self, colony, *fields):
+        with self._lock:
+            for field in fields or SEARCH_FIELDS:
+                if field in SEARCH_FIELDS:
+                    self._drop_field(colony, field)
+                    self._index_field(colony, field)
+
+    def remove_colony(self, colony):
+        with self._lock:
+            for field in SEARCH_FIELDS:
+                self._drop_field(colony, field)
+
+    def _field_texts(self, colony, field):
+        value = colony.get(field)
+        if isinstance(value, list):
+            return [(idx, entry.get("description", "")) for idx, entry in enumerate(value)
+                    if isinstance(entry, Mapping)]
+        return [(0, value or "")]
+
+    def _index_field(self, colony, field):
+        keys = []
+        for idx, text in self._field_texts(colony, field):
+            tokens = set(self.tokenize(text))
+            if not tokens:
+                continue
+            key = (id(colony), field, idx)
+            self._docs[key] = (colony, field, idx, text)
+            for token in tokens:
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = set()
+                    self._tokens_dirty = True
+                postings.add(key)
+            keys.append(key)
+        if keys:
+            self._field_docs[(id(colony), field)] = keys
+
+    def _drop_field(self, colony, field):
+        for key in self._field_docs.pop((id(colony), field), []):
+            _, _, _, text = self._docs.pop(key)
+            for token in set(self.tokenize(text)):
+                postings = self._postings.get(token)
+                if postings is not None:
+                    postings.discard(key)
+                    if not postings:
+                        del self._postings[token]
+                        self._tokens_dirty = True
+
+    def _prefix_matches(self, prefix):
+        # L'ultimo termine digitato è trattato come prefisso ("regi" -> "regina")
+        if self._tokens_dirty:
+            self._sorted_tokens = sorted(self._postings)
+            self._tokens_dirty = False
+        keys = set()
+        start = bisect.bisect_left(self._sorted_tokens, prefix)
+        for token in self._sorted_tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            keys |= self._postings[token]
+        return keys
+
+    def search(self, query, limit=200):
+        tokens = self.tokenize(query)
+        if not tokens:
+            return []
+        with self._lock:
+            candidates = None
+            for token in tokens[:-1]:
+                postings = self._postings.get(token, set())
+                candidates = set(postings) if candidates is None else candidates & postings
+                if not candidates:
+                    return []
+            last = self._prefix_matches(tokens[-1])
+            candidates = last if candidates is None else candidates & last
+            docs = [self._docs[key] for key in candidates]
+
+        # Le corrispondenze della frase esatta vengono mostrate per prime
+        phrase = query.strip().casefold()
+        docs.sort(key=lambda d: (phrase not in d[3].casefold(), d[0].get("name", "").casefold(),
+                                 SEARCH_FIELDS.index(d[1]), d[2]))
+        return docs[:limit]
+
+    @staticmethod
+    def snippet(text, query, width=80):
+        text = " ".join(text.split())
+        tokens = SearchIndex.tokenize(query)
+        pos = text.casefold().find(tokens[0]) if tokens else -1
+        start = max(0, pos - width // 3) if pos > 0 else 0
+        snippet = text[start:start + width]
+        if start > 0:
+            snippet = "…" + snippet
+        if start + width < len(text):
+            snippet += "…"
+        return snippet
+
+
+# Ordinamenti disponibili nella dashboard
+SORT_MODES = ("Inserimento", "Nome", "Popolazione", "Età", "Salute", "Ultimo pasto")
+HEALTH_RANK = {"eccellente": 0, "buona": 1, "media": 2, "scarsa": 3}
+# Campi che influenzano filtro e ordinamento della dashboard
+DASHBOARD_FIELDS = {"name", "collection_date", "history", "feeding_history"}
+
+
+class DashboardIndex:
+    # Chiavi di ordinamento precalcolate per colonia e indice dei prefissi dei nomi.
+    # Le date vengono interpretate una sola volta, quando la colonia cambia.
+    def __init__(self):
+        self._keys = {}        # id colonia -> chiavi di ordinamento
+        self._prefixes = []    # lista ordinata di (parola del nome, id colonia)
+
+    def rebuild(self, colonies):
+        self._keys.clear()
+        self._prefixes = []
+        for colony in colonies:
+            self._keys[id(colony)] = keys = self._compute_keys(colony)
+            self._prefixes.extend((word, id(colony)) for word in keys["words"])
+        self._prefixes.sort()
+
+    def update(self, colony):
+        self.remove(colony)
+        self._keys[id(colony)] = keys = self._compute_keys(colony)
+        for word in keys["words"]:
+            bisect.insort(self._prefixes, (word, id(colony)))
+
+    def remove(self, colony):
+        keys = self._keys.pop(id(colony), None)
+        if keys is None:
+            return
+        for word in keys["words"]:
+            idx = bisect.bisect_left(self._prefixes, (word, id(colony)))
+            if idx < len(self._prefixes) and self._prefixes[idx] == (word, id(colony)):
+                del self._prefixes[idx]
+
+    def keys(self, colony):
+        keys = self._keys.get(id(colony))
+        if keys is None:
+            self.update(colony)
+            keys = self._keys[id(colony)]
+        return keys
+
+    def _compute_keys(self, colony):
+        name = colony.get("name", "").casefold()
+        # Il nome intero e ogni sua parola possono fare da prefisso
+        words = {name} | set(name.split())
+
+        try:
+            collection_date = datetime.strptime(colony.get("collection_date", ""), '%Y-%m-%d').date()
+        except ValueError:
+            collection_date = None
+
+        population = None
+        health_rank = len(HEALTH_RANK)
+        if colony.get("history"):
+            last_history = colony["history"][-1]
+            try:
+                population = int(last_history.get("population"))
+            except (TypeError, ValueError):
+                pass
+            health_rank = HEALTH_RANK.get(last_history.get("stato_salute_generale"), len(HEALTH_RANK))
+
+        last_feeding = None
+        feeding_history = colony.get("feeding_history", [])
+        if feeding_history:
+            last_feeding = max((r.dt for r in feeding_history if r.dt is not None), default=None)
+
+        return {
+            "name": name,
+            "words": words,
+            "collection_date": collection_date,
+            "population": population,
+            "health_rank": health_rank,
+            "last_feeding": last_feeding,
+        }
+
+    def match_prefix(self, prefix):
+        prefix = prefix.strip().casefold()
+        start = bisect.bisect_left(self._prefixes, (prefix,))
+        matches = set()
+        for word, colony_id in self._prefixes[start:]:
+            if not word.startswith(prefix):
+                break
+            matches.add(colony_id)
+        return matches
+
+    def sort_key(self, colony, mode):
+        keys = self.keys(colony)
+        if mode == "Nome":
+            return (keys["name"],)
+        if mode == "Popolazione":
+            return (keys["population"] is None, -(keys["population"] or 0))
+        if mode == "Età":
+            date = keys["collection_date"]
+            return (date is None, date.toordinal() if date else 0)
+        if mode == "Salute":
+            return (keys["health_rank"],)
+        if mode == "Ultimo pasto":
+            # Prima le colonie nutrite da più tempo (o mai nutrite)
+            last = keys["last_feeding"]
+            return (last is not None, last.timestamp() if last else 0)
+        return ()
+
+    def order(self, colonies, prefix="", mode="Inserimento", reverse=False):
+        if prefix.strip():
+            matches = self.match_prefix(prefix)
+            visible = [c for c in colonies if id(c) in matches]
+        else:
+            visible = list(colonies)
+        if mode != "Inserimento":
+            visible.sort(key=lambda c: self.sort_key(c, mode))
+        if reverse:
+            visible.reverse()
+        return visible
+
+
+ROLLUP_TIERS = ("day", "week", "month")
+ROLLUP_TIER_LABELS = {"raw": "tutti i dati", "day": "medie giornaliere",
+                      "week": "medie settimanali", "month": "medie mensili"}
+
+
+def rollup_period(tier, dt):
+    day = dt.date()
+    if tier == "day":
+        return day
+    if tier == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+class HistoryRollups:
+    # Riepiloghi giornalieri, settimanali e mensili della cronologia di monitoraggio.
+    # Quando la cronologia cresce in coda si aggiungono solo i nuovi record; si ricostruisce
+    # tutto solo se è cambiato altro. Grafici ridotti e riepiloghi non rileggono i dati grezzi.
+    def __init__(self):
+        self._states = {}   # id colonia -> stato dei riepiloghi
+
+    def rebuild(self, colonies):
+        self._states.clear()
+        for colony in colonies:
+            self._build(colony)
+
+    def update(self, colony):
+        state = self._states.get(id(colony))
+        history = colony.get("history", [])
+        count = state["count"] if state else 0
+        if state is None or len(history) < count or (count and history[count - 1] is not state["last"]):
+            self._build(colony)
+            return
+        for record in history[count:]:
+            self._add(state, record)
+        state["count"] = len(history)
+        state["last"] = history[-1] if history else None
+
+    def remove(self, colony):
+        self._states.pop(id(colony), None)
+
+    def buckets(self, colony, tier):
+        # Lista ordinata di (inizio del periodo, statistiche)
+        state = self._states.get(id(colony))
+        if state is None:
+            self._build(colony)
+            state = self._states[id(colony)]
+        tier_state = state["tiers"][tier]
+        return [(period, tier_state["buckets"][period]) for period in tier_state["periods"]]
+
+    def _build(self, colony):
+        history = colony.get("history", [])
+        state = {"count": 0, "last": None,
+                 "tiers": {tier: {"periods": [], "buckets": {}} for tier in ROLLUP_TIERS}}
+        for record in history:
+            self._add(state, record)
+        state["count"] = len(history)
+        state["last"] = history[-1] if history else None
+        self._states[id(colony)] = state
+
+    @staticmethod
+    def _add(state, record):
+        dt = record.dt
+        try:
+            population = int(record.get("population"))
+        except (TypeError, ValueError):
+            return
+        if dt is None:
+            return
+        try:
+            mortality = int(record.get("mortalita", 0))
+        except (TypeError, ValueError):
+            mortality = 0
+        health = record.get("stato_salute_generale", "non registrato")
+        eggs = record.get("presenza_uova_larve", "non registrato")
+
+        for tier in ROLLUP_TIERS:
+            tier_state = state["tiers"][tier]
+            period = rollup_period(tier, dt)
+            bucket = tier_state["buckets"].get(period)
+            if bucket is None:
+                bucket = tier_state["buckets"][period] = {
+                    "count": 0, "population_sum": 0, "population_min": population,
+                    "population_max": population, "population_last": population, "last_ts": dt,
+                    "mortality_sum": 0, "health": {}, "eggs": {}}
+                bisect.insort(tier_state["periods"], period)
+            bucket["count"] += 1
+            bucket["population_sum"] += population
+            bucket["population_min"] = min(bucket["population_min"], population)
+            bucket["population_max"] = max(bucket["population_max"], population)
+            if dt >= bucket["last_ts"]:
+                bucket["population_last"], bucket["last_ts"] = population, dt
+            bucket["mortality_sum"] += mortality
+            bucket["health"][health] = bucket["health"].get(health, 0) + 1
+            bucket["eggs"][eggs] = bucket["eggs"].get(eggs, 0) + 1
+
+
+# Tabelle dell'esportazione: (colonna, tipo) con tipo "str" o "int".
+# Ogni riga porta con sé id e nome della colonia, così le tabelle si uniscono facilmente in pandas.
+EXPORT_TABLES = {
+    "colonies": (("colony_id", "str"), ("name", "str"), ("collection_date", "str"),
+                 ("created_at", "str"), ("description", "str"), ("notes", "str"),
+                 ("profile_image", "str"), ("image_count", "int"), ("revision", "int")),
+    "history": (("colony_id", "str"), ("colony_name", "str"), ("timestamp", "str"),
+                ("population", "int"), ("mortality", "int"), ("eggs", "str"), ("health", "str")),
+    "feeding_history": (("colony_id", "str"), ("colony_name", "str"), ("datetime", "str"),
+                        ("food_type", "str"), ("quantity", "str"), ("description", "str")),
+    "feeding_schedule": (("colony_id", "str"), ("colony_name", "str"), ("datetime", "str"),
+                         ("food_type", "str"), ("quantity", "str"), ("description", "str")),
+    "recurring_schedule": (("colony_id", "str"), ("colony_name", "str"), ("start_date", "str"),
+                           ("interval", "int"), ("food_type", "str"), ("quantity", "str"),
+                           ("options", "str")),
+}
+# Campo della data usato dal filtro per intervallo
+EXPORT_DATE_FIELDS = {"history": "timestamp", "feeding_history": "datetime",
+                      "feeding_schedule": "datetime", "recurring_schedule": "start_date"}
+EXPORT_FORMATS = {"CSV": "csv", "JSON Lines": "jsonl", "Parquet": "parquet"}
+EXPORT_BATCH_ROWS = 10000
+
+
+def _export_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def export_rows(colonies, table, start=None, end=None):
+    # Generatore delle righe piatte di una tabella; start/end sono stringhe AAAA-MM-GG incluse
+    for colony in colonies:
+        colony_id, colony_name = colony.get("id", ""), colony.get("name", "")
+        if table == "colonies":
+            yield {"colony_id": colony_id, "name": colony_name,
+                   "collection_date": colony.get("collection_date", ""),
+                   "created_at": colony.get("created_at", ""),
+                   "description": colony.get("description", ""), "notes": colony.get("notes", ""),
+                   "profile_image": colony.get("profile_image", ""),
+                   "image_count": len(colony.get("images", [])), "revision": colony.get("revision", 0)}
+            continue
+        date_field = EXPORT_DATE_FIELDS[table]
+        for record in list(colony.get(table, [])):
+            day = str(record.get(date_field, ""))[:10]
+            if (start and day < start) or (end and day > end):
+                continue
+            row = {"colony_id": colony_id, "colony_name": colony_name}
+            if table == "history":
+                row.update(timestamp=record.get("timestamp", ""),
+                           population=_export_int(record.get("population")),
+                           mortality=_export_int(record.get("mortalita")),
+                           eggs=record.get("presenza_uova_larve", ""),
+                           health=record.get("stato_salute_generale", ""))
+            elif table == "recurring_schedule":
+                options = record.options()
+                row.update(start_date=record.get("start_date", ""),
+                           interval=_export_int(record.get("interval")),
+                           food_type=record.get("food_type", ""), quantity=record.get("quantity", ""),
+                           options=json.dumps(options, ensure_ascii=False) if options else "")
+            else:
+                row.update(datetime=record.get("datetime", ""), food_type=record.get("food_type", ""),
+                           quantity=record.get("quantity", ""), description=record.get("description", ""))
+            yield row
+
+
+def export_tables(colonies, directory, fmt="csv", start=None, end=None):
+    # Scrive un file per tabella riga per riga (Parquet a blocchi): la memoria non cresce con i dati.
+    # Restituisce il numero di righe scritte per tabella.
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    for table, columns in EXPORT_TABLES.items():
+        names = [name for name, _ in columns]
+        path = os.path.join(directory, f"{table}.{fmt}")
+        rows = export_rows(colonies, table, start, end)
+        count = 0
+        if fmt == "csv":
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=names)
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+        elif fmt == "jsonl":
+            with open(path, 'w', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                    count += 1
+        elif fmt == "parquet":
+            schema = pyarrow.schema([(name, pyarrow.int64() if kind == "int" else pyarrow.string())
+                                     for name, kind in columns])
+            with pyarrow_parquet.ParquetWriter(path, schema) as writer:
+                batch = []
+                for row in rows:
+                    batch.append(row)
+                    count += 1
+                    if len(batch) >= EXPORT_BATCH_ROWS:
+                        writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+                        batch = []
+                if batch or count == 0:
+                    writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+        else:
+            raise ValueError(f"Formato di esportazione sconosciuto: {fmt}")
+        counts[table] = count
+    return counts
+
+
+_COLONIES_ARRAY_RE = re.compile(r'\s*\{\s*"colonies"\s*:\s*\[')
+
+
+def iter_json_colonies(path):
+    # Legge un file JSON esportato una colonia alla volta.
+    # Il file dei dati e i backup iniziano con {"colonies": [ : gli elementi vengono decodificati
+    # uno per uno mentre il file viene letto a blocchi, senza caricare l'intero documento.
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(READ_CHUNK_BYTES)
+        match = _COLONIES_ARRAY_RE.match(buffer)
+        if match is None:
+            # Esportazione di una singola colonia (o elenco di colonie): documento piccolo
+            data = json.loads(buffer + f.read())
+            if isinstance(data, dict) and "colonies" in data:
+                data = data["colonies"]
+            yield from (data if isinstance(data, list) else [data])
+            return
+        pos = match.end()
+        eof = False
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                if pos >= len(buffer):
+                    raise ValueError("fine del blocco")
+                colony, end = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if eof:
+                    raise ValueError(f"File JSON incompleto: {path}")
+                chunk = f.read(READ_CHUNK_BYTES)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield colony
+            buffer, pos = buffer[end:], 0
+
+
+def iter_table_rows(path, fmt):
+    if fmt == "csv":
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            yield from csv.DictReader(f)
+    elif fmt == "jsonl":
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        for batch in pyarrow_parquet.ParquetFile(path).iter_batches(batch_size=EXPORT_BATCH_ROWS):
+            yield from batch.to_pylist()
+
+
+def iter_table_colonies(directory, fmt):
+    # Ricompone le colonie da un'esportazione a tabelle (export_tables).
+    # Le immagini non fanno parte dell'esportazione e restano escluse.
+    colonies = {}
+    for row in iter_table_rows(os.path.join(directory, f"colonies.{fmt}"), fmt):
+        colonies[row["colony_id"]] = {
+            "id": row["colony_id"], "name": row.get("name") or "",
+            "collection_date": row.get("collection_date") or "", "created_at": row.get("created_at") or "",
+            "description": row.get("description") or "", "notes": row.get("notes") or "",
+            "images": [], "history": [], "feeding_schedule": [], "feeding_history": [],
+            "recurring_schedule": [],
+        }
+    for table in ("history", "feeding_history", "feeding_schedule", "recurring_schedule"):
+        path = os.path.join(directory, f"{table}.{fmt}")
+        if not os.path.exists(path):
+            continue
+        for row in iter_table_rows(path, fmt):
+            colony = colonies.get(row.get("colony_id"))
+            if colony is None:
+                continue
+            if table == "history":
+                record = {"timestamp": row.get("timestamp") or "",
+                          "population": _export_int(row.get("population")) or 0,
+                          "mortalita": _export_int(row.get("mortality")) or 0,
+                          "presenza_uova_larve": row.get("eggs") or "non registrato",
+                          "stato_salute_generale": row.get("health") or "non registrato"}
+            elif table == "recurring_schedule":
+                record = {"start_date": row.get("start_date") or "",
+                          "interval": _export_int(row.get("interval")) or 1,
+                          "food_type": row.get("food_type") or "", "quantity": row.get("quantity") or ""}
+                if row.get("options"):
+                    record.update(json.loads(row["options"]))
+            else:
+                record = {"datetime": row.get("datetime") or "", "food_type": row.get("food_type") or "",
+                          "quantity": row.get("quantity") or "", "description": row.get("description") or ""}
+            colony[table].append(record)
+    yield from colonies.values()
+
+
+def iter_import_colonies(path):
+    # File JSON di una o più colonie, file dei dati/backup, oppure esportazione a tabelle
+    # (una cartella, o il suo file colonies.csv/.jsonl/.parquet)
+    if os.path.isdir(path):
+        for fmt in EXPORT_FORMATS.values():
+            if os.path.exists(os.path.join(path, f"colonies.{fmt}")):
+                return iter_table_colonies(path, fmt)
+        raise ValueError(f"Nessuna esportazione trovata in {path}")
+    base, ext = os.path.splitext(os.path.basename(path))
+    if base == "colonies" and ext[1:] in EXPORT_FORMATS.values():
+        return iter_table_colonies(os.path.dirname(path), ext[1:])
+    return iter_json_colonies(path)
+
+
+# Chiave di duplicato per ogni elenco unito durante l'importazione
+IMPORT_RECORD_KEYS = {
+    "history": lambda r: r.get("timestamp", ""),
+    "feeding_history": lambda r: r.get("datetime", ""),
+    "feeding_schedule": lambda r: (r.get("datetime", ""), r.get("description", "")),
+    "recurring_schedule": lambda r: (r.get("start_date", ""), r.get("interval"), r.get("food_type", ""))
+                                    + tuple(json.dumps(r[f], sort_keys=True) for f in RECURRENCE_OPTION_FIELDS if f in r),
+}
+IMPORT_SORT_KEYS = {"history": "timestamp", "feeding_history": "datetime", "feeding_schedule": "datetime"}
+
+
+def merge_imported_colony(colony, incoming):
+    # Aggiunge a una colonia esistente i record importati che non ha ancora.
+    # Restituisce i campi modificati (vuoto se non c'era nulla di nuovo).
+    changed = []
+    for field, key in IMPORT_RECORD_KEYS.items():
+        records = colony.setdefault(field, [])
+        known = {key(r) for r in records}
+        new_records = []
+        for record in incoming.get(field, []):
+            record_key = key(record)
+            if record_key not in known:
+                known.add(record_key)
+                new_records.append(record)
+        if new_records:
+            records.extend(new_records)
+            if field in IMPORT_SORT_KEYS:
+                records.sort(key=lambda r, k=IMPORT_SORT_KEYS[field]: r.get(k, ''))
+            changed.append(field)
+    for field in ("description", "notes"):
+        if not colony.get(field) and incoming.get(field):
+            colony[field] = incoming[field]
+            changed.append(field)
+    return changed
+
+
+# Sincronizzazione tra installazioni
+SYNC_SCALAR_FIELDS = ("name", "description", "notes", "collection_date")
+SYNC_APPEND_FIELDS = ("history", "feeding_history")
+SYNC_SET_FIELDS = ("feeding_schedule", "recurring_schedule")
+# Le immagini restano locali: i percorsi non hanno senso sull'altro computer
+SYNC_LOCAL_FIELDS = ("images", "profile_image")
+
+
+def _sync_keys(field, records):
+    key = IMPORT_RECORD_KEYS[field]
+    return {json.dumps(key(r), ensure_ascii=False): r for r in records}
+
+
+def sync_snapshot(colony):
+    # Stato comune dopo l'ultima sincronizzazione: serve all'unione a tre vie
+    snapshot = {field: colony.get(field, "") for field in SYNC_SCALAR_FIELDS}
+    for field in SYNC_SET_FIELDS:
+        snapshot[field] = sorted(_sync_keys(field, colony.get(field, [])))
+    return snapshot
+
+
+def sync_merge_colony(local, remote, base):
+    # Unisce la versione di un'altra installazione in quella locale.
+    # Cronologie: unione per data, senza duplicati. Promemoria: unione a tre vie degli insiemi,
+    # così un promemoria completato da una parte sparisce anche dall'altra.
+    # Campi semplici: vince la parte che li ha modificati; se li hanno modificati entrambe
+    # resta il valore locale e il campo viene segnalato come conflitto.
+    # Restituisce (campi modificati, campi in conflitto).
+    base = base or {}
+    changed, conflicts = [], []
+    for field in SYNC_SCALAR_FIELDS:
+        mine, theirs = local.get(field, ""), remote.get(field, "")
+        if mine == theirs or theirs == base.get(field):
+            continue
+        if mine == base.get(field):
+            local[field] = theirs
+            changed.append(field)
+        else:
+            conflicts.append(field)
+    changed += merge_imported_colony(local, {field: remote.get(field, []) for field in SYNC_APPEND_FIELDS})
+    for field in SYNC_SET_FIELDS:
+        mine, theirs = _sync_keys(field, local.get(field, [])), _sync_keys(field, remote.get(field, []))
+        known = set(base.get(field, []))
+        keys = {k for k in mine if k in theirs or k not in known}
+        keys.update(k for k in theirs if k not in known)
+        if keys == set(mine):
+            continue
+        local[field] = [mine.get(k) or theirs[k] for k in keys]
+        local[field].sort(key=lambda r: r.get(IMPORT_SORT_KEYS.get(field, "start_date"), ''))
+        changed.append(field)
+    return changed, conflicts
+
+
+class FolderSync:
+    # Scambio delle modifiche attraverso una cartella condivisa (chiavetta, cartella di rete, Dropbox...).
+    # Ogni installazione scrive nella propria sottocartella solo le colonie la cui revisione è
+    # cambiata dall'ultima pubblicazione, più un indice id -> revisione; dalle altre legge solo
+    # le colonie con una revisione non ancora vista. Lo stato (id dell'installazione, revisioni
+    # pubblicate e viste, stato comune per l'unione) resta accanto al file dei dati.
+    # Lo stato comune è tenuto per installazione e colonia: è l'ultima versione dell'altra parte
+    # già unita qui, quindi l'antenato comune anche con tre o più installazioni.
+    # Le colonie eliminate non vengono propagate.
+    def __init__(self, folder, state_path):
+        self.folder = folder
+        self.state_path = state_path
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = {}
+        self.state.setdefault("instance_id", uuid.uuid4().hex)
+        for key in ("published", "seen", "bases"):
+            self.state.setdefault(key, {})
+        # Stato delle versioni precedenti, per colonia e non per installazione: punto di partenza
+        # per ogni installazione già vista
+        old_base = self.state.pop("base", None)
+        if old_base:
+            for peer in self.state["seen"]:
+                self.state["bases"].setdefault(peer, dict(old_base))
+
+    @property
+    def instance_id(self):
+        return self.state["instance_id"]
+
+    def pull(self):
+        # Solo lettura di file: può girare fuori dal thread dell'interfaccia.
+        # Restituisce [(installazione, revisione, colonia)].
+        deltas = []
+        if not os.path.isdir(self.folder):
+            return deltas
+        for peer in sorted(os.listdir(self.folder)):
+            peer_dir = os.path.join(self.folder, peer)
+            if peer == self.instance_id or not os.path.isdir(peer_dir):
+                continue
+            try:
+                with open(os.path.join(peer_dir, "index.json"), 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                continue
+            seen = self.state["seen"].get(peer, {})
+            for cid, revision in index.items():
+                if revision <= seen.get(cid, -1):
+                    continue
+                try:
+                    with open(os.path.join(peer_dir, f"{cid}.json"), 'r', encoding='utf-8') as f:
+                        colony = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"Sincronizzazione: colonia {cid} di {peer} non leggibile: {e}")
+                    continue
+                deltas.append((peer, revision, colony))
+        return deltas
+
+    def merge(self, colonies, deltas, on_changed):
+        # on_changed(colonia, *campi) come AntColonyApp._on_colony_changed: incrementa la revisione,
+        # così la versione unita viene ripubblicata. Restituisce (aggiunte, aggiornate, conflitti).
+        by_id = {colony["id"]: colony for colony in colonies}
+        added, updated, conflicts = [], [], []
+        for peer, revision, remote in deltas:
+            migrate_colony(remote)
+            cid = remote["id"]
+            colony = by_id.get(cid)
+            if colony is None:
+                remote["images"], remote["profile_image"] = [], ""
+                colonies.append(remote)
+                by_id[cid] = remote
+                on_changed(remote)
+                added.append(remote)
+            else:
+                fields, clashes = sync_merge_colony(colony, remote, self.state["bases"].get(peer, {}).get(cid))
+                if fields:
+                    on_changed(colony, *fields)
+                    updated.append(colony)
+                if clashes:
+                    # Né stato comune né revisione vista avanzano: il conflitto resta aperto
+                    # (e viene segnalato) finché le due versioni non coincidono
+                    conflicts.append((colony.get("name", ""), clashes))
+                    continue
+            self.state["bases"].setdefault(peer, {})[cid] = sync_snapshot(remote)
+            self.state["seen"].setdefault(peer, {})[cid] = revision
+        return added, updated, conflicts
+
+    def push(self, colonies):
+        # Scrive solo le colonie con una revisione diversa da quella già pubblicata
+        own_dir = os.path.join(self.folder, self.instance_id)
+        os.makedirs(own_dir, exist_ok=True)
+        published = self.state["published"]
+        count = 0
+        for colony in colonies:
+            cid, revision = colony["id"], colony.get("revision", 0)
+            if published.get(cid) == revision:
+                continue
+            data = {k: v for k, v in colony.items() if k not in SYNC_LOCAL_FIELDS}
+            self._write_json(os.path.join(own_dir, f"{cid}.json"), data)
+            published[cid] = revision
+            count += 1
+        if count:
+            # L'indice per ultimo: chi legge non vede mai revisioni senza il file della colonia
+            self._write_json(os.path.join(own_dir, "index.json"), published)
+        return count
+
+    def save_state(self):
+        self._write_json(self.state_path, self.state)
+
+    @staticmethod
+    def _write_json(path, value):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f, ensure_ascii=False, default=json_default)
+        os.replace(tmp_path, path)
+
+
+def sync_state_path(data_path):
+    return os.path.join(os.path.dirname(os.path.abspath(data_path)), SYNC_STATE_FILE)
+
+
+def sync_data_file(data_path, folder):
+    # Sincronizzazione senza interfaccia (--sync) di un file dei dati con la cartella condivisa.
+    # Se la GUI è aperta sulla stessa cartella unisce le modifiche al prossimo controllo del file.
+    colonies, settings = read_data_file(data_path)
+
+    def bump(colony, *fields):
+        colony["revision"] = colony.get("revision", 0) + 1
+
+    sync = FolderSync(folder, sync_state_path(data_path))
+    added, updated, conflicts = sync.merge(colonies, sync.pull(), bump)
+    if added or updated:
+        write_data_file(data_path, colonies, settings)
+    published = sync.push(colonies)
+    sync.save_state()
+    return added, updated, conflicts, published
+
+
+def record_sort_time(record):
+    # Chiave di ordinamento per data: i record senza data valida vanno prima degli altri
+    return record.dt or datetime.min
+
+
+class RecordTree:
+    # Lista di record in una ttk.Treeview, alimentata da una lista già ordinata per data.
+    # Le righe vengono aggiunte a blocchi (prima la parte visibile, il resto nei momenti
+    # di inattività) e le modifiche successive inseriscono o tolgono solo le righe interessate.
+    FIRST_BATCH = 100
+    BATCH = 500
+
+    def __init__(self, parent, columns, row_values, sort_field="datetime", newest_first=False,
+                 row_tags=None, empty_text="", height=8):
+        self.row_values = row_values
+        self.row_tags = row_tags or (lambda entry: ())
+        self.sort_field = sort_field
+        self.newest_first = newest_first
+        self._iids = {}          # id(record) -> iid
+        self._entries = {}       # iid -> record
+        self._next_iid = 0
+        self._fill_job = None
+        self._sort_column = None
+        self._sort_reverse = False
+        # Colonna facoltativa (nome, titolo, larghezza, chiave): la chiave riceve il record e
+        # ordina sul valore vero (data, numero); senza chiave si ordina sul testo mostrato
+        self._sort_keys = {c[0]: c[3] for c in columns if len(c) > 3}
+
+        self.frame = tk.Frame(parent, bg=CARD_BG_COLOR)
+        self.empty_label = tk.Label(self.frame, text=empty_text,
+                                    font=("Segoe UI", 10, "italic"),
+                                    fg="#95a5a6", bg=CARD_BG_COLOR)
+
+        self.tree = ttk.Treeview(self.frame, columns=[c[0] for c in columns], show="headings",
+                                 height=height, selectmode="browse")
+        for column, heading, width, *_ in columns:
+            self.tree.heading(column, text=heading, command=lambda c=column: self._toggle_sort(c))
+            self.tree.column(column, width=width, minwidth=40, stretch=True)
+        scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+    def _insert(self, entry, index="end"):
+        iid = str(self._next_iid)
+        self._next_iid += 1
+        self._iids[id(entry)] = iid
+        self._entries[iid] = entry
+        self.tree.insert("", index, iid=iid, values=self.row_values(entry), tags=self.row_tags(entry))
+
+    def set_entries(self, entries):
+        if self._fill_job is not None:
+            self.tree.after_cancel(self._fill_job)
+            self._fill_job = None
+        self.tree.delete(*self.tree.get_children())
+        self._iids.clear()
+        self._entries.clear()
+        ordered = list(reversed(entries)) if self.newest_first else list(entries)
+        self._update_empty_state(ordered)
+        self._fill(ordered, 0, self.FIRST_BATCH)
+
+    def _fill(self, ordered, start, count):
+        self._fill_job = None
+        if not self.tree.winfo_exists():
+            return
+        for entry in ordered[start:start + count]:
+            self._insert(entry)
+        if start + count < len(ordered):
+            self._fill_job = self.tree.after_idle(self._fill, ordered, start + count, self.BATCH)
+        elif self._sort_column:
+            self._apply_sort()
+
+    def sync(self, entries):
+        if self._fill_job is not None:
+            # Il riempimento iniziale è ancora in corso: si riparte dalla lista aggiornata
+            self.set_entries(entries)
+            return
+
+        current = {id(entry) for entry in entries}
+        for entry_id, iid in list(self._iids.items()):
+            if entry_id not in current:
+                self.tree.delete(iid)
+                del self._iids[entry_id]
+                del self._entries[iid]
+
+        new_positions = sorted(self._position(entries, entry) for entry in entries
+                               if id(entry) not in self._iids)
+        if self.newest_first:
+            new_positions.reverse()
+        for idx in new_positions:
+            tree_index = len(entries) - 1 - idx if self.newest_first else idx
+            self._insert(entries[idx], tree_index)
+
+        if new_positions and self._sort_column:
+            self._apply_sort()
+        self._update_empty_state(entries)
+
+    def _position(self, entries, entry):
+        key = entry.get(self.sort_field, '')
+        idx = bisect.bisect_left(entries, key, key=lambda e: e.get(self.sort_field, ''))
+        while entries[idx] is not entry:
+            idx += 1
+        return idx
+
+    def _update_empty_state(self, entries):
+        if entries:
+            self.empty_label.place_forget()
+        else:
+            self.empty_label.place(relx=0.5, rely=0.5, anchor="center")
+            self.empty_label.lift()
+
+    def _toggle_sort(self, column):
+        if self._sort_column == column:
+            self._sort_reverse = not self._sort_reverse
+        else:
+            self._sort_column, self._sort_reverse = column, False
+        self._apply_sort()
+
+    def _apply_sort(self):
+        column = self._sort_column
+        key = self._sort_keys.get(column)
+        if key is not None:
+            rows = [(key(self._entries[iid]), iid) for iid in self.tree.get_children()]
+        else:
+            rows = [(self.tree.set(iid, column).casefold(), iid) for iid in self.tree.get_children()]
+        rows.sort(key=lambda row: row[0], reverse=self._sort_reverse)
+        for index, (_, iid) in enumerate(rows):
+            self.tree.move(iid, "", index)
+
+    def selected_entry(self):
+        selection = self.tree.selection()
+        return self._entries.get(selection[0]) if selection else None
+
+
+class ImageMemoryManager:
+    # Registro centrale dei PhotoImage mostrati nei widget.
+    # Ogni immagine costa larghezza × altezza × 4 byte; oltre il budget vengono liberate
+    # prima quelle di widget distrutti o non visibili, poi le più vecchie.
+    # Un'immagine liberata viene ricaricata tramite il suo hook quando il widget torna visibile.
+    def __init__(self, budget_mb=256):
+        self.budget = budget_mb * 1024 * 1024
+        self._entries = OrderedDict()   # widget -> (PhotoImage, costo, hook di ricarica)
+        self._evicted = {}              # widget -> (hook di ricarica, id del binding <Map>)
+        self.used = 0
+
+    def set_budget(self, budget_mb):
+        self.budget = budget_mb * 1024 * 1024
+        self.enforce()
+
+    def attach(self, widget, photo, reload=None):
+        self._forget(widget)
+        self._restore_binding(widget)
+        widget.config(image=photo)
+        cost = photo.width() * photo.height() * 4
+        self._entries[widget] = (photo, cost, reload)
+        self.used += cost
+        self.enforce(keep=widget)
+
+    def detach(self, widget):
+        self._forget(widget)
+        self._restore_binding(widget)
+
+    def _forget(self, widget):
+        entry = self._entries.pop(widget, None)
+        if entry is not None:
+            self.used -= entry[1]
+
+    def _restore_binding(self, widget):
+        evicted = self._evicted.pop(widget, None)
+        if evicted is not None:
+            try:
+                widget.unbind("<Map>", evicted[1])
+            except tk.TclError:
+                pass
+
+    def usage(self):
+        self._prune()
+        return self.used, len(self._entries)
+
+    def _prune(self):
+        # Le immagini dei widget distrutti non servono più a nessuno
+        for widget in [w for w in self._entries if not w.winfo_exists()]:
+            self._forget(widget)
+        for widget in [w for w in self._evicted if not w.winfo_exists()]:
+            del self._evicted[widget]
+
+    def enforce(self, keep=None):
+        if self.used <= self.budget:
+            return
+        self._prune()
+        hidden = [w for w in self._entries if w is not keep and not w.winfo_viewable()]
+        visible = [w for w in self._entries if w is not keep and w.winfo_viewable()]
+        for widget in hidden + visible:
+            if self.used <= self.budget:
+                break
+            self._evict(widget)
+
+    def _evict(self, widget):
+        reload = self._entries[widget][2]
+        self._forget(widget)
+        try:
+            widget.config(image="")
+        except tk.TclError:
+            return
+        if reload is not None:
+            funcid = widget.bind("<Map>", lambda e, w=widget: self._reload(w), add="+")
+            self._evicted[widget] = (reload, funcid)
+
+    def _reload(self, widget):
+        evicted = self._evicted.get(widget)
+        if evicted is None:
+            return
+        self._restore_binding(widget)
+        if widget.winfo_exists():
+            evicted[0]()
+
+    def clear(self):
+        for widget in list(self._entries):
+            try:
+                widget.config(image="")
+            except tk.TclError:
+                pass
+        self._entries.clear()
+        self._evicted.clear()
+        self.used = 0
+
+
+class ImageViewer:
+    # Visualizzatore a piena risoluzione per la galleria.
+    # Prima viene decodificata un'anteprima alla risoluzione dello schermo (draft JPEG),
+    # poi l'immagine completa in background. Sullo schermo finiscono solo le tessere
+    # visibili, create su richiesta durante zoom e spostamento e tenute in una cache limitata.
+    TILE_SIZE = 256
+    TILE_CACHE_SIZE = 64
+    PREVIEW_CACHE_SIZE = 3   # immagine corrente e le due vicine
+    MAX_ZOOM = 4.0
+
+    def __init__(self, root, images, index):
+        self.root = root
+        self.images = list(images)
+        self.screen_size = (root.winfo_screenwidth(), root.winfo_screenheight())
+
+        self.window = tk.Toplevel(root)
+        self.window.configure(bg="black")
+        self.window.geometry(f"{int(self.screen_size[0] * 0.8)}x{int(self.screen_size[1] * 0.8)}")
+        self.canvas = tk.Canvas(self.window, bg="black", highlightthickness=0, cursor="fleur")
+        self.canvas.pack(fill="both", expand=True)
+        self.status_label = tk.Label(self.window, text="", font=("Segoe UI", 9),
+                                     fg="#bdc3c7", bg=DEFAULT_BG_COLOR, anchor="w")
+        self.status_label.pack(fill="x")
+
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="visualizzatore")
+        self._previews = OrderedDict()   # percorso -> (anteprima, dimensioni originali)
+        self._full = None                # immagine a piena risoluzione della foto corrente
+        self._tiles = OrderedDict()      # (sorgente, zoom, tx, ty) -> PhotoImage
+        self._generation = 0
+        self._drag_start = None
+        self.preview = None
+        self.full_size = None
+        self.zoom = 1.0
+        self.offset = (0, 0)
+
+        self.canvas.bind("<Configure>", lambda e: self.render())
+        self.canvas.bind("<ButtonPress-1>", self._start_drag)
+        self.canvas.bind("<B1-Motion>", self._drag)
+        self.canvas.bind("<MouseWheel>", lambda e: self._zoom_at(e.x, e.y, 1.25 if e.delta > 0 else 0.8))
+        self.canvas.bind("<Button-4>", lambda e: self._zoom_at(e.x, e.y, 1.25))
+        self.canvas.bind("<Button-5>", lambda e: self._zoom_at(e.x, e.y, 0.8))
+        self.window.bind("<Left>", lambda e: self.show(self.index - 1))
+        self.window.bind("<Right>", lambda e: self.show(self.index + 1))
+        self.window.bind("<plus>", lambda e: self._zoom_at(None, None, 1.25))
+        self.window.bind("<minus>", lambda e: self._zoom_at(None, None, 0.8))
+        self.window.bind("0", lambda e: self._fit())
+        self.window.bind("<Escape>", lambda e: self.close())
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.window.focus_set()
+
+        self.show(index)
+
+    def alive(self):
+        return bool(self.window.winfo_exists())
+
+    def show(self, index):
+        self.index = index % len(self.images)
+        path = self.images[self.index]
+        self._generation += 1
+        generation = self._generation
+
+        # Si tiene a piena risoluzione solo la foto corrente
+        self._full = None
+        self._tiles.clear()
+        self.preview = None
+        self.canvas.delete("all")
+        self.window.title(f"{os.path.basename(path)} ({self.index + 1}/{len(self.images)})")
+        self.status_label.config(text="Caricamento...")
+
+        cached = self._previews.get(path)
+        if cached is not None:
+            self._previews.move_to_end(path)
+            self._preview_ready(generation, path, cached)
+        else:
+            self._submit(self._decode_preview, path, lambda result: self._preview_ready(generation, path, result))
+        self._prefetch_neighbours()
+
+    def _submit(self, func, path, on_done):
+        def done(future):
+            if future.cancelled():
+                return
+            result = future.result() if future.exception() is None else None
+            self.root.after(0, lambda: self.alive() and on_done(result))
+        try:
+            self._executor.submit(func, path).add_done_callback(done)
+        except RuntimeError:
+            pass  # visualizzatore già chiuso
+
+    def _prefetch_neighbours(self):
+        for index in (self.index + 1, self.index - 1):
+            path = self.images[index % len(self.images)]
+            if path not in self._previews:
+                self._submit(self._decode_preview, path, lambda result, p=path: self._store_preview(p, result))
+
+    def _decode_preview(self, path):
+        try:
+            img = Image.open(path)
+            full_size = img.size
+            # Con il draft il JPEG viene decodificato direttamente a 1/2, 1/4 o 1/8
+            img.draft("RGB", self.screen_size)
+            if img.mode not in ("RGB", "RGBA", "L"):
+                img = img.convert("RGBA")
+            img.thumbnail(self.screen_size, Image.LANCZOS)
+            img.load()
+            return img, full_size
+        except (IOError, OSError):
+            return None
+
+    def _decode_full(self, path):
+        try:
+            img = Image.open(path)
+            if img.mode not in ("RGB", "RGBA", "L"):
+                img = img.convert("RGBA")
+            img.load()
+            return img
+        except (IOError, OSError, MemoryError):
+            return None
+
+    def _store_preview(self, path, result):
+        if result is None:
+            return
+        self._previews[path] = result
+        self._previews.move_to_end(path)
+        while len(self._previews) > self.PREVIEW_CACHE_SIZE:
+            self._previews.popitem(last=False)
+
+    def _preview_ready(self, generation, path, result):
+        if generation != self._generation:
+            return
+        if result is None:
+            self.status_label.config(text="Impossibile aprire l'immagine.")
+            return
+        self._store_preview(path, result)
+        self.preview, self.full_size = result
+        self._fit()
+        if self.preview.width < self.full_size[0]:
+            # Raffinamento: l'originale viene decodificato in background per lo zoom
+            self._submit(self._decode_full, path, lambda img: self._full_ready(generation, img))
+        else:
+            self._update_status()
+
+    def _full_ready(self, generation, img):
+        if generation != self._generation or img is None:
+            return
+        self._full = img
+        if self.zoom > self._preview_scale():
+            self._tiles.clear()
+            self.render()
+        self._update_status()
+
+    def _preview_scale(self):
+        return self.preview.width / self.full_size[0]
+
+    def _fit(self):
+        if self.preview is None:
+            return
+        width, height = max(1, self.canvas.winfo_width()), max(1, self.canvas.winfo_height())
+        self.zoom = min(width / self.full_size[0], height / self.full_size[1], 1.0)
+        self.offset = ((width - self.full_size[0] * self.zoom) / 2,
+                       (height - self.full_size[1] * self.zoom) / 2)
+        self.render()
+        self._update_status()
+
+    def _zoom_at(self, x, y, factor):
+        if self.preview is None:
+            return
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if x is None:
+            x, y = width / 2, height / 2
+        fit_zoom = min(width / self.full_size[0], height / self.full_size[1], 1.0)
+        new_zoom = max(fit_zoom, min(self.MAX_ZOOM, self.zoom * factor))
+        # Il punto sotto il cursore resta fermo
+        image_x = (x - self.offset[0]) / self.zoom
+        image_y = (y - self.offset[1]) / self.zoom
+        self.zoom = new_zoom
+        self.offset = (x - image_x * new_zoom, y - image_y * new_zoom)
+        self.render()
+        self._update_status()
+
+    def _start_drag(self, event):
+        self._drag_start = (event.x, event.y, self.offset)
+
+    def _drag(self, event):
+        if self._drag_start is None or self.preview is None:
+            return
+        x0, y0, (ox, oy) = self._drag_start
+        self.offset = (ox + event.x - x0, oy + event.y - y0)
+        self.render()
+
+    def _clamp_offset(self, width, height, display_w, display_h):
+        ox, oy = self.offset
+        ox = (width - display_w) / 2 if display_w <= width else min(0, max(width - display_w, ox))
+        oy = (height - display_h) / 2 if display_h <= height else min(0, max(height - display_h, oy))
+        self.offset = (ox, oy)
+
+    def render(self):
+        if self.preview is None:
+            return
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        display_w = self.full_size[0] * self.zoom
+        display_h = self.full_size[1] * self.zoom
+        self._clamp_offset(width, height, display_w, display_h)
+        ox, oy = self.offset
+
+        # Sorgente: anteprima finché basta, originale quando lo zoom la supera
+        preview_scale = self._preview_scale()
+        if self._full is not None and self.zoom > preview_scale * 1.01:
+            source, source_scale = self._full, 1.0
+        else:
+            source, source_scale = self.preview, preview_scale
+        source_zoom = self.zoom / source_scale
+
+        tile = self.TILE_SIZE
+        first_tx = int(max(0, -ox) // tile)
+        first_ty = int(max(0, -oy) // tile)
+        last_tx = int(min(display_w, width - ox) // tile)
+        last_ty = int(min(display_h, height - oy) // tile)
+
+        self.canvas.delete("tile")
+        for ty in range(first_ty, last_ty + 1):
+            for tx in range(first_tx, last_tx + 1):
+                photo = self._tile(source, source_zoom, tx, ty, display_w, display_h)
+                if photo is not None:
+                    self.canvas.create_image(ox + tx * tile, oy + ty * tile, anchor="nw",
+                                             image=photo, tags="tile")
+
+    def _tile(self, source, source_zoom, tx, ty, display_w, display_h):
+        key = (id(source), round(self.zoom, 5), tx, ty)
+        photo = self._tiles.get(key)
+        if photo is not None:
+            self._tiles.move_to_end(key)
+            return photo
+
+        tile = self.TILE_SIZE
+        left, top = tx * tile, ty * tile
+        right, bottom = min(left + tile, display_w), min(top + tile, display_h)
+        if right <= left or bottom <= top:
+            return None
+        box = (int(left / source_zoom), int(top / source_zoom),
+               max(int(left / source_zoom) + 1, min(source.width, math.ceil(right / source_zoom))),
+               max(int(top / source_zoom) + 1, min(source.height, math.ceil(bottom / source_zoom))))
+        region = source.crop(box).resize((max(1, int(right - left)), max(1, int(bottom - top))),
+                                         Image.BILINEAR)
+        photo = ImageTk.PhotoImage(region)
+        self._tiles[key] = photo
+        while len(self._tiles) > self.TILE_CACHE_SIZE:
+            self._tiles.popitem(last=False)
+        return photo
+
+    def _update_status(self):
+        if self.preview is None:
+            return
+        quality = "originale" if self._full is not None or self.preview.width >= self.full_size[0] else "anteprima"
+        self.status_label.config(
+            text=f"  {self.full_size[0]}×{self.full_size[1]} px — zoom {self.zoom * 100:.0f}% ({quality})"
+                 f"   ← → scorri · rotella zoom · trascina per spostare · 0 adatta · Esc chiudi")
+
+    def close(self):
+        self._generation += 1
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._previews.clear()
+        self._tiles.clear()
+        self._full = None
+        self.preview = None
+        self.window.destroy()
+
+
+# Campi delle colonie che servono al notificatore
+NOTIFIER_FIELDS = ("id", "name", "feeding_schedule", "recurring_schedule")
+NOTIFIER_HOST = "127.0.0.1"
+NOTIFIER_PORT = 47615
+# Un promemoria viene notificato nei 5 minuti successivi all'orario
+REMINDER_WINDOW = timedelta(minutes=5)
+# Recupero dei promemoria persi: al massimo gli ultimi giorni, riassunti in un solo messaggio
+CATCH_UP_MAX_DAYS = 7
+CATCH_UP_DESKTOP_LINES = 5
+
+
+def notifier_view(colony):
+    view = {field: colony[field] for field in NOTIFIER_FIELDS if field in colony}
+    # I messaggi arrivano come JSON: i promemoria tornano record con la data già convertita
+    load_records(view)
+    return view
+
+
+def recurring_reminder(recurring, when):
+    # Il promemoria che una regola ricorrente genera per una sua occorrenza
+    return Reminder({
+        "datetime": when.isoformat(),
+        "description": f"Promemoria ricorrente ({recurring.matcher().describe()})",
+        "food_type": recurring.get('food_type', ''),
+        "quantity": recurring.get('quantity', '')
+    })
+
+
+def reminder_key(colony, reminder):
+    # Identificativo stabile di un promemoria: i promemoria non hanno un id proprio
+    text = "|".join((colony.get("id", ""), reminder.get("datetime", ""),
+                     reminder.get("description", ""), reminder.get("food_type", "")))
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class DeliveryLedger:
+    # Registro delle notifiche già inviate, una riga "data chiave canale" per invio:
+    # un promemoria viene notificato una sola volta per canale, anche se resta nella
+    # finestra di invio per più controlli o se il programma viene riavviato.
+    # All'apertura si scartano le righe più vecchie di RETENTION_DAYS.
+    RETENTION_DAYS = 14
+
+    def __init__(self, path=NOTIFICATION_LEDGER_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._sent = set()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return
+        cutoff = (datetime.now() - timedelta(days=self.RETENTION_DAYS)).strftime('%Y-%m-%d')
+        kept = []
+        for line in lines:
+            parts = line.split()
+            if len(parts) == 3 and parts[0] >= cutoff:
+                self._sent.add((parts[1], parts[2]))
+                kept.append(line)
+        if len(kept) < len(lines):
+            try:
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    f.writelines(line + "\n" for line in kept)
+            except OSError as e:
+                print(f"Impossibile compattare il registro delle notifiche: {e}")
+
+    def delivered(self, key, channel):
+        return (key, channel) in self._sent
+
+    def record(self, key, channel, when):
+        with self._lock:
+            if (key, channel) in self._sent:
+                return
+            self._sent.add((key, channel))
+            try:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(f"{when.strftime('%Y-%m-%d')} {key} {channel}\n")
+            except OSError as e:
+                print(f"Impossibile aggiornare il registro delle notifiche: {e}")
+
+
+class ReminderNotifier:
+    # Logica dei promemoria condivisa dal thread della GUI e dal processo --notifier.
+    # on_change(colony, *campi) viene chiamato dopo ogni modifica ai promemoria di una colonia.
+    def __init__(self, settings, on_change, ledger=None, state_path=NOTIFIER_STATE_FILE):
+        self.settings = settings
+        self.on_change = on_change
+        self.ledger = ledger if ledger is not None else DeliveryLedger()
+        # Ora dell'ultimo controllo, salvata per recuperare i promemoria persi a programma chiuso
+        self.state_path = state_path
+        self.last_check = None
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                self.last_check = datetime.fromisoformat(json.load(f)["last_check"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def enabled(self):
+        return bool(self.settings.get("notifications_email")
+                    or (self.settings.get("notifications_desktop") and NOTIFICATIONS_AVAILABLE))
+
+    def check(self, colonies):
+        now = datetime.now()
+        today = now.date()
+        print(f"Controllo notifiche... Ora attuale: {now.strftime('%H:%M:%S')}")
+
+        if self.last_check is not None and now - self.last_check > REMINDER_WINDOW:
+            # Primo controllo dopo una chiusura, una sospensione o un salto in avanti dell'orologio
+            self.catch_up(colonies, self.last_check, now)
+
+        for colony in colonies:
+            # Gestisci i promemoria ricorrenti
+            for recurring in list(colony.get("recurring_schedule", [])):
+                try:
+                    # Le occorrenze di oggi diventano promemoria; il registro ricorda quelle già
+                    # generate, così un promemoria completato non viene ricreato
+                    day_start = datetime.combine(today, datetime.min.time())
+                    for when in recurring.matcher().occurrences(day_start, day_start + timedelta(days=1)):
+                        new_schedule = recurring_reminder(recurring, when)
+                        key = reminder_key(colony, new_schedule)
+                        schedule = colony.setdefault('feeding_schedule', [])
+                        if self.ledger.delivered(key, "generated") or any(
+                                s.get('datetime') == new_schedule['datetime'] for s in schedule):
+                            continue
+                        print(f"Generando promemoria ricorrente per {colony['name']} per il {when.strftime('%d-%m-%Y %H:%M')}")
+                        insert_sorted(schedule, new_schedule)
+                        self.ledger.record(key, "generated", when)
+                        self.on_change(colony, "feeding_schedule")
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"Errore nel formato del promemoria ricorrente per la colonia {colony['name']}: {e}")
+                    colony['recurring_schedule'].remove(recurring)
+                    self.on_change(colony, "recurring_schedule")
+
+            # Gestisci i promemoria singoli
+            for schedule_dict in list(colony.get("feeding_schedule", [])):
+                try:
+                    schedule_dt = schedule_dict.require_dt()
+                    description = schedule_dict.get('description', '')
+
+                    if now >= schedule_dt and now < schedule_dt + REMINDER_WINDOW:
+                        # La finestra copre più controlli: il registro evita gli invii ripetuti
+                        key = reminder_key(colony, schedule_dict)
+                        if self.settings.get("notifications_desktop") and NOTIFICATIONS_AVAILABLE \
+                                and not self.ledger.delivered(key, "desktop"):
+                            print(f"Promemoria singolo trovato per la colonia {colony['name']} alle {schedule_dt.strftime('%H:%M')}")
+                            if self.send_desktop(colony["name"], schedule_dt, description):
+                                self.ledger.record(key, "desktop", schedule_dt)
+                        if self.settings.get("notifications_email") and not self.ledger.delivered(key, "email"):
+                            # Se l'invio fallisce si riprova al controllo successivo
+                            if self.send_email(colony["name"], schedule_dt, description):
+                                self.ledger.record(key, "email", schedule_dt)
+
+                        # Il promemoria resta in lista: l'utente lo segnerà come completato
+                        # per registrarlo nella cronologia
+
+                except (ValueError, KeyError) as e:
+                    print(f"Errore nel formato del promemoria per la colonia {colony['name']}: {e}")
+                    # Rimuovi il promemoria corrotto per evitare errori futuri
+                    colony["feeding_schedule"].remove(schedule_dict)
+                    self.on_change(colony, "feeding_schedule")
+
+        self.last_check = now
+        try:
+            with open(self.state_path, 'w', encoding='utf-8') as f:
+                json.dump({"last_check": now.isoformat()}, f)
+        except OSError as e:
+            print(f"Impossibile salvare l'ora dell'ultimo controllo: {e}")
+
+    def catch_up(self, colonies, since, now):
+        # Promemoria la cui finestra di invio è trascorsa tra since e now: promemoria singoli
+        # e occorrenze delle regole ricorrenti, calcolate in un unico passaggio e inviate
+        # come un solo riepilogo per canale. Il registro esclude quelli già notificati.
+        since = max(since, now - timedelta(days=CATCH_UP_MAX_DAYS))
+        until = now - REMINDER_WINDOW
+        missed = {}
+        for colony in colonies:
+            for reminder in colony.get("feeding_schedule", []):
+                if reminder.dt is not None and since <= reminder.dt < until:
+                    missed[reminder_key(colony, reminder)] = (colony.get("name", ""), reminder)
+            for recurring in colony.get("recurring_schedule", []):
+                try:
+                    for when in recurring.matcher().occurrences(since, until):
+                        reminder = recurring_reminder(recurring, when)
+                        missed.setdefault(reminder_key(colony, reminder), (colony.get("name", ""), reminder))
+                except (ValueError, KeyError, TypeError):
+                    continue
+        if not missed:
+            return
+        print(f"Promemoria persi dal {since.strftime('%d-%m-%Y %H:%M')}: {len(missed)}")
+
+        channels = []
+        if self.settings.get("notifications_desktop") and NOTIFICATIONS_AVAILABLE:
+            channels.append(("desktop", self.send_summary_desktop))
+        if self.settings.get("notifications_email"):
+            channels.append(("email", self.send_summary_email))
+        for channel, send in channels:
+            pending = sorted(((key, name, reminder) for key, (name, reminder) in missed.items()
+                              if not self.ledger.delivered(key, channel)),
+                             key=lambda item: item[2].dt)
+            if pending and send([(name, reminder) for _, name, reminder in pending]):
+                for key, _, reminder in pending:
+                    self.ledger.record(key, channel, reminder.dt)
+
+    @staticmethod
+    def _summary_line(name, reminder):
+        food = reminder.get('food_type', '')
+        line = f"{reminder.dt.strftime('%d-%m %H:%M')} - {name}"
+        return f"{line} ({food})" if food else line
+
+    def send_summary_desktop(self, missed):
+        lines = [self._summary_line(name, reminder) for name, reminder in missed[:CATCH_UP_DESKTOP_LINES]]
+        if len(missed) > CATCH_UP_DESKTOP_LINES:
+            lines.append(f"... e altri {len(missed) - CATCH_UP_DESKTOP_LINES}")
+        try:
+            plyer.notification.notify(
+                title=f"Promemoria persi: {len(missed)}",
+                message="\n".join(lines),
+                app_name="Ant Colony Monitor"
+            )
+        except Exception as e:
+            print(f"Errore durante l'invio della notifica desktop: {e}")
+            return False
+        print("Riepilogo dei promemoria persi inviato.")
+        return True
+
+    def send_summary_email(self, missed):
+        body = (f"Ciao,\n\nMentre Ant Colony Monitor era chiuso o il computer era in sospensione "
+                f"sono scaduti {len(missed)} promemoria di alimentazione:\n\n")
+        for name, reminder in missed:
+            body += f"- {self._summary_line(name, reminder)}"
+            if reminder.get('description'):
+                body += f": {reminder['description']}"
+            body += "\n"
+        body += "\nSaluti,\nAnt Colony Monitor"
+        return self._send_mail(f"Promemoria persi: {len(missed)}", body, "il riepilogo dei promemoria persi")
+
+    def send_desktop(self, colony_name, schedule_dt, description):
+        notification_title = f"Promemoria Alimentazione - {colony_name}"
+        notification_message = f"È ora di nutrire la colonia '{colony_name}'! (Alle {schedule_dt.strftime('%H:%M')})"
+        if description:
+            notification_message += f"\nNote: {description}"
+        try:
+            plyer.notification.notify(
+                title=notification_title,
+                message=notification_message,
+                app_name="Ant Colony Monitor"
+            )
+        except Exception as e:
+            print(f"Errore durante l'invio della notifica desktop: {e}")
+            return False
+        print("Notifica desktop inviata.")
+        return True
+
+    def send_email(self, colony_name, schedule_dt, description):
+        subject = f"Promemoria Alimentazione: {colony_name}"
+        body = (f"Ciao,\n\nQuesto è un promemoria per l'alimentazione della colonia '{colony_name}'.\n"
+                f"L'orario di alimentazione è alle {schedule_dt.strftime('%H:%M')} di oggi, {schedule_dt.strftime('%d-%m-%Y')}.\n")
+        if description:
+            body += f"Note: {description}\n\n"
+        body += f"Saluti,\nAnt Colony Monitor"
+        return self._send_mail(subject, body, f"la colonia {colony_name}")
+
+    def _send_mail(self, subject, body, what):
+        sender_email = self.settings.get("email_sender")
+        password = self.settings.get("email_password")
+        recipient_email = self.settings.get("email_recipient")
+        smtp_server = self.settings.get("smtp_server")
+        port = self.settings.get("smtp_port")
+
+        if not all([sender_email, password, recipient_email, smtp_server, port]):
+            print("Avviso: le impostazioni email non sono complete. Impossibile inviare la notifica.")
+            return False
+
+        try:
+            context = ssl.create_default_context()
+            if port == 465:
+                with smtplib.SMTP_SSL(smtp_server, port, context=context) as server:
+                    server.login(sender_email, password)
+                    message = f"Subject: {subject}\n\n{body}"
+                    server.sendmail(sender_email, recipient_email, message.encode('utf-8'))
+            else:
+                with smtplib.SMTP(smtp_server, port) as server:
+                    server.starttls(context=context)
+                    server.login(sender_email, password)
+                    message = f"Subject: {subject}\n\n{body}"
+                    server.sendmail(sender_email, recipient_email, message.encode('utf-8'))
+            print(f"Notifica email inviata con successo per {what}.")
+            return True
+        except smtplib.SMTPAuthenticationError:
+            print("Errore di autenticazione SMTP. Controlla email e password nelle impostazioni.")
+        except Exception as e:
+            print(f"Errore durante l'invio della notifica email per {what}: {e}")
+        return False
+
+
+class IpcConnection:
+    # Messaggi JSON, uno per riga, su un socket TCP locale.
+    # TCP su 127.0.0.1 e non un socket Unix: il programma gira soprattutto su Windows.
+    def __init__(self, sock):
+        self.sock = sock
+        self._reader = sock.makefile('r', encoding='utf-8')
+        self._send_lock = threading.Lock()
+
+    def send(self, message):
+        data = (json.dumps(message, ensure_ascii=False, default=json_default) + "\n").encode('utf-8')
+        with self._send_lock:
+            self.sock.sendall(data)
+
+    def messages(self):
+        try:
+            for line in self._reader:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    print(f"Messaggio non valido ignorato: {line[:80]}")
+        except OSError:
+            return
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def notifier_secret(data_dir):
+    # Segreto condiviso tra GUI e notificatore, creato nella cartella dei dati e leggibile solo
+    # dall'utente: la porta locale è raggiungibile da qualunque processo della macchina
+    path = os.path.join(data_dir, NOTIFIER_SECRET_FILE)
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+    except FileExistsError:
+        with open(path, 'r', encoding='ascii') as f:
+            return f.read().strip()
+    secret = secrets.token_hex(32)
+    with os.fdopen(fd, 'w', encoding='ascii') as f:
+        f.write(secret)
+    return secret
+
+
+def notifier_proof(secret, role, nonce):
+    return hmac.new(secret.encode('ascii'), f"{role}|{nonce}".encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def notifier_proof_valid(secret, role, nonce, proof):
+    return bool(secret) and hmac.compare_digest(notifier_proof(secret, role, nonce).encode('utf-8'),
+                                                str(proof).encode('utf-8'))
+
+
+class NotifierDaemon:
+    # Processo senza interfaccia avviato con --notifier: i promemoria partono anche a GUI chiusa.
+    # Tiene in memoria solo i campi dei promemoria. La GUI collegata invia le modifiche man mano
+    # e riceve quelle generate qui; senza GUI le modifiche vengono scritte direttamente nel file.
+    def __init__(self, path=DATA_FILE, host=NOTIFIER_HOST, port=NOTIFIER_PORT):
+        self.path = path
+        colonies, self.settings = read_data_file(path)
+        self.colonies = [notifier_view(colony) for colony in colonies]
+        del colonies
+        gc.collect()
+
+        self.lock = threading.Lock()
+        self.clients = []
+        data_dir = os.path.dirname(os.path.abspath(path))
+        self.notifier = ReminderNotifier(self.settings, self._changed,
+                                         DeliveryLedger(os.path.join(data_dir, NOTIFICATION_LEDGER_FILE)),
+                                         os.path.join(data_dir, NOTIFIER_STATE_FILE))
+        self.secret = notifier_secret(data_dir)
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind((host, port))
+        self.server.listen()
+
+    def serve_forever(self):
+        threading.Thread(target=self._accept_clients, daemon=True).start()
+        print(f"Notificatore in ascolto su {self.server.getsockname()[0]}:{self.server.getsockname()[1]}")
+        try:
+            while True:
+                with self.lock:
+                    if self.notifier.enabled():
+                        self.notifier.check(self.colonies)
+                time.sleep(60)
+        except KeyboardInterrupt:
+            print("Notificatore arrestato.")
+        finally:
+            self.server.close()
+
+    def _accept_clients(self):
+        while True:
+            try:
+                sock, _ = self.server.accept()
+            except OSError:
+                return
+            connection = IpcConnection(sock)
+            threading.Thread(target=self._serve_client, args=(connection,), daemon=True).start()
+
+    def _serve_client(self, connection):
+        if not self._authenticate(connection):
+            connection.close()
+            return
+        with self.lock:
+            self.clients.append(connection)
+        for message in connection.messages():
+            with self.lock:
+                self.handle_message(message)
+        with self.lock:
+            if connection in self.clients:
+                self.clients.remove(connection)
+        connection.close()
+
+    def _authenticate(self, connection):
+        # Sfida e risposta in entrambe le direzioni: il client dimostra di conoscere il segreto
+        # prima di ricevere dati o inviare impostazioni, poi il notificatore fa lo stesso
+        nonce = secrets.token_hex(16)
+        try:
+            connection.sock.settimeout(5)
+            connection.send({"type": "hello", "nonce": nonce})
+            reply = next(connection.messages(), None)
+            if (not reply or reply.get("type") != "auth"
+                    or not notifier_proof_valid(self.secret, "gui", nonce, reply.get("proof", ""))):
+                print("Collegamento al notificatore rifiutato: autenticazione non valida.")
+                return False
+            connection.send({"type": "auth", "proof": notifier_proof(self.secret, "notifier", reply.get("nonce", ""))})
+            connection.sock.settimeout(None)
+        except OSError:
+            return False
+        return True
+
+    def handle_message(self, message):
+        kind = message.get("type")
+        if kind == "sync":
+            self.colonies = [notifier_view(colony) for colony in message.get("colonies", [])]
+            self.settings.update(message.get("settings", {}))
+        elif kind == "colony":
+            view = notifier_view(message.get("colony", {}))
+            for i, colony in enumerate(self.colonies):
+                if colony.get("id") == view.get("id"):
+                    self.colonies[i] = view
+                    break
+            else:
+                self.colonies.append(view)
+        elif kind == "remove":
+            self.colonies = [c for c in self.colonies if c.get("id") != message.get("id")]
+        elif kind == "settings":
+            self.settings.update(message.get("settings", {}))
+
+    def _changed(self, colony, *fields):
+        message = {"type": "colony", "colony": colony, "fields": list(fields)}
+        delivered = False
+        for connection in list(self.clients):
+            try:
+                connection.send(message)
+                delivered = True
+            except OSError:
+                self.clients.remove(connection)
+                connection.close()
+        if not delivered:
+            self._persist(colony, fields)
+
+    def _persist(self, colony, fields):
+        # Nessuna GUI collegata: il file viene riletto, aggiornato per id e riscritto
+        try:
+            colonies, settings = read_data_file(self.path)
+            for stored in colonies:
+                if stored.get("id") == colony.get("id"):
+                    for field in fields or NOTIFIER_FIELDS:
+                        stored[field] = colony.get(field)
+                    break
+            write_data_file(self.path, colonies, settings)
+        except Exception as e:
+            print(f"Impossibile salvare i promemoria: {e}")
+
+
+def run_notifier_daemon():
+    try:
+        daemon = NotifierDaemon()
+    except OSError as e:
+        print(f"Impossibile avviare il notificatore (già in esecuzione?): {e}")
+        return
+    daemon.serve_forever()
+
+
+def parse_instance_command(argv):
+    # Richiesta della riga di comando, inoltrata all'istanza già aperta se ce n'è una:
+    #   --open NOME                      apre la colonia
+    #   --add-reading NOME POP [MORTI]   registra una rilevazione
+    if "--open" in argv:
+        i = argv.index("--open")
+        if i + 1 < len(argv):
+            return {"type": "open", "name": argv[i + 1]}
+    if "--add-reading" in argv:
+        i = argv.index("--add-reading")
+        try:
+            return {"type": "add_reading", "name": argv[i + 1], "population": int(argv[i + 2]),
+                    "mortality": int(argv[i + 3]) if i + 3 < len(argv) and not argv[i + 3].startswith("--") else 0}
+        except (IndexError, ValueError):
+            print("Uso: --add-reading NOME POPOLAZIONE [MORTALITÀ]")
+    return {"type": "show"}
+
+
+class SingleInstance:
+    # Una sola istanza della GUI per cartella dati: il file di lock contiene pid e porta
+    # del socket locale dell'istanza attiva. Un secondo avvio inoltra la sua richiesta
+    # e termina. Socket TCP su 127.0.0.1, come per il notificatore, per Windows.
+    STARTUP_WAIT = 1.0   # secondi di attesa per un lock appena creato e ancora vuoto
+
+    def __init__(self, path=INSTANCE_LOCK_FILE):
+        self.path = path
+        self.server = None
+        self.owner = False
+
+    def acquire(self, command):
+        # True se questo processo diventa l'istanza principale, False se la richiesta è stata inoltrata
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind((NOTIFIER_HOST, 0))
+        self.server.listen()
+        deadline = time.monotonic() + self.STARTUP_WAIT
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                owner = self._read_lock()
+                if owner is not None and self.forward(owner["port"], command):
+                    self.server.close()
+                    return False
+                if owner is None and time.monotonic() < deadline:
+                    time.sleep(0.05)  # l'altra istanza non ha ancora scritto la porta
+                    continue
+                # Lock rimasto da un'istanza terminata male
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+                continue
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"pid": os.getpid(), "port": self.server.getsockname()[1]}, f)
+            self.owner = True
+            return True
+
+    def _read_lock(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                owner = json.load(f)
+            return owner if isinstance(owner.get("port"), int) else None
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    @staticmethod
+    def forward(port, command):
+        try:
+            with socket.create_connection((NOTIFIER_HOST, port), timeout=0.5) as sock:
+                connection = IpcConnection(sock)
+                connection.send(command)
+                reply = next(connection.messages(), None)
+                return bool(reply and reply.get("ok"))
+        except OSError:
+            return False
+
+    def serve(self, handler):
+        # handler(comando) viene chiamato nel thread del socket: deve solo accodare il lavoro
+        def accept():
+            while True:
+                try:
+                    sock, _ = self.server.accept()
+                except OSError:
+                    return
+                connection = IpcConnection(sock)
+                command = next(connection.messages(), None)
+                if command is not None:
+                    handler(command)
+                    try:
+                        connection.send({"ok": True})
+                    except OSError:
+                        pass
+                connection.close()
+        threading.Thread(target=accept, daemon=True).start()
+
+    def release(self):
+        if self.server is not None:
+            self.server.close()
+        if self.owner and (self._read_lock() or {}).get("pid") == os.getpid():
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        self.owner = False
+
+
+API_MAX_BODY = 64 * 1024
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+HTTP_REASONS = {200: "OK", 201: "Created", 304: "Not Modified", 400: "Bad Request",
+                401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed",
+                412: "Precondition Failed", 413: "Payload Too Large",
+                500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+def is_loopback_host(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class ApiServer:
+    # Server HTTP/JSON minimo su asyncio, in un thread con il proprio event loop.
+    # handler(metodo, percorso, query, corpo, intestazioni) -> (stato, corpo in byte, etag)
+    # viene eseguito nel thread di Tk tramite call_ui, che restituisce un Future.
+    def __init__(self, handler, call_ui, host, port, token=""):
+        self.handler = handler
+        self.call_ui = call_ui
+        self.host = host
+        self.port = port
+        self.token = token
+        self.loop = None
+        self.server = None
+
+    def start(self):
+        if not self.token and not is_loopback_host(self.host):
+            # Le richieste di scrittura arriverebbero dalla rete senza alcun controllo
+            raise PermissionError(f"token obbligatorio per ascoltare su {self.host}")
+        started = threading.Event()
+        self._stopped = threading.Event()
+        errors = []
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            try:
+                self.server = self.loop.run_until_complete(
+                    asyncio.start_server(self._handle, self.host, self.port))
+            except OSError as e:
+                errors.append(e)
+                started.set()
+                self.loop.close()
+                return
+            started.set()
+            self.loop.run_forever()
+            self.server.close()
+            self.loop.run_until_complete(self.server.wait_closed())
+            self.loop.close()
+            self._stopped.set()
+
+        threading.Thread(target=run, daemon=True, name="api").start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        print(f"API in ascolto su http://{self.host}:{self.port}/api/colonies")
+
+    def stop(self):
+        if self.loop is not None and self.server is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            # La porta deve essere libera prima di un eventuale riavvio
+            self._stopped.wait(2)
+        self.loop = self.server = None
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, b"", None, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode('latin-1').partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0 or length > API_MAX_BODY:
+                    await self._respond(writer, 413 if length > 0 else 400, b"", None, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                url = urllib.parse.urlsplit(target)
+                query = dict(urllib.parse.parse_qsl(url.query))
+                if self.token and headers.get("authorization") != f"Bearer {self.token}":
+                    status, payload, etag = 401, api_error("Token mancante o non valido."), None
+                else:
+                    try:
+                        status, payload, etag = await asyncio.wrap_future(
+                            self.call_ui(self.handler, method, url.path, query, body, headers))
+                    except Exception as e:
+                        print(f"Errore dell'API su {method} {url.path}: {e}")
+                        status, payload, etag = 500, api_error("Errore interno."), None
+                await self._respond(writer, status, payload, etag, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, etag, keep_alive):
+        head = [f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}",
+                "Content-Type: application/json; charset=utf-8",
+                f"Content-Length: {len(payload)}",
+                "Cache-Control: no-cache",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if etag:
+            head.append(f"ETag: {etag}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + payload)
+        await writer.drain()
+
+
+def api_json(value):
+    return json.dumps(value, ensure_ascii=False, default=json_default).encode('utf-8')
+
+
+def api_error(message):
+    return api_json({"error": message})
+
+
+# (metodo, percorso, nome del metodo dell'app). Il primo gruppo è l'id della colonia.
+API_ROUTES = [
+    ("GET", re.compile(r"^/api/colonies/?$"), "_api_colonies"),
+    ("GET", re.compile(r"^/api/reminders/due/?$"), "_api_due_reminders"),
+    ("GET", re.compile(r"^/api/colonies/([\w-]+)/?$"), "_api_colony"),
+    ("GET", re.compile(r"^/api/colonies/([\w-]+)/history/?$"), "_api_history"),
+    ("POST", re.compile(r"^/api/colonies/([\w-]+)/history/?$"), "_api_add_history"),
+    ("GET", re.compile(r"^/api/colonies/([\w-]+)/feeding-history/?$"), "_api_feeding_history"),
+    ("GET", re.compile(r"^/api/colonies/([\w-]+)/schedule/?$"), "_api_schedule"),
+    ("POST", re.compile(r"^/api/colonies/([\w-]+)/schedule/?$"), "_api_add_schedule"),
+    ("POST", re.compile(r"^/api/colonies/([\w-]+)/schedule/complete/?$"), "_api_complete_schedule"),
+]
+
+
+SENSOR_RING_SIZE = 3600          # campioni in memoria per canale (un'ora a 1 Hz)
+SENSOR_STATS_WINDOW = 300        # secondi coperti da minimo, massimo e media
+SENSOR_FLUSH_SECONDS = 10        # scrittura su disco dei riepiloghi al minuto
+SENSOR_PANEL_REFRESH_MS = 2000
+SENSOR_MAX_CHANNELS = 16         # canali accettati per colonia
+SENSOR_KEYS_REFRESH_SECONDS = 5  # rilettura di id e nomi delle colonie per chiavi sconosciute
+
+
+class SensorChannel:
+    # Un canale (es. temperatura) di una colonia.
+    # I campioni recenti stanno in un buffer circolare a dimensione fissa; minimo e massimo
+    # della finestra usano deque monotone, la media una somma mobile: tutto O(1) ammortizzato.
+    def __init__(self, size=SENSOR_RING_SIZE, window=SENSOR_STATS_WINDOW):
+        self.times = array('d', [0.0]) * size
+        self.values = array('d', [0.0]) * size
+        self.size = size
+        self.count = 0            # campioni totali ricevuti
+        self.window = window
+        self._window_samples = deque()   # (ts, valore) nella finestra
+        self._window_sum = 0.0
+        self._min = deque()              # valori crescenti
+        self._max = deque()              # valori decrescenti
+        self._minute = None              # minuto corrente e suo accumulatore
+        self._minute_stats = None
+
+    def add(self, ts, value):
+        # Restituisce il riepilogo del minuto appena concluso, se ce n'è uno.
+        # Le finestre presuppongono tempi crescenti: i campioni arretrati vengono scartati.
+        if self.count and ts < self.times[(self.count - 1) % self.size]:
+            return None
+        i = self.count % self.size
+        self.times[i] = ts
+        self.values[i] = value
+        self.count += 1
+
+        self._window_samples.append((ts, value))
+        self._window_sum += value
+        while self._min and self._min[-1][1] > value:
+            self._min.pop()
+        self._min.append((ts, value))
+        while self._max and self._max[-1][1] < value:
+            self._max.pop()
+        self._max.append((ts, value))
+        self._expire(ts)
+
+        minute = int(ts // 60)
+        finished = None
+        if minute != self._minute:
+            if self._minute is not None:
+                finished = (self._minute * 60,) + tuple(self._minute_stats)
+            self._minute = minute
+            self._minute_stats = [value, value, 0.0, 0]
+        stats = self._minute_stats
+        stats[0] = min(stats[0], value)
+        stats[1] = max(stats[1], value)
+        stats[2] += value
+        stats[3] += 1
+        return finished
+
+    def _expire(self, now):
+        limit = now - self.window
+        while self._window_samples and self._window_samples[0][0] < limit:
+            self._window_sum -= self._window_samples.popleft()[1]
+        while self._min and self._min[0][0] < limit:
+            self._min.popleft()
+        while self._max and self._max[0][0] < limit:
+            self._max.popleft()
+
+    def stats(self, now):
+        self._expire(now)
+        if not self._window_samples:
+            return None
+        last = self.values[(self.count - 1) % self.size]
+        return {"last": last, "min": self._min[0][1], "max": self._max[0][1],
+                "mean": self._window_sum / len(self._window_samples),
+                "samples": len(self._window_samples)}
+
+    def recent(self, n):
+        n = min(n, self.count, self.size)
+        start = self.count - n
+        return [self.values[i % self.size] for i in range(start, self.count)]
+
+
+class SensorHub:
+    # Raccoglie i campioni dei sensori da UDP e/o da un file in accodamento (porta seriale
+    # registrata su file o pipe) in thread propri; l'interfaccia legge solo le statistiche.
+    # Formato di una riga: "colonia canale valore [timestamp]" oppure JSON
+    # {"colony": ..., "channel": ..., "value": ..., "ts": ...}. La colonia è l'id o il nome.
+    # known_keys restituisce gli id e i nomi delle colonie: i canali nuovi vengono creati solo
+    # per colonie esistenti e fino a SENSOR_MAX_CHANNELS ciascuna, così la memoria resta limitata.
+    def __init__(self, udp_port=0, tail_path="", directory=SENSOR_DIR, known_keys=None):
+        self.udp_port = udp_port
+        self.tail_path = tail_path
+        self.directory = directory
+        self.known_keys = known_keys
+        self.channels = {}        # (colonia, canale) -> SensorChannel
+        self._channel_counts = {}  # colonia -> canali creati
+        self._keys = set()
+        self._keys_time = None
+        self.lock = threading.Lock()
+        self._rollups = []        # righe al minuto in attesa di scrittura
+        self._running = False
+        self._udp = None
+
+    def start(self):
+        self._running = True
+        if self.udp_port:
+            self._udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._udp.bind((NOTIFIER_HOST, self.udp_port))
+            threading.Thread(target=self._read_udp, daemon=True, name="sensori-udp").start()
+        if self.tail_path:
+            threading.Thread(target=self._tail_file, daemon=True, name="sensori-file").start()
+        threading.Thread(target=self._flush_loop, daemon=True, name="sensori-disco").start()
+
+    def stop(self):
+        self._running = False
+        if self._udp is not None:
+            self._udp.close()
+        self.flush()
+
+    def ingest_line(self, line):
+        line = line.strip()
+        if not line:
+            return
+        try:
+            if line.startswith("{"):
+                data = json.loads(line)
+                key, channel, value = str(data["colony"]), str(data["channel"]), float(data["value"])
+                ts = float(data.get("ts") or time.time())
+            else:
+                parts = line.split()
+                key, channel, value = parts[0], parts[1], float(parts[2])
+                ts = float(parts[3]) if len(parts) > 3 else time.time()
+        except (ValueError, KeyError, IndexError, TypeError):
+            return
+        self.ingest(key, channel, value, ts)
+
+    def ingest(self, key, channel, value, ts):
+        with self.lock:
+            sensor = self.channels.get((key, channel))
+            if sensor is None:
+                if not self._accepts(key) or self._channel_counts.get(key, 0) >= SENSOR_MAX_CHANNELS:
+                    return
+                sensor = self.channels[(key, channel)] = SensorChannel()
+                self._channel_counts[key] = self._channel_counts.get(key, 0) + 1
+            finished = sensor.add(ts, value)
+            if finished is not None:
+                self._rollups.append((key, channel) + finished)
+
+    def _accepts(self, key):
+        if self.known_keys is None:
+            return True
+        now = time.monotonic()
+        if key not in self._keys and (self._keys_time is None
+                                      or now - self._keys_time >= SENSOR_KEYS_REFRESH_SECONDS):
+            self._keys = self.known_keys()
+            self._keys_time = now
+        return key in self._keys
+
+    def stats(self, keys):
+        # keys: id e nome della colonia, per accettare entrambe le forme
+        now = time.time()
+        result = {}
+        with self.lock:
+            for (key, channel), sensor in self.channels.items():
+                if key in keys:
+                    stats = sensor.stats(now)
+                    if stats is not None:
+                        stats["recent"] = sensor.recent(120)
+                        result[channel] = stats
+        return result
+
+    def _read_udp(self):
+        while self._running:
+            try:
+                data, _ = self._udp.recvfrom(4096)
+            except OSError:
+                return
+            for line in data.decode('utf-8', 'replace').splitlines():
+                self.ingest_line(line)
+
+    def _tail_file(self):
+        position = None
+        while self._running:
+            try:
+                size = os.path.getsize(self.tail_path)
+                if position is None or size < position:
+                    # Primo avvio: solo le righe nuove. File ricreato o troncato: da capo.
+                    position = size if position is None else 0
+                if size > position:
+                    # Lettura binaria: la posizione è in byte anche con fine riga CRLF
+                    with open(self.tail_path, 'rb') as f:
+                        f.seek(position)
+                        chunk = f.read()
+                    # Un'eventuale riga incompleta viene riletta al prossimo giro
+                    complete = chunk.rfind(b"\n") + 1
+                    for line in chunk[:complete].split(b"\n"):
+                        self.ingest_line(line.decode('utf-8', 'replace'))
+                    position += complete
+            except OSError:
+                pass
+            time.sleep(0.2)
+
+    def _flush_loop(self):
+        while self._running:
+            time.sleep(SENSOR_FLUSH_SECONDS)
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            rollups, self._rollups = self._rollups, []
+        if not rollups:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            by_key = {}
+            for key, channel, minute, low, high, total, count in rollups:
+                by_key.setdefault(key, []).append(
+                    f"{datetime.fromtimestamp(minute).isoformat()},{channel},{low:g},{high:g},{total / count:g},{count}\n")
+            for key, lines in by_key.items():
+                safe_key = re.sub(r"[^\w.-]", "_", key)
+                with open(os.path.join(self.directory, f"{safe_key}.csv"), 'a', encoding='utf-8') as f:
+                    f.writelines(lines)
+        except OSError as e:
+            print(f"Impossibile salvare i riepiloghi dei sensori: {e}")
+
+
 class AntColonyApp:
     def __init__(self, root):
         self.root = root
@@ -53,9 +3032,47 @@ class AntColonyApp:
         self._configure_styles()
 
         self.colonies = []
-        self.settings = {}
-        self.colonies, self.settings = self.load_data()
-        self.create_backup()
+        self.settings = default_settings()
+        self._data_loaded = False
+
+        # Versione del file conosciuta (ultima lettura o scrittura): permette di riconoscere
+        # le modifiche esterne e di unirle colonia per colonia invece di sovrascriverle
+        self._data_file_stamp = None
+        self._colony_fingerprints = {}
+        self._settings_fingerprint = None
+        self._external_read_pending = False
+        self._merging_external_changes = False
+
+        self.search_index = SearchIndex()
+        self.dashboard_index = DashboardIndex()
+        self.history_rollups = HistoryRollups()
+        self.dashboard_filter = ""
+        self.dashboard_sort = "Inserimento"
+        self.dashboard_sort_reverse = False
+        self._colony_cards = {}
+
+        # Schede dei notebook costruite solo alla prima selezione
+        self._lazy_notebooks = {}
+        self._lazy_tab_builders = {}
+        self._selected_tabs = {}
+        # Pannelli della vista colonia: (widget, campi osservati, funzione di aggiornamento)
+        self._view_subscriptions = []
+
+        # Modalità in background: con la finestra nella barra di sistema l'interfaccia viene
+        # smontata e ricostruita alla riapertura a partire dall'ultima schermata
+        self._current_screen = None
+        self.background_mode = False
+
+        # Galleria: le miniature vengono decodificate da un pool di thread
+        self._thumbnail_executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 2),
+                                                      thread_name_prefix="miniature")
+        self._thumbnail_cache = OrderedDict()   # percorso -> immagine PIL già ridotta
+        self._thumbnail_cache_lock = threading.Lock()
+        self._gallery_generation = 0
+        self._gallery_futures = []
+        self._gallery_page = 0
+        self.image_viewer = None
+        self.image_memory = ImageMemoryManager()
 
         self.current_colony = None
         self.current_calendar_date = datetime.now()
@@ -64,93 +3081,330 @@ class AntColonyApp:
 
         # Gestione dell'immagine di sfondo
         self._current_background_label = None
-        self._current_background_photo = None
-        self.background_image_path = self.settings.get("background_image_path")
-        self.update_background_image()
+        self._background_source = None
+        self._background_source_path = None
+        self._background_lock = threading.Lock()
+        self._background_generation = 0
+        self._background_job = None
+        self.background_image_path = None
         self.root.bind("<Configure>", self.on_window_resize)
 
-        # Avvia il thread per il controllo delle notifiche
         self.notification_thread_running = False
-        self.start_notification_thread()
+        self.notifier = ReminderNotifier(self.settings, self._notifier_changed)
+        self.notifier_connection = None
+
+        # Richieste inoltrate da un secondo avvio; quelle arrivate durante il caricamento attendono
+        self.tray_icon = None
+        self._pending_instance_commands = []
+        # Sincronizzazione con la cartella condivisa in corso
+        self._sync_running = False
+
+        # API HTTP locale, attiva solo se abilitata nelle impostazioni
+        self.api_server = None
+
+        # Sensori ambientali (temperatura, umidità...), attivi solo se abilitati
+        self.sensor_hub = None
+
+        # La schermata di avvio appare subito; dati, migrazione, backup e indici
+        # vengono preparati in un thread e la dashboard viene popolata con root.after
+        with STARTUP_TRACER.phase("splash"):
+            self._show_splash()
+            self.center_window()
+        threading.Thread(target=self._load_in_background, name="caricamento-dati", daemon=True).start()
+
+    def _show_splash(self):
+        splash = tk.Frame(self.root, bg=DEFAULT_BG_COLOR)
+        splash.pack(fill="both", expand=True)
+
+        content = tk.Frame(splash, bg=CARD_BG_COLOR, relief="raised", bd=2)
+        content.place(relx=0.5, rely=0.5, anchor="center")
+
+        tk.Label(content, text="🐜 Ant Colony Monitor",
+                font=("Segoe UI", 24, "bold"),
+                fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(padx=60, pady=(40, 10))
+
+        self.splash_status_label = tk.Label(content, text="Caricamento delle colonie...",
+                                            font=("Segoe UI", 11),
+                                            fg="#bdc3c7", bg=CARD_BG_COLOR)
+        self.splash_status_label.pack(pady=(0, 10))
+
+        self.splash_progress = ttk.Progressbar(content, mode="indeterminate", length=300)
+        self.splash_progress.pack(padx=60, pady=(0, 40))
+        self.splash_progress.start(15)
+
+    def _update_splash(self, text, fraction=None):
+        if not self.splash_status_label.winfo_exists():
+            return
+        self.splash_status_label.config(text=text)
+        if fraction is not None:
+            if str(self.splash_progress["mode"]) != "determinate":
+                self.splash_progress.stop()
+                self.splash_progress.config(mode="determinate", maximum=100)
+            self.splash_progress["value"] = fraction * 100
+
+    def _load_in_background(self):
+        last_percent = [-1]
+        def progress(read, total):
+            percent = read * 100 // total
+            if percent != last_percent[0]:
+                last_percent[0] = percent
+                self.root.after(0, self._update_splash,
+                                f"Lettura dati: {read // (1024 * 1024)} / {total // (1024 * 1024)} MB",
+                                read / total)
+
+        error = None
+        colonies, settings = [], default_settings()
+        try:
+            with STARTUP_TRACER.phase("load_data"):
+                colonies, settings = read_data_file(DATA_FILE, progress)
+        except Exception as e:
+            # Anche un JSON valido ma con una struttura inattesa deve arrivare a _finish_loading,
+            # altrimenti il thread muore e l'app resta ferma sulla schermata di avvio
+            error = e
+            colonies, settings = [], default_settings()
+
+        self.root.after(0, self._update_splash, "Creazione del backup...")
+        backup_error = None
+        if error is None:
+            try:
+                with STARTUP_TRACER.phase("create_backup"):
+                    self._write_backup()
+            except Exception as e:
+                backup_error = e
+        elif os.path.exists(DATA_FILE):
+            # File illeggibile: se ne conserva una copia fuori dalla rotazione dei backup
+            # prima di permettere un salvataggio che lo sovrascriverebbe
+            try:
+                error.preserved_copy = self._preserve_unreadable_data_file()
+            except OSError as e:
+                backup_error = e
+
+        self.root.after(0, self._update_splash, "Preparazione degli indici...")
+        with STARTUP_TRACER.phase("indici"):
+            self.search_index.rebuild(colonies)
+            self.dashboard_index.rebuild(colonies)
+            self.history_rollups.rebuild(colonies)
+
+        self.root.after(0, self._finish_loading, colonies, settings, error, backup_error)
+
+    def _finish_loading(self, colonies, settings, error, backup_error):
+        self.colonies, self.settings = colonies, settings
+        self.image_memory.set_budget(self.settings.get("image_memory_budget_mb", 256))
+        if error is not None and backup_error is not None:
+            # Nessuna copia del file illeggibile: il salvataggio resta bloccato per non perderlo
+            messagebox.showerror("Errore", "Impossibile caricare il file dei dati e impossibile "
+                                 f"copiarlo altrove ({backup_error}).\n\n"
+                                 "Le modifiche non verranno salvate finché il file non viene riparato.")
+        else:
+            self._data_loaded = True
+            self._remember_data_file()
+            self.root.after(DATA_FILE_POLL_MS, self._poll_data_file)
+            if error is not None:
+                copy = getattr(error, "preserved_copy", None)
+                message = "Impossibile caricare il file dei dati. Verrà creato un nuovo file."
+                if copy:
+                    message += f"\n\nIl file originale è stato copiato in {copy}."
+                messagebox.showerror("Errore", message)
+            elif backup_error is not None and os.path.exists(DATA_FILE):
+                messagebox.showerror("Errore", f"Errore durante il backup: {backup_error}")
+
+        self.background_image_path = self.settings.get("background_image_path")
+        with STARTUP_TRACER.phase("update_background_image"):
+            self.update_background_image()
+
+        # Avvia il thread per il controllo delle notifiche
+        with STARTUP_TRACER.phase("start_notification_thread"):
+            self.start_notification_thread()
+        self.start_api_server()
+        self.start_sensor_hub()
+        if self.settings.get("sync_folder"):
+            self.sync_now(quiet=True)
 
-        self.create_main_frame()
-        self.center_window()
+        with STARTUP_TRACER.phase("create_main_frame"):
+            self.create_main_frame()
+
+        # Il report di avvio viene scritto quando la dashboard è stata disegnata
+        self.root.after_idle(STARTUP_TRACER.finish)
+
+        for command in self._pending_instance_commands:
+            self.root.after_idle(self.handle_instance_command, command)
+        self._pending_instance_commands = []
 
     def load_data(self):
-        colonies = []
-        settings = {
-            "notifications": True,
-            "notifications_email": False,
-            "notifications_desktop": True,
-            "email_sender": "",
-            "email_password": "",
-            "email_recipient": "",
-            "smtp_server": "smtp.gmail.com",
-            "smtp_port": 587,
-            "theme": "dark",
-            "background_image_path": None,
-        }
-        if os.path.exists(DATA_FILE):
-            try:
-                with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    colonies = data.get("colonies", [])
-                    settings.update(data.get("settings", {}))
-                    
-                    # Logica di migrazione per i vecchi formati di dati
-                    for colony in colonies:
-                        # Migrazione del campo population in history
-                        if "population" in colony and "history" not in colony:
-                            try:
-                                pop = int(colony["population"])
-                                colony["history"] = [{
-                                    "timestamp": datetime.now().isoformat(),
-                                    "population": pop,
-                                    "mortalita": 0,
-                                    "presenza_uova_larve": "non registrato",
-                                    "stato_salute_generale": "non registrato"
-                                }]
-                            except ValueError:
-                                colony["history"] = []
-                            del colony["population"]
-                        elif "history" not in colony:
-                            colony["history"] = []
-                            
-                        # Migrazione del campo feeding_schedule
-                        if "feeding_schedule" in colony:
-                            new_schedule = []
-                            for item in colony["feeding_schedule"]:
-                                if isinstance(item, str):
-                                    new_schedule.append({"datetime": item, "description": "", "food_type": "", "quantity": ""})
-                                else:
-                                    # Aggiungi i nuovi campi se non esistono
-                                    item.setdefault("food_type", "")
-                                    item.setdefault("quantity", "")
-                                    item.setdefault("description", "")
-                                    new_schedule.append(item)
-                            colony["feeding_schedule"] = new_schedule
-                        
-                        # Inizializza i nuovi campi se non esistono
-                        colony.setdefault("recurring_schedule", [])
-                        colony.setdefault("feeding_history", [])
-                        colony.setdefault("notes", "")
-
-            except (json.JSONDecodeError, FileNotFoundError):
-                messagebox.showerror("Errore", "Impossibile caricare il file dei dati. Verrà creato un nuovo file.")
-                colonies = []
-                
-        return colonies, settings
+        try:
+            return read_data_file(DATA_FILE)
+        except (json.JSONDecodeError, FileNotFoundError):
+            messagebox.showerror("Errore", "Impossibile caricare il file dei dati. Verrà creato un nuovo file.")
+            return [], default_settings()
 
     def save_data(self):
+        if not self._data_loaded:
+            # Mai sovrascrivere il file con uno stato non ancora caricato
+            return
+        if self._merging_external_changes:
+            # Un'unione aspetta le risposte sui conflitti: scrivere ora perderebbe le modifiche esterne
+            self.root.after(DATA_FILE_POLL_MS, self.save_data)
+            return
+        if (threading.current_thread() is threading.main_thread()
+                and data_file_stamp(DATA_FILE) not in (None, self._data_file_stamp)):
+            # Il file è stato modificato dall'esterno dopo l'ultima lettura: prima si uniscono
+            # le sue modifiche, poi si salva, così non vengono sovrascritte
+            stamp = data_file_stamp(DATA_FILE)
+            try:
+                colonies, settings = read_data_file(DATA_FILE)
+            except (OSError, ValueError):
+                pass
+            else:
+                self._merge_external_changes(colonies, settings, stamp, save=False)
         try:
-            with open(DATA_FILE, 'w', encoding='utf-8') as f:
-                data = {
-                    "colonies": self.colonies,
-                    "settings": self.settings
-                }
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            write_data_file(DATA_FILE, self.colonies, self.settings)
         except Exception as e:
             messagebox.showerror("Errore", f"Impossibile salvare i dati: {e}")
+            return
+        self._remember_data_file()
+
+    def _remember_data_file(self):
+        self._data_file_stamp = data_file_stamp(DATA_FILE)
+        self._colony_fingerprints = {c["id"]: data_fingerprint(c) for c in self.colonies}
+        self._settings_fingerprint = data_fingerprint(self.settings)
+
+    def _poll_data_file(self):
+        # Windows non ha inotify: basta confrontare data di modifica e dimensione
+        self.root.after(DATA_FILE_POLL_MS, self._poll_data_file)
+        if self._external_read_pending or self._merging_external_changes:
+            return
+        stamp = data_file_stamp(DATA_FILE)
+        if stamp is None or stamp == self._data_file_stamp:
+            return
+        self._external_read_pending = True
+        threading.Thread(target=self._read_external_changes, daemon=True).start()
+
+    def _read_external_changes(self):
+        stamp = data_file_stamp(DATA_FILE)
+        try:
+            colonies, settings = read_data_file(DATA_FILE)
+        except Exception as e:
+            # Probabilmente il file è ancora in scrittura: si riprova al prossimo controllo
+            print(f"Lettura delle modifiche esterne rimandata: {e}")
+            colonies = settings = None
+        self.root.after(0, self._external_changes_read, colonies, settings, stamp)
+
+    def _external_changes_read(self, colonies, settings, stamp):
+        # Il flag resta attivo finché l'unione non è finita: le domande sui conflitti sono
+        # modali ma il timer continua a girare, e con il vecchio stamp ripartirebbe un'altra unione
+        try:
+            if colonies is not None:
+                self._merge_external_changes(colonies, settings, stamp)
+        finally:
+            self._external_read_pending = False
+
+    def _merge_external_changes(self, disk_colonies, disk_settings, stamp, save=True):
+        if self._merging_external_changes:
+            return
+        self._merging_external_changes = True
+        try:
+            keep_local = self._apply_external_changes(disk_colonies, disk_settings, stamp)
+        finally:
+            self._merging_external_changes = False
+        if keep_local and save:
+            # Le scelte locali vengono scritte subito insieme alle modifiche esterne accettate
+            self.save_data()
+
+    def _apply_external_changes(self, disk_colonies, disk_settings, stamp):
+        # Unione a tre vie per colonia: versione conosciuta, versione del file e versione in memoria.
+        # Cambiata solo nel file: si prende il file. Cambiata solo qui: resta quella locale.
+        # Cambiata in entrambi i posti in modo diverso: conflitto, decide l'utente.
+        base = self._colony_fingerprints
+        local = {colony["id"]: colony for colony in self.colonies}
+        disk = {colony["id"]: colony for colony in disk_colonies}
+        disk_fingerprints = {cid: data_fingerprint(colony) for cid, colony in disk.items()}
+        changed, added, removed, conflicts = [], [], [], []
+
+        for cid, disk_colony in disk.items():
+            if disk_fingerprints[cid] == base.get(cid):
+                continue
+            colony = local.get(cid)
+            if colony is None:
+                if cid in base:
+                    conflicts.append(("readd", disk_colony.get("name", ""), cid))
+                else:
+                    added.append(disk_colony)
+                continue
+            local_fingerprint = data_fingerprint(colony)
+            if local_fingerprint == disk_fingerprints[cid]:
+                continue
+            if local_fingerprint == base.get(cid):
+                changed.append(cid)
+            else:
+                conflicts.append(("update", colony.get("name", ""), cid))
+
+        for cid in base:
+            if cid in disk or cid not in local:
+                continue
+            if data_fingerprint(local[cid]) == base[cid]:
+                removed.append(cid)
+            else:
+                conflicts.append(("delete", local[cid].get("name", ""), cid))
+
+        keep_local = False
+        for kind, name, cid in conflicts:
+            if kind == "update":
+                question = (f"La colonia '{name}' è stata modificata sia nell'app sia nel file dei dati.\n\n"
+                            "Sì: usa la versione del file\nNo: mantieni le modifiche dell'app")
+            elif kind == "delete":
+                question = (f"La colonia '{name}' è stata eliminata nel file dei dati ma modificata nell'app.\n\n"
+                            "Sì: eliminala\nNo: mantienila")
+            else:
+                question = (f"La colonia '{name}' è stata eliminata nell'app ma modificata nel file dei dati.\n\n"
+                            "Sì: ripristinala dal file\nNo: lasciala eliminata")
+            if messagebox.askyesno("Conflitto con il file dei dati", question):
+                {"update": changed, "delete": removed, "readd": added}[kind].append(
+                    disk[cid] if kind == "readd" else cid)
+            else:
+                keep_local = True
+
+        for cid in changed:
+            # Aggiornamento sul posto: vista, schede e indici tengono riferimenti al dizionario
+            colony = local[cid]
+            colony.clear()
+            colony.update(disk[cid])
+            self._on_colony_changed(colony)
+        for colony in added:
+            self.colonies.append(colony)
+            self._on_colony_changed(colony)
+        for cid in removed:
+            colony = local[cid]
+            self.colonies.remove(colony)
+            self._on_colony_removed(colony)
+
+        disk_settings_fingerprint = data_fingerprint(disk_settings)
+        if disk_settings_fingerprint != self._settings_fingerprint:
+            if data_fingerprint(self.settings) == self._settings_fingerprint:
+                self.settings.clear()
+                self.settings.update(disk_settings)
+            else:
+                keep_local = True
+
+        # Applicare una versione esterna incrementa la revisione: l'impronta conosciuta
+        # è quella risultante, altrimenti il prossimo controllo vedrebbe un falso conflitto
+        for colony in added:
+            disk_fingerprints[colony["id"]] = data_fingerprint(colony)
+        for cid in changed:
+            disk_fingerprints[cid] = data_fingerprint(local[cid])
+        self._data_file_stamp = stamp
+        self._colony_fingerprints = disk_fingerprints
+        self._settings_fingerprint = disk_settings_fingerprint
+        if changed or added or removed:
+            print(f"Modifiche esterne applicate: {len(changed)} aggiornate, "
+                  f"{len(added)} aggiunte, {len(removed)} eliminate.")
+            if self.current_colony is not None and self.current_colony["id"] in removed:
+                self.create_main_frame()
+            elif self.current_colony is None and self._current_screen == self.create_main_frame:
+                if self._widget_alive('colony_grid_frame') and self.colonies:
+                    self.display_colonies()
+                else:
+                    self.create_main_frame()
+        return keep_local
 
     def center_window(self):
         self.root.update_idletasks()
@@ -220,6 +3474,7 @@ class AntColonyApp:
                        indicatorcolor=[('selected', ACCENT_COLOR)])
         
     def create_main_frame(self):
+        self._current_screen = self.create_main_frame
         self.clear_frame()
         self.current_colony = None # Resetta la colonia attuale
 
@@ -244,6 +3499,8 @@ class AntColonyApp:
             empty_label.pack(expand=True)
             return
 
+        self._create_dashboard_toolbar(content_frame)
+
         self.canvas = tk.Canvas(content_frame, bg=DEFAULT_BG_COLOR, highlightthickness=0)
         self.scrollbar = ttk.Scrollbar(content_frame, orient="vertical", command=self.canvas.yview)
         self.scrollable_frame = tk.Frame(self.canvas, bg=DEFAULT_BG_COLOR)
@@ -262,7 +3519,7 @@ class AntColonyApp:
         self.scrollbar.pack(side="right", fill="y")
 
         self.display_colonies()
-        self.update_background_image()
+        self._lower_background()
 
     def _on_mousewheel(self, event):
         self.canvas.yview_scroll(int(-1*(event.delta/120)), "units")
@@ -289,6 +3546,22 @@ class AntColonyApp:
                   style="Modern.TButton",
                   command=self.show_calendar).pack(side="right", padx=5)
 
+        ttk.Button(btn_frame, text="🔍 Cerca",
+                  style="Modern.TButton",
+                  command=self.show_search).pack(side="right", padx=5)
+
+        ttk.Button(btn_frame, text="📈 Riepilogo",
+                  style="Modern.TButton",
+                  command=self.show_summary).pack(side="right", padx=5)
+
+        ttk.Button(btn_frame, text="📤 Esporta",
+                  style="Modern.TButton",
+                  command=self.show_bulk_export).pack(side="right", padx=5)
+
+        ttk.Button(btn_frame, text="📥 Importa",
+                  style="Modern.TButton",
+                  command=self.import_colonies).pack(side="right", padx=5)
+
         ttk.Button(btn_frame, text="⚙️ Impostazioni",
                   style="Modern.TButton",
                   command=self.show_settings).pack(side="right", padx=5)
@@ -301,91 +3574,162 @@ class AntColonyApp:
                   style="Success.TButton",
                   command=self.create_colony).pack(side="right", padx=5)
 
+    def _create_dashboard_toolbar(self, parent):
+        toolbar = tk.Frame(parent, bg=CARD_BG_COLOR)
+        toolbar.pack(fill="x", pady=(0, 10))
+
+        tk.Label(toolbar, text="🔎 Filtra:", font=("Segoe UI", 10),
+                fg="#bdc3c7", bg=CARD_BG_COLOR).pack(side="left", padx=(10, 5), pady=8)
+
+        filter_var = tk.StringVar(value=self.dashboard_filter)
+        filter_entry = tk.Entry(toolbar, textvariable=filter_var, font=("Segoe UI", 11), width=25)
+        filter_entry.pack(side="left", padx=5)
+
+        def on_filter_change(*args):
+            self.dashboard_filter = filter_var.get()
+            self._apply_dashboard_filter()
+        filter_var.trace_add("write", on_filter_change)
+
+        tk.Label(toolbar, text="Ordina per:", font=("Segoe UI", 10),
+                fg="#bdc3c7", bg=CARD_BG_COLOR).pack(side="left", padx=(20, 5))
+
+        sort_combo = ttk.Combobox(toolbar, values=SORT_MODES, state="readonly", width=14)
+        sort_combo.set(self.dashboard_sort)
+        sort_combo.pack(side="left", padx=5)
+
+        def on_sort_change(event=None):
+            self.dashboard_sort = sort_combo.get()
+            self._apply_dashboard_filter()
+        sort_combo.bind("<<ComboboxSelected>>", on_sort_change)
+
+        reverse_btn = ttk.Button(toolbar, text="⇅", width=3, style="Modern.TButton")
+        def toggle_reverse():
+            self.dashboard_sort_reverse = not self.dashboard_sort_reverse
+            self._apply_dashboard_filter()
+        reverse_btn.config(command=toggle_reverse)
+        reverse_btn.pack(side="left", padx=5)
+
     def display_colonies(self):
+        with STARTUP_TRACER.phase("display_colonies"):
+            self._display_colonies()
+
+    def _display_colonies(self):
         for widget in self.scrollable_frame.winfo_children():
             widget.destroy()
 
-        grid_frame = tk.Frame(self.scrollable_frame, bg=DEFAULT_BG_COLOR)
-        grid_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        self.colony_grid_frame = tk.Frame(self.scrollable_frame, bg=DEFAULT_BG_COLOR)
+        self.colony_grid_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        self._colony_cards = {}
+        self._visible_cards = []
+
+        self.no_match_label = tk.Label(self.colony_grid_frame,
+                                       text="Nessuna colonia corrisponde al filtro.",
+                                       font=("Segoe UI", 12, "italic"),
+                                       fg="#95a5a6", bg=DEFAULT_BG_COLOR)
+
+        # Le schede vengono create una sola volta: filtro e ordinamento le riposizionano soltanto
+        for colony in self.colonies:
+            self._colony_cards[id(colony)] = self._create_colony_card(self.colony_grid_frame, colony)
+
+        self._apply_dashboard_filter()
+
+    def _apply_dashboard_filter(self):
+        if not self._colony_cards or not self.colony_grid_frame.winfo_exists():
+            return
 
         # Calcola il numero di colonne in base alla larghezza della finestra
         canvas_width = self.canvas.winfo_width()
         num_columns = max(1, min(3, canvas_width // 350))
         self.last_colony_grid_width = num_columns
-        
-        for i in range(num_columns):
-            grid_frame.grid_columnconfigure(i, weight=1)
 
-        for idx, colony in enumerate(self.colonies):
-            row = idx // num_columns
-            col = idx % num_columns
-            
-            card = tk.Frame(grid_frame, bg=CARD_BG_COLOR, relief="raised", bd=2)
-            card.grid(row=row, column=col, padx=15, pady=15, sticky="nsew")
+        for i in range(3):
+            self.colony_grid_frame.grid_columnconfigure(i, weight=1 if i < num_columns else 0)
 
-            card_content = tk.Frame(card, bg=CARD_BG_COLOR)
-            card_content.pack(fill="both", expand=True, padx=20, pady=20)
+        visible = self.dashboard_index.order(self.colonies, self.dashboard_filter,
+                                             self.dashboard_sort, self.dashboard_sort_reverse)
+        visible_cards = [self._colony_cards[id(c)] for c in visible if id(c) in self._colony_cards]
 
-            img_frame = tk.Frame(card_content, bg=CARD_BG_COLOR)
-            img_frame.pack(pady=(0, 15))
-            self._create_colony_image_card(img_frame, colony)
+        # Nasconde solo le schede che escono dalla vista
+        visible_set = set(visible_cards)
+        for card in self._visible_cards:
+            if card not in visible_set:
+                card.grid_forget()
 
-            name_label = tk.Label(card_content,
-                                text=colony["name"],
-                                font=("Segoe UI", 14, "bold"),
-                                fg=TEXT_COLOR,
-                                bg=CARD_BG_COLOR)
-            name_label.pack(pady=(0, 5))
+        for idx, card in enumerate(visible_cards):
+            card.grid(row=idx // num_columns, column=idx % num_columns, padx=15, pady=15, sticky="nsew")
+        self._visible_cards = visible_cards
 
-            date_text = f"📅 {colony['collection_date']}"
-            try:
-                collection_date_obj = datetime.strptime(colony['collection_date'], '%Y-%m-%d').date()
-                days_old = (datetime.now().date() - collection_date_obj).days
-                days_text = self.format_days(days_old)
-                date_text += f" ({days_text})"
-            except (ValueError, KeyError):
-                pass
+        if visible_cards:
+            self.no_match_label.grid_forget()
+        else:
+            self.no_match_label.grid(row=0, column=0, columnspan=num_columns, pady=40)
+
+    def _create_colony_card(self, grid_frame, colony):
+        card = tk.Frame(grid_frame, bg=CARD_BG_COLOR, relief="raised", bd=2)
+
+        card_content = tk.Frame(card, bg=CARD_BG_COLOR)
+        card_content.pack(fill="both", expand=True, padx=20, pady=20)
+
+        img_frame = tk.Frame(card_content, bg=CARD_BG_COLOR)
+        img_frame.pack(pady=(0, 15))
+        self._create_colony_image_card(img_frame, colony)
+
+        name_label = tk.Label(card_content,
+                            text=colony["name"],
+                            font=("Segoe UI", 14, "bold"),
+                            fg=TEXT_COLOR,
+                            bg=CARD_BG_COLOR)
+        name_label.pack(pady=(0, 5))
+
+        date_text = f"📅 {colony['collection_date']}"
+        collection_date_obj = self.dashboard_index.keys(colony)["collection_date"]
+        if collection_date_obj:
+            days_old = (datetime.now().date() - collection_date_obj).days
+            days_text = self.format_days(days_old)
+            date_text += f" ({days_text})"
+
+        date_label = tk.Label(card_content,
+                            text=date_text,
+                            font=("Segoe UI", 10),
+                            fg="#bdc3c7",
+                            bg=CARD_BG_COLOR)
+        date_label.pack(pady=2)
+
+        # Prendi l'ultima popolazione registrata
+        last_pop = "0"
+        if colony.get("history"):
+            last_pop = colony['history'][-1]['population']
+            
+        pop_label = tk.Label(card_content,
+                           text=f"👥 Popolazione: {last_pop}",
+                           font=("Segoe UI", 10),
+                           fg="#bdc3c7",
+                           bg=CARD_BG_COLOR)
+        pop_label.pack(pady=2)
+
+        description_preview = colony.get("description", "")
+        if description_preview:
+            desc_label = tk.Label(card_content,
+                                  text=f"📝 {description_preview[:50]}{'...' if len(description_preview) > 50 else ''}",
+                                  font=("Segoe UI", 9, "italic"),
+                                  fg="#95a5a6",
+                                  bg=CARD_BG_COLOR,
+                                  wraplength=200)
+            desc_label.pack(pady=2)
+
+        btn_frame = tk.Frame(card_content, bg=CARD_BG_COLOR)
+        btn_frame.pack(pady=(15, 0))
+
+        ttk.Button(btn_frame, text="Apri",
+                  style="Modern.TButton",
+                  command=lambda c=colony: self.show_colony(c)).pack(side="left", padx=5)
+
+        ttk.Button(btn_frame, text="Elimina",
+                  style="Danger.TButton",
+                  command=lambda c=colony: self.delete_colony(c)).pack(side="left", padx=5)
+
+        return card
 
-            date_label = tk.Label(card_content,
-                                text=date_text,
-                                font=("Segoe UI", 10),
-                                fg="#bdc3c7",
-                                bg=CARD_BG_COLOR)
-            date_label.pack(pady=2)
-
-            # Prendi l'ultima popolazione registrata
-            last_pop = "0"
-            if colony.get("history"):
-                last_pop = colony['history'][-1]['population']
-                
-            pop_label = tk.Label(card_content,
-                               text=f"👥 Popolazione: {last_pop}",
-                               font=("Segoe UI", 10),
-                               fg="#bdc3c7",
-                               bg=CARD_BG_COLOR)
-            pop_label.pack(pady=2)
-
-            description_preview = colony.get("description", "")
-            if description_preview:
-                desc_label = tk.Label(card_content,
-                                      text=f"📝 {description_preview[:50]}{'...' if len(description_preview) > 50 else ''}",
-                                      font=("Segoe UI", 9, "italic"),
-                                      fg="#95a5a6",
-                                      bg=CARD_BG_COLOR,
-                                      wraplength=200)
-                desc_label.pack(pady=2)
-
-            btn_frame = tk.Frame(card_content, bg=CARD_BG_COLOR)
-            btn_frame.pack(pady=(15, 0))
-
-            ttk.Button(btn_frame, text="Apri",
-                      style="Modern.TButton",
-                      command=lambda c=colony: self.show_colony(c)).pack(side="left", padx=5)
-
-            ttk.Button(btn_frame, text="Elimina",
-                      style="Danger.TButton",
-                      command=lambda c=colony: self.delete_colony(c)).pack(side="left", padx=5)
-    
     def format_days(self, days):
         if days == 0:
             return "Oggi"
@@ -404,19 +3748,25 @@ class AntColonyApp:
     def _create_colony_image_card(self, parent, colony):
         img_path = colony.get("profile_image", "")
         if img_path and os.path.exists(img_path):
-            try:
-                img = Image.open(img_path)
-                img.thumbnail((180, 180), Image.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-
-                img_label = tk.Label(parent, image=photo, bg=CARD_BG_COLOR)
-                img_label.image = photo
+            img_label = tk.Label(parent, bg=CARD_BG_COLOR)
+            if self._load_card_image(img_label, img_path):
                 img_label.pack()
-            except (IOError, OSError):
+            else:
+                img_label.destroy()
                 self.create_placeholder_image(parent)
         else:
             self.create_placeholder_image(parent)
 
+    def _load_card_image(self, img_label, img_path):
+        try:
+            img = Image.open(img_path)
+            img.thumbnail((180, 180), Image.LANCZOS)
+        except (IOError, OSError):
+            return False
+        self.image_memory.attach(img_label, ImageTk.PhotoImage(img),
+                                 reload=lambda: self._load_card_image(img_label, img_path))
+        return True
+
     def create_placeholder_image(self, parent):
         placeholder = tk.Label(parent,
                              text="🐜\nNessuna\nImmagine",
@@ -501,6 +3851,7 @@ class AntColonyApp:
                 return
 
             new_colony = {
+                "id": uuid.uuid4().hex,
                 "name": name,
                 "collection_date": date_entry.get(),
                 "description": description,
@@ -510,20 +3861,25 @@ class AntColonyApp:
                 "feeding_schedule": [],
                 "recurring_schedule": [],
                 "feeding_history": [],
-                "history": [{
+                "history": [MonitoringRecord({
                     "timestamp": datetime.now().isoformat(),
                     "population": initial_pop,
                     "mortalita": 0,
                     "presenza_uova_larve": "non registrato",
                     "stato_salute_generale": "non registrato"
-                }],
+                })],
                 "created_at": datetime.now().strftime('%Y-%m-%d %H:%M')
             }
 
             self.colonies.append(new_colony)
+            self._on_colony_changed(new_colony)
             self.save_data()
             dialog.destroy()
-            self.display_colonies()
+            if len(self.colonies) == 1:
+                # La dashboard vuota non ha ancora barra dei filtri né griglia
+                self.create_main_frame()
+            else:
+                self.display_colonies()
             messagebox.showinfo("Successo", f"Colonia '{name}' creata con successo!")
 
         ttk.Button(btn_frame, text="Salva",
@@ -538,11 +3894,23 @@ class AntColonyApp:
 
     def show_colony(self, colony):
         self.current_colony = colony
+        self._selected_tabs = {}
         self.clear_frame()
         self.update_colony_view()
         
+    def _remember_selected_tabs(self):
+        if self._lazy_notebooks:
+            self._selected_tabs = {name: notebook.index(notebook.select())
+                                   for name, notebook in self._lazy_notebooks.items()
+                                   if notebook.winfo_exists() and notebook.select()}
+
     def update_colony_view(self):
+        # Se la vista viene ricostruita per la stessa colonia, le schede selezionate restano le stesse
+        self._remember_selected_tabs()
+        self._current_screen = self.update_colony_view
         self.clear_frame()
+        self._lazy_notebooks = {}
+        self._lazy_tab_builders = {}
 
         main_container = tk.Frame(self.root, bg=DEFAULT_BG_COLOR)
         main_container.pack(fill="both", expand=True)
@@ -564,7 +3932,7 @@ class AntColonyApp:
         paned_window.add(right_panel)
         paned_window.sash_place(0, 350, 0)
 
-        self.update_background_image()
+        self._lower_background()
 
     def _create_colony_header(self, parent_frame):
         header = tk.Frame(parent_frame, bg=CARD_BG_COLOR, height=80)
@@ -578,11 +3946,14 @@ class AntColonyApp:
                   style="Modern.TButton",
                   command=self.create_main_frame).pack(side="left")
 
-        tk.Label(header_content,
-                text=f"🐜 {self.current_colony['name']}",
-                font=("Segoe UI", 18, "bold"),
-                fg=TEXT_COLOR,
-                bg=CARD_BG_COLOR).pack(side="left", padx=20)
+        title_label = tk.Label(header_content,
+                              text=f"🐜 {self.current_colony['name']}",
+                              font=("Segoe UI", 18, "bold"),
+                              fg=TEXT_COLOR,
+                              bg=CARD_BG_COLOR)
+        title_label.pack(side="left", padx=20)
+        self._subscribe(title_label, {"name"},
+                        lambda: title_label.config(text=f"🐜 {self.current_colony['name']}"))
 
         # Pulsante per modificare la colonia
         ttk.Button(header_content, text="✏️ Modifica",
@@ -655,9 +4026,9 @@ class AntColonyApp:
             self.current_colony["name"] = name
             self.current_colony["description"] = description
             self.current_colony["collection_date"] = date_entry.get()
+            self._on_colony_changed(self.current_colony, "name", "description", "collection_date")
             self.save_data()
             dialog.destroy()
-            self.update_colony_view()
             messagebox.showinfo("Successo", "Modifiche salvate con successo!")
 
         ttk.Button(btn_frame, text="Salva Modifiche",
@@ -682,32 +4053,184 @@ class AntColonyApp:
             
         try:
             with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(self.current_colony, f, indent=2, ensure_ascii=False)
+                json.dump(self.current_colony, f, indent=2, ensure_ascii=False, default=json_default)
             messagebox.showinfo("Successo", "Dati della colonia esportati con successo!")
         except Exception as e:
             messagebox.showerror("Errore", f"Errore durante l'esportazione: {str(e)}")
 
+    def show_bulk_export(self):
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Esportazione Dati")
+        dialog.geometry("420x520")
+        dialog.configure(bg=CARD_BG_COLOR)
+        dialog.transient(self.root)
+        dialog.grab_set()
+        dialog.focus_set()
+
+        content = tk.Frame(dialog, bg=CARD_BG_COLOR)
+        content.pack(fill="both", expand=True, padx=20, pady=20)
+
+        tk.Label(content, text="📤 Esporta tutte le colonie",
+                font=("Segoe UI", 14, "bold"),
+                fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(pady=(0, 10))
+        tk.Label(content, text="Un file per tabella: colonie, cronologia, pasti, promemoria.",
+                font=("Segoe UI", 9, "italic"),
+                fg="#95a5a6", bg=CARD_BG_COLOR).pack(anchor="w")
+
+        tk.Label(content, text="Formato:", fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w", pady=(10, 0))
+        formats = ["CSV", "JSON Lines"] + (["Parquet"] if module_available("pyarrow") else [])
+        format_var = ttk.Combobox(content, values=formats, state="readonly")
+        format_var.set("CSV")
+        format_var.pack(fill="x", pady=2)
+
+        range_frame = tk.Frame(content, bg=CARD_BG_COLOR)
+        range_frame.pack(fill="x", pady=(10, 0))
+        tk.Label(range_frame, text="Dal (AAAA-MM-GG):", fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(side="left")
+        start_entry = tk.Entry(range_frame, width=11)
+        start_entry.pack(side="left", padx=5)
+        tk.Label(range_frame, text="Al:", fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(side="left")
+        end_entry = tk.Entry(range_frame, width=11)
+        end_entry.pack(side="left", padx=5)
+
+        tk.Label(content, text="Colonie:", fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w", pady=(10, 0))
+        colony_list = tk.Listbox(content, selectmode="multiple", exportselection=False,
+                                 bg=DEFAULT_BG_COLOR, fg=TEXT_COLOR,
+                                 selectbackground=ACCENT_COLOR, font=("Segoe UI", 10))
+        for colony in self.colonies:
+            colony_list.insert(tk.END, colony.get("name", ""))
+        colony_list.select_set(0, tk.END)
+        colony_list.pack(fill="both", expand=True, pady=2)
+
+        def run_export():
+            start, end = start_entry.get().strip(), end_entry.get().strip()
+            try:
+                for value in (start, end):
+                    if value:
+                        datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                messagebox.showerror("Errore", "Le date devono essere nel formato AAAA-MM-GG.")
+                return
+            selected = [self.colonies[i] for i in colony_list.curselection()]
+            if not selected:
+                messagebox.showerror("Errore", "Seleziona almeno una colonia.")
+                return
+            directory = filedialog.askdirectory(title="Cartella di destinazione")
+            if not directory:
+                return
+            dialog.destroy()
+            threading.Thread(target=self._run_bulk_export,
+                             args=(selected, directory, EXPORT_FORMATS[format_var.get()], start or None, end or None),
+                             daemon=True).start()
+
+        btn_frame = tk.Frame(content, bg=CARD_BG_COLOR)
+        btn_frame.pack(fill="x", pady=(10, 0))
+        ttk.Button(btn_frame, text="Esporta", style="Success.TButton",
+                   command=run_export).pack(side="right", padx=5)
+        ttk.Button(btn_frame, text="Annulla", style="Modern.TButton",
+                   command=dialog.destroy).pack(side="right", padx=5)
+
+    def _run_bulk_export(self, colonies, directory, fmt, start, end):
+        try:
+            counts = export_tables(colonies, directory, fmt, start, end)
+        except Exception as e:
+            message = f"Errore durante l'esportazione: {e}"
+            self.root.after(0, lambda: messagebox.showerror("Errore", message))
+            return
+        summary = "\n".join(f"{table}: {count} righe" for table, count in counts.items())
+        self.root.after(0, lambda: messagebox.showinfo("Successo", f"Esportazione completata in {directory}\n\n{summary}"))
+
+    def import_colonies(self):
+        paths = filedialog.askopenfilenames(
+            filetypes=[("Colonie esportate", "*.json *.csv *.jsonl *.parquet"), ("JSON files", "*.json")],
+            title="Importa colonie"
+        )
+        if not paths:
+            return
+        threading.Thread(target=self._read_import_files, args=(list(paths),), daemon=True).start()
+
+    def _read_import_files(self, paths):
+        # La lettura dei file avviene fuori dal thread dell'interfaccia;
+        # l'unione avviene in un solo passaggio nel thread principale.
+        incoming, errors = [], []
+        for path in paths:
+            try:
+                for colony in iter_import_colonies(path):
+                    if isinstance(colony, dict) and colony.get("name"):
+                        migrate_colony(colony)
+                        incoming.append(colony)
+            except (OSError, ValueError, KeyError) as e:
+                errors.append(f"{os.path.basename(path)}: {e}")
+        self.root.after(0, self._merge_imported_colonies, incoming, errors)
+
+    def _merge_imported_colonies(self, incoming, errors):
+        # Corrispondenza per id; per le esportazioni senza id vale nome + data di raccolta
+        by_id = {colony["id"]: colony for colony in self.colonies}
+        by_key = {(colony.get("name"), colony.get("collection_date")): colony for colony in self.colonies}
+        added = updated = 0
+        for new_colony in incoming:
+            colony = by_id.get(new_colony["id"]) or by_key.get((new_colony.get("name"), new_colony.get("collection_date")))
+            if colony is None:
+                self.colonies.append(new_colony)
+                by_id[new_colony["id"]] = by_key[(new_colony.get("name"), new_colony.get("collection_date"))] = new_colony
+                self._on_colony_changed(new_colony)
+                added += 1
+                continue
+            fields = merge_imported_colony(colony, new_colony)
+            if fields:
+                self._on_colony_changed(colony, *fields)
+                updated += 1
+
+        if added or updated:
+            # Un solo salvataggio e un solo aggiornamento della dashboard per l'intero lotto
+            self.save_data()
+            if self.current_colony is None and self._current_screen == self.create_main_frame:
+                if self._widget_alive('colony_grid_frame'):
+                    self.display_colonies()
+                else:
+                    self.create_main_frame()
+        message = (f"Colonie lette: {len(incoming)}\nNuove: {added}\nAggiornate: {updated}\n"
+                   f"Invariate: {len(incoming) - added - updated}")
+        if errors:
+            message += "\n\nFile non importati:\n" + "\n".join(errors)
+            messagebox.showwarning("Importazione", message)
+        else:
+            messagebox.showinfo("Importazione", message)
+
     def _create_left_panel(self, parent):
         left_panel = tk.Frame(parent, bg=CARD_BG_COLOR, width=350)
         left_panel.pack_propagate(False)
 
         notebook = ttk.Notebook(left_panel)
         notebook.pack(fill="both", expand=True, padx=10, pady=10)
-        
-        info_tab = tk.Frame(notebook, bg=CARD_BG_COLOR)
-        self._create_info_tab(info_tab)
-        notebook.add(info_tab, text="ℹ️ Info")
-        
-        feeding_tab = tk.Frame(notebook, bg=CARD_BG_COLOR)
-        self._create_feeding_tab(feeding_tab)
-        notebook.add(feeding_tab, text="🍯 Alimentazione")
 
-        monitoring_tab = tk.Frame(notebook, bg=CARD_BG_COLOR)
-        self._create_monitoring_tab(monitoring_tab)
-        notebook.add(monitoring_tab, text="📊 Monitoraggio")
-        
+        self._add_lazy_tab(notebook, "ℹ️ Info", self._create_info_tab)
+        self._add_lazy_tab(notebook, "🍯 Alimentazione", self._create_feeding_tab)
+        self._add_lazy_tab(notebook, "📊 Monitoraggio", self._create_monitoring_tab)
+        self._register_lazy_notebook("left", notebook)
+
         return left_panel
 
+    def _add_lazy_tab(self, notebook, text, builder):
+        tab = tk.Frame(notebook, bg=CARD_BG_COLOR)
+        notebook.add(tab, text=text)
+        self._lazy_tab_builders[str(tab)] = (tab, builder)
+        return tab
+
+    def _register_lazy_notebook(self, name, notebook):
+        self._lazy_notebooks[name] = notebook
+        notebook.bind("<<NotebookTabChanged>>", lambda e: self._build_selected_tab(notebook))
+        selected = self._selected_tabs.get(name)
+        if selected is not None and selected < len(notebook.tabs()):
+            notebook.select(selected)
+        self._build_selected_tab(notebook)
+
+    def _build_selected_tab(self, notebook):
+        # Ogni scheda viene costruita una sola volta e resta in memoria finché la vista esiste
+        entry = self._lazy_tab_builders.pop(notebook.select(), None)
+        if entry is not None:
+            tab, builder = entry
+            builder(tab)
+
     def _create_info_tab(self, parent):
         content = tk.Frame(parent, bg=CARD_BG_COLOR)
         content.pack(fill="both", expand=True, padx=10, pady=10)
@@ -716,27 +4239,10 @@ class AntColonyApp:
                 font=("Segoe UI", 14, "bold"),
                 fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w", pady=(0, 15))
 
-        tk.Label(content, text=f"📅 Data raccolta: {self.current_colony['collection_date']}",
-                font=("Segoe UI", 11),
-                fg="#bdc3c7", bg=CARD_BG_COLOR).pack(anchor="w", pady=5)
-        
-        # Display dei dati storici più recenti
-        last_history = self.current_colony['history'][-1] if self.current_colony['history'] else None
-        
-        if last_history:
-            tk.Label(content, text="Ultimo aggiornamento:",
-                    font=("Segoe UI", 11, "italic"),
-                    fg="#95a5a6", bg=CARD_BG_COLOR).pack(anchor="w", pady=(10, 5))
-            
-            tk.Label(content, text=f"👥 Popolazione: {last_history['population']}",
-                    font=("Segoe UI", 11), fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w")
-            tk.Label(content, text=f"💀 Mortalità: {last_history['mortalita']}",
-                    font=("Segoe UI", 11), fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w")
-            tk.Label(content, text=f"🥚 Uova/Larve: {last_history['presenza_uova_larve']}",
-                    font=("Segoe UI", 11), fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w")
-            tk.Label(content, text=f"❤️ Salute: {last_history['stato_salute_generale']}",
-                    font=("Segoe UI", 11), fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w")
-
+        self.info_summary_frame = tk.Frame(content, bg=CARD_BG_COLOR)
+        self.info_summary_frame.pack(fill="x")
+        self._render_info_summary()
+        self._subscribe(self.info_summary_frame, {"history", "collection_date"}, self._render_info_summary)
 
         desc_section = tk.Frame(content, bg=CARD_BG_COLOR)
         desc_section.pack(fill="x", pady=(10, 10))
@@ -751,6 +4257,8 @@ class AntColonyApp:
                                                               insertbackground=TEXT_COLOR)
         self.description_text_area.insert(tk.END, self.current_colony.get("description", ""))
         self.description_text_area.pack(fill="x", pady=(0, 5))
+        self._subscribe(self.description_text_area, {"description"},
+                        lambda: self._sync_text_area(self.description_text_area, "description"))
 
         ttk.Button(desc_section, text="Salva Descrizione",
                   style="Success.TButton",
@@ -766,11 +4274,45 @@ class AntColonyApp:
         self.profile_img_label = tk.Label(img_section, bg=DEFAULT_BG_COLOR)
         self.profile_img_label.pack(pady=10)
         self.update_profile_image()
+        self._subscribe(self.profile_img_label, {"profile_image"}, self.update_profile_image)
 
         ttk.Button(img_section, text="📷 Cambia Immagine",
                   style="Modern.TButton",
                   command=self.change_profile_image).pack(pady=5)
 
+    def _render_info_summary(self):
+        for widget in self.info_summary_frame.winfo_children():
+            widget.destroy()
+        content = self.info_summary_frame
+
+        tk.Label(content, text=f"📅 Data raccolta: {self.current_colony['collection_date']}",
+                font=("Segoe UI", 11),
+                fg="#bdc3c7", bg=CARD_BG_COLOR).pack(anchor="w", pady=5)
+        
+        # Display dei dati storici più recenti
+        last_history = self.current_colony['history'][-1] if self.current_colony['history'] else None
+        
+        if last_history:
+            tk.Label(content, text="Ultimo aggiornamento:",
+                    font=("Segoe UI", 11, "italic"),
+                    fg="#95a5a6", bg=CARD_BG_COLOR).pack(anchor="w", pady=(10, 5))
+            
+            tk.Label(content, text=f"👥 Popolazione: {last_history['population']}",
+                    font=("Segoe UI", 11), fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w")
+            tk.Label(content, text=f"💀 Mortalità: {last_history['mortalita']}",
+                    font=("Segoe UI", 11), fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w")
+            tk.Label(content, text=f"🥚 Uova/Larve: {last_history['presenza_uova_larve']}",
+                    font=("Segoe UI", 11), fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w")
+            tk.Label(content, text=f"❤️ Salute: {last_history['stato_salute_generale']}",
+                    font=("Segoe UI", 11), fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w")
+
+    def _sync_text_area(self, text_area, field):
+        # Sostituisce il testo solo se è cambiato altrove, per non perdere cursore e scorrimento
+        value = self.current_colony.get(field, "")
+        if text_area.get("1.0", tk.END).strip() != value:
+            text_area.delete("1.0", tk.END)
+            text_area.insert(tk.END, value)
+
     def _create_feeding_tab(self, parent):
         content = tk.Frame(parent, bg=CARD_BG_COLOR)
         content.pack(fill="both", expand=True, padx=10, pady=10)
@@ -779,19 +4321,12 @@ class AntColonyApp:
         feeding_notebook.pack(fill="both", expand=True)
 
         # Tab Promemoria Singoli
-        single_tab = tk.Frame(feeding_notebook, bg=CARD_BG_COLOR)
-        self._create_single_feeding_tab(single_tab)
-        feeding_notebook.add(single_tab, text="Promemoria")
-
+        self._add_lazy_tab(feeding_notebook, "Promemoria", self._create_single_feeding_tab)
         # Tab Promemoria Ricorrenti
-        recurring_tab = tk.Frame(feeding_notebook, bg=CARD_BG_COLOR)
-        self._create_recurring_feeding_tab(recurring_tab)
-        feeding_notebook.add(recurring_tab, text="Ricorrenti")
-
+        self._add_lazy_tab(feeding_notebook, "Ricorrenti", self._create_recurring_feeding_tab)
         # Tab Cronologia
-        history_tab = tk.Frame(feeding_notebook, bg=CARD_BG_COLOR)
-        self._create_feeding_history_tab(history_tab)
-        feeding_notebook.add(history_tab, text="Cronologia")
+        self._add_lazy_tab(feeding_notebook, "Cronologia", self._create_feeding_history_tab)
+        self._register_lazy_notebook("feeding", feeding_notebook)
 
     def _create_single_feeding_tab(self, parent):
         # Frame per l'inserimento
@@ -853,9 +4388,26 @@ class AntColonyApp:
         tk.Label(parent, text="Promemoria Attivi", font=("Segoe UI", 12, "bold"),
                 fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w", padx=5, pady=(10, 5))
         
-        self.single_list_frame = tk.Frame(parent, bg=CARD_BG_COLOR)
-        self.single_list_frame.pack(fill="both", expand=True, padx=5, pady=5)
-        self.update_single_feeding_list(self.single_list_frame)
+        self.single_feeding_tree = RecordTree(
+            parent,
+            columns=[("data", "Data", 90, record_sort_time), ("ora", "Ora", 50),
+                     ("cibo", "Cibo", 110), ("note", "Note", 140)],
+            row_values=self._reminder_row_values,
+            row_tags=lambda s: ("scaduto",) if s.get('datetime', '') < datetime.now().isoformat() else (),
+            empty_text="Nessun promemoria di alimentazione")
+        self.single_feeding_tree.tree.tag_configure("scaduto", foreground="#e67e22")
+        self.single_feeding_tree.frame.pack(fill="both", expand=True, padx=5, pady=5)
+        self.single_feeding_tree.tree.bind("<Double-Button-1>", lambda e: self._complete_selected_reminder())
+
+        actions = tk.Frame(parent, bg=CARD_BG_COLOR)
+        actions.pack(fill="x", padx=5, pady=(0, 5))
+        ttk.Button(actions, text="🗑️ Elimina", style="Danger.TButton",
+                   command=self._remove_selected_reminder).pack(side="right", padx=5)
+        ttk.Button(actions, text="✅ Nutrito", style="Success.TButton",
+                   command=self._complete_selected_reminder).pack(side="right", padx=5)
+
+        self.update_single_feeding_list()
+        self._subscribe(self.single_feeding_tree.tree, {"feeding_schedule"}, self.update_single_feeding_list)
     
     def _create_recurring_feeding_tab(self, parent):
         # Frame per l'inserimento
@@ -882,6 +4434,48 @@ class AntColonyApp:
         self.recurring_interval_spin = tk.Spinbox(interval_frame, from_=1, to=30, width=5, textvariable=self.recurring_interval_var, font=("Segoe UI", 10))
         self.recurring_interval_spin.pack(side="left", padx=(10, 0))
 
+        # Giorni della settimana (in alternativa all'intervallo)
+        weekdays_frame = tk.Frame(input_frame, bg=CARD_BG_COLOR)
+        weekdays_frame.pack(fill="x", pady=2)
+        tk.Label(weekdays_frame, text="Oppure nei giorni:", font=("Segoe UI", 10), fg="#bdc3c7", bg=CARD_BG_COLOR).pack(side="left")
+        self.recurring_weekday_vars = []
+        for name in WEEKDAY_NAMES:
+            var = tk.BooleanVar(value=False)
+            tk.Checkbutton(weekdays_frame, text=name, variable=var, font=("Segoe UI", 9),
+                           fg=TEXT_COLOR, bg=CARD_BG_COLOR, selectcolor=DEFAULT_BG_COLOR,
+                           activebackground=CARD_BG_COLOR).pack(side="left")
+            self.recurring_weekday_vars.append(var)
+
+        per_week_frame = tk.Frame(input_frame, bg=CARD_BG_COLOR)
+        per_week_frame.pack(fill="x", pady=2)
+        tk.Label(per_week_frame, text="Oppure volte a settimana:", font=("Segoe UI", 10), fg="#bdc3c7", bg=CARD_BG_COLOR).pack(side="left")
+        self.recurring_per_week_var = tk.StringVar(value="0")
+        tk.Spinbox(per_week_frame, from_=0, to=7, width=3, textvariable=self.recurring_per_week_var,
+                   font=("Segoe UI", 10)).pack(side="left", padx=(10, 0))
+        tk.Label(per_week_frame, text="Ora (HH:MM):", font=("Segoe UI", 10), fg="#bdc3c7", bg=CARD_BG_COLOR).pack(side="left", padx=(15, 0))
+        self.recurring_time_entry = tk.Entry(per_week_frame, width=6)
+        self.recurring_time_entry.pack(side="left", padx=5)
+
+        limits_frame = tk.Frame(input_frame, bg=CARD_BG_COLOR)
+        limits_frame.pack(fill="x", pady=2)
+        tk.Label(limits_frame, text="Fine (AAAA-MM-GG):", font=("Segoe UI", 10), fg="#bdc3c7", bg=CARD_BG_COLOR).pack(side="left")
+        self.recurring_end_entry = tk.Entry(limits_frame, width=11)
+        self.recurring_end_entry.pack(side="left", padx=5)
+        tk.Label(limits_frame, text="Pausa (MM-GG):", font=("Segoe UI", 10), fg="#bdc3c7", bg=CARD_BG_COLOR).pack(side="left", padx=(10, 0))
+        self.recurring_pause_start_entry = tk.Entry(limits_frame, width=6)
+        self.recurring_pause_start_entry.pack(side="left", padx=2)
+        tk.Label(limits_frame, text="→", fg="#bdc3c7", bg=CARD_BG_COLOR).pack(side="left")
+        self.recurring_pause_end_entry = tk.Entry(limits_frame, width=6)
+        self.recurring_pause_end_entry.pack(side="left", padx=2)
+
+        cron_frame = tk.Frame(input_frame, bg=CARD_BG_COLOR)
+        cron_frame.pack(fill="x", pady=2)
+        tk.Label(cron_frame, text="Cron (avanzato):", font=("Segoe UI", 10), fg="#bdc3c7", bg=CARD_BG_COLOR).pack(side="left")
+        self.recurring_cron_entry = tk.Entry(cron_frame, width=20)
+        self.recurring_cron_entry.pack(side="left", padx=10)
+        tk.Label(cron_frame, text="min ora giorno mese giorno_sett.", font=("Segoe UI", 8, "italic"),
+                 fg="#95a5a6", bg=CARD_BG_COLOR).pack(side="left")
+
         # Tipo di cibo
         food_type_frame = tk.Frame(input_frame, bg=CARD_BG_COLOR)
         food_type_frame.pack(fill="x", pady=2)
@@ -907,14 +4501,23 @@ class AntColonyApp:
         self.recurring_list_frame = tk.Frame(parent, bg=CARD_BG_COLOR)
         self.recurring_list_frame.pack(fill="both", expand=True, padx=5, pady=5)
         self.update_recurring_feeding_list()
+        self._subscribe(self.recurring_list_frame, {"recurring_schedule"}, self.update_recurring_feeding_list)
 
     def _create_feeding_history_tab(self, parent):
         tk.Label(parent, text="Cronologia Alimentazione", font=("Segoe UI", 14, "bold"),
                 fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w", padx=10, pady=10)
 
-        self.feeding_history_frame = tk.Frame(parent, bg=CARD_BG_COLOR)
-        self.feeding_history_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        # La cronologia è salvata dalla più vecchia alla più recente e mostrata al contrario
+        self.feeding_history_tree = RecordTree(
+            parent,
+            columns=[("data", "Data", 120, record_sort_time), ("cibo", "Cibo", 110), ("note", "Note", 160)],
+            row_values=self._feeding_record_row_values,
+            newest_first=True,
+            empty_text="Nessun pasto registrato nella cronologia.",
+            height=15)
+        self.feeding_history_tree.frame.pack(fill="both", expand=True, padx=10, pady=10)
         self.update_feeding_history_list()
+        self._subscribe(self.feeding_history_tree.tree, {"feeding_history"}, self.update_feeding_history_list)
     
     def add_feeding_schedule(self, date_str, time_str, description, food_type, quantity):
         if not date_str:
@@ -923,19 +4526,23 @@ class AntColonyApp:
 
         try:
             datetime_obj = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
-            new_schedule = {
-                "datetime": datetime_obj.isoformat(),
-                "description": description,
-                "food_type": food_type,
-                "quantity": quantity
-            }
-            self.current_colony["feeding_schedule"].append(new_schedule)
-            self.save_data()
-            self.update_single_feeding_list()
+            self.add_feeding_reminder(self.current_colony, datetime_obj, description, food_type, quantity)
             messagebox.showinfo("Successo", "Promemoria singolo aggiunto con successo!")
         except ValueError:
             messagebox.showerror("Errore", "Formato data/ora non valido.")
 
+    def add_feeding_reminder(self, colony, datetime_obj, description, food_type, quantity):
+        new_schedule = Reminder({
+            "datetime": datetime_obj.isoformat(),
+            "description": description,
+            "food_type": food_type,
+            "quantity": quantity
+        })
+        insert_sorted(colony["feeding_schedule"], new_schedule)
+        self._on_colony_changed(colony, "feeding_schedule")
+        self.save_data()
+        return new_schedule
+
     def add_recurring_schedule(self):
         start_date_str = self.recurring_start_date_entry.get()
         interval_str = self.recurring_interval_var.get()
@@ -953,94 +4560,106 @@ class AntColonyApp:
             messagebox.showerror("Errore", "Formato data/intervallo non valido.")
             return
 
-        new_recurring = {
+        new_recurring = RecurringRule({
             "start_date": start_date.isoformat(),
             "interval": interval,
             "food_type": food_type,
             "quantity": quantity
-        }
+        })
+        # Opzioni facoltative: vengono salvate solo se compilate
+        weekdays = [day for day, var in enumerate(self.recurring_weekday_vars) if var.get()]
+        if weekdays:
+            new_recurring["weekdays"] = weekdays
+        per_week = self.recurring_per_week_var.get().strip()
+        if per_week not in ("", "0"):
+            new_recurring["times_per_week"] = per_week
+        for field, entry in (("time", self.recurring_time_entry), ("end_date", self.recurring_end_entry),
+                             ("cron", self.recurring_cron_entry)):
+            value = entry.get().strip()
+            if value:
+                new_recurring[field] = value
+        pause = (self.recurring_pause_start_entry.get().strip(), self.recurring_pause_end_entry.get().strip())
+        if any(pause):
+            new_recurring["pauses"] = [list(pause)]
+        try:
+            if "times_per_week" in new_recurring:
+                new_recurring["times_per_week"] = int(new_recurring["times_per_week"])
+            new_recurring.matcher()
+        except (ValueError, TypeError) as e:
+            messagebox.showerror("Errore", f"Regola ricorrente non valida: {e}")
+            return
         self.current_colony["recurring_schedule"].append(new_recurring)
+        self._on_colony_changed(self.current_colony, "recurring_schedule")
         self.save_data()
-        self.update_recurring_feeding_list()
         messagebox.showinfo("Successo", "Promemoria ricorrente aggiunto con successo!")
 
     def remove_feeding_schedule(self, schedule_to_remove, is_recurring=False):
         if is_recurring:
-            schedule_list = self.current_colony["recurring_schedule"]
-            update_func = self.update_recurring_feeding_list
+            field = "recurring_schedule"
             message_type = "ricorrente"
         else:
-            schedule_list = self.current_colony["feeding_schedule"]
-            update_func = self.update_single_feeding_list
+            field = "feeding_schedule"
             message_type = "singolo"
+        schedule_list = self.current_colony[field]
 
         if schedule_to_remove in schedule_list:
             if messagebox.askyesno("Elimina Promemoria", f"Sei sicuro di voler eliminare questo promemoria {message_type}?"):
                 schedule_list.remove(schedule_to_remove)
+                self._on_colony_changed(self.current_colony, field)
                 self.save_data()
-                update_func()
                 messagebox.showinfo("Successo", "Promemoria eliminato!")
     
     def complete_feeding_reminder(self, reminder):
+        self.record_feeding(self.current_colony, reminder)
+        messagebox.showinfo("Successo", f"Pasto registrato nella cronologia!")
+
+    def record_feeding(self, colony, reminder):
         # Aggiungi il pasto alla cronologia
-        new_history_entry = {
+        new_history_entry = FeedingEvent({
             "datetime": datetime.now().isoformat(),
-            "food_type": reminder['food_type'],
-            "quantity": reminder['quantity'],
-            "description": reminder['description']
-        }
-        self.current_colony['feeding_history'].append(new_history_entry)
-        
+            "food_type": reminder.get('food_type', ''),
+            "quantity": reminder.get('quantity', ''),
+            "description": reminder.get('description', '')
+        })
+        insert_sorted(colony['feeding_history'], new_history_entry)
+
         # Rimuovi il promemoria dalla lista
-        self.current_colony['feeding_schedule'].remove(reminder)
-        
-        self.save_data()
-        self.update_colony_view() # Aggiorna tutte le schede
-        messagebox.showinfo("Successo", f"Pasto registrato nella cronologia!")
+        colony['feeding_schedule'].remove(reminder)
+        self._on_colony_changed(colony, "feeding_history", "feeding_schedule")
 
-    def update_single_feeding_list(self, parent_frame=None):
-        if parent_frame is None: parent_frame = self.single_list_frame
+        self.save_data()
+        return new_history_entry
 
-        for widget in parent_frame.winfo_children():
-            widget.destroy()
+    def update_single_feeding_list(self):
+        self.single_feeding_tree.sync(self.current_colony.get("feeding_schedule", []))
 
-        feeding_schedule = sorted(self.current_colony.get("feeding_schedule", []), key=lambda x: x['datetime'])
-        
-        if not feeding_schedule:
-            tk.Label(parent_frame, text="Nessun promemoria di alimentazione",
-                    font=("Segoe UI", 10, "italic"),
-                    fg="#95a5a6", bg=CARD_BG_COLOR).pack(pady=10)
+    def _reminder_row_values(self, schedule):
+        schedule_dt = schedule.dt
+        if schedule_dt is not None:
+            date_text, time_text = schedule_dt.strftime('%d-%m-%Y'), schedule_dt.strftime('%H:%M')
+        else:
+            date_text, time_text = schedule.get('datetime', 'N/D'), ""
+        food_type = schedule.get('food_type', '')
+        quantity = schedule.get('quantity', '')
+        food_text = f"{food_type} ({quantity})" if quantity else food_type
+        return (date_text, time_text, food_text, schedule.get('description', ''))
+
+    def _complete_selected_reminder(self):
+        schedule = self.single_feeding_tree.selected_entry()
+        if schedule is None:
             return
+        schedule_dt = schedule.dt
+        if schedule_dt is None:
+            return
+        if schedule_dt >= datetime.now():
+            messagebox.showinfo("Info", "Il promemoria non è ancora scaduto.")
+            return
+        self.complete_feeding_reminder(schedule)
 
-        for schedule in feeding_schedule:
-            try:
-                schedule_dt = datetime.fromisoformat(schedule['datetime'])
-                description = schedule.get('description', '')
-                food_type = schedule.get('food_type', '')
-                quantity = schedule.get('quantity', '')
-                
-                text = f"📅 {schedule_dt.strftime('%d-%m-%Y')} alle {schedule_dt.strftime('%H:%M')}"
-                if food_type or quantity:
-                    text += f"\n🍯 Cibo: {food_type} ({quantity})"
-                if description:
-                    text += f"\n📝 Note: {description}"
-                
-                item_frame = tk.Frame(parent_frame, bg=CARD_BG_COLOR)
-                item_frame.pack(fill="x", pady=2)
-                
-                tk.Label(item_frame, text=text,
-                        font=("Segoe UI", 10),
-                        fg=TEXT_COLOR, bg=CARD_BG_COLOR, justify="left").pack(side="left", padx=5)
-
-                if schedule_dt < datetime.now():
-                    ttk.Button(item_frame, text="✅ Nutrito", style="Success.TButton",
-                               command=lambda s=schedule: self.complete_feeding_reminder(s)).pack(side="right", padx=5)
-                
-                ttk.Button(item_frame, text="🗑️", style="Danger.TButton",
-                          command=lambda s=schedule: self.remove_feeding_schedule(s)).pack(side="right", padx=5)
-
-            except (ValueError, KeyError):
-                pass
+    def _remove_selected_reminder(self):
+        schedule = self.single_feeding_tree.selected_entry()
+        if schedule is not None:
+            self.remove_feeding_schedule(schedule)
     
     def update_recurring_feeding_list(self):
         for widget in self.recurring_list_frame.winfo_children():
@@ -1053,14 +4672,22 @@ class AntColonyApp:
                     fg="#95a5a6", bg=CARD_BG_COLOR).pack(pady=10)
             return
 
+        now = datetime.now()
         for recurring in recurring_schedule:
             start_date_str = recurring.get('start_date', 'N/D')
-            interval = recurring.get('interval', 'N/D')
             food_type = recurring.get('food_type', '')
             quantity = recurring.get('quantity', '')
+            try:
+                matcher = recurring.matcher()
+                rule_text = matcher.describe()
+                next_time = matcher.next_after(now)
+                next_text = next_time.strftime('%d-%m-%Y %H:%M') if next_time else "terminato"
+            except (ValueError, KeyError, TypeError):
+                rule_text, next_text = "regola non valida", "N/D"
 
             text = f"▶️ Inizia il: {start_date_str}\n"
-            text += f"🔄 Ripeti ogni: {interval} giorni\n"
+            text += f"🔄 Ripeti: {rule_text}\n"
+            text += f"⏭️ Prossimo: {next_text}\n"
             text += f"🍯 Cibo: {food_type} ({quantity})"
 
             item_frame = tk.Frame(self.recurring_list_frame, bg=CARD_BG_COLOR)
@@ -1074,37 +4701,16 @@ class AntColonyApp:
                       command=lambda r=recurring: self.remove_feeding_schedule(r, is_recurring=True)).pack(side="right", padx=5)
 
     def update_feeding_history_list(self):
-        for widget in self.feeding_history_frame.winfo_children():
-            widget.destroy()
-
-        feeding_history = sorted(self.current_colony.get("feeding_history", []), key=lambda x: x['datetime'], reverse=True)
-
-        if not feeding_history:
-            tk.Label(self.feeding_history_frame, text="Nessun pasto registrato nella cronologia.",
-                    font=("Segoe UI", 10, "italic"),
-                    fg="#95a5a6", bg=CARD_BG_COLOR).pack(pady=10)
-            return
-
-        for record in feeding_history:
-            try:
-                record_dt = datetime.fromisoformat(record['datetime'])
-                food_type = record.get('food_type', 'N/D')
-                quantity = record.get('quantity', 'N/D')
-                description = record.get('description', 'Nessuna descrizione')
-
-                text = f"📅 {record_dt.strftime('%d-%m-%Y %H:%M')}\n"
-                text += f"🍯 Cibo: {food_type} ({quantity})\n"
-                text += f"📝 Note: {description}"
-                
-                item_frame = tk.Frame(self.feeding_history_frame, bg=DEFAULT_BG_COLOR)
-                item_frame.pack(fill="x", pady=2)
-                
-                tk.Label(item_frame, text=text,
-                        font=("Segoe UI", 10),
-                        fg=TEXT_COLOR, bg=DEFAULT_BG_COLOR, justify="left").pack(side="left", padx=5)
+        self.feeding_history_tree.sync(self.current_colony.get("feeding_history", []))
 
-            except (ValueError, KeyError):
-                pass
+    def _feeding_record_row_values(self, record):
+        if record.dt is not None:
+            date_text = record.dt.strftime('%d-%m-%Y %H:%M')
+        else:
+            date_text = record.get('datetime', 'N/D')
+        food_type = record.get('food_type', 'N/D')
+        quantity = record.get('quantity', 'N/D')
+        return (date_text, f"{food_type} ({quantity})", record.get('description', '') or 'Nessuna descrizione')
 
     def _create_monitoring_tab(self, parent):
         content = tk.Frame(parent, bg=CARD_BG_COLOR)
@@ -1114,9 +4720,22 @@ class AntColonyApp:
         graph_frame = tk.Frame(content, bg=DEFAULT_BG_COLOR)
         graph_frame.pack(fill="both", expand=True)
 
+        if self.sensor_hub is not None:
+            # Statistiche dei sensori accanto al grafico, aggiornate ogni paio di secondi
+            sensor_panel = tk.Frame(graph_frame, bg=CARD_BG_COLOR, width=220)
+            sensor_panel.pack(side="right", fill="y", padx=5, pady=5)
+            sensor_panel.pack_propagate(False)
+            tk.Label(sensor_panel, text="📡 Sensori (ultimi 5 min)", font=("Segoe UI", 10, "bold"),
+                     fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w", padx=5, pady=(5, 2))
+            self.sensor_empty_label = tk.Label(sensor_panel, text="Nessun dato recente",
+                                               font=("Segoe UI", 9, "italic"),
+                                               fg="#95a5a6", bg=CARD_BG_COLOR)
+            self._refresh_sensor_panel(sensor_panel, {})
+
         self.graph_canvas = tk.Canvas(graph_frame, bg=DEFAULT_BG_COLOR, highlightthickness=0)
         self.graph_canvas.pack(fill="both", expand=True, padx=5, pady=5)
         self.graph_canvas.bind("<Configure>", self.draw_population_graph)
+        self._subscribe(self.graph_canvas, {"history"}, self.draw_population_graph)
 
         # Frame per l'inserimento dei dati
         entry_frame = tk.Frame(content, bg=CARD_BG_COLOR, relief="raised", bd=1)
@@ -1158,6 +4777,40 @@ class AntColonyApp:
         ttk.Button(entry_frame, text="Salva Dati", style="Success.TButton",
                   command=self.save_monitoring_data).pack(pady=10)
         
+    def _refresh_sensor_panel(self, panel, rows):
+        # rows: canale -> (etichetta, canvas); i widget vengono riusati a ogni aggiornamento
+        if not panel.winfo_exists() or self.sensor_hub is None or not self.current_colony:
+            return
+        stats = self.sensor_hub.stats({self.current_colony.get("id"), self.current_colony.get("name")})
+        if stats:
+            self.sensor_empty_label.pack_forget()
+        else:
+            self.sensor_empty_label.pack(anchor="w", padx=5)
+        for channel, values in sorted(stats.items()):
+            if channel not in rows:
+                label = tk.Label(panel, font=("Segoe UI", 9), fg="#bdc3c7", bg=CARD_BG_COLOR, justify="left")
+                label.pack(anchor="w", padx=5, pady=(4, 0))
+                canvas = tk.Canvas(panel, width=200, height=28, bg=DEFAULT_BG_COLOR, highlightthickness=0)
+                canvas.pack(anchor="w", padx=5)
+                rows[channel] = (label, canvas)
+            label, canvas = rows[channel]
+            label.config(text=f"{channel}: {values['last']:.1f}\n"
+                              f"min {values['min']:.1f} · max {values['max']:.1f} · media {values['mean']:.1f}")
+            self._draw_sparkline(canvas, values["recent"])
+        self.root.after(SENSOR_PANEL_REFRESH_MS, self._refresh_sensor_panel, panel, rows)
+
+    def _draw_sparkline(self, canvas, values):
+        canvas.delete("all")
+        if len(values) < 2:
+            return
+        low, high = min(values), max(values)
+        span = (high - low) or 1
+        step = 200 / (len(values) - 1)
+        points = []
+        for i, value in enumerate(values):
+            points.extend((i * step, 26 - (value - low) / span * 24))
+        canvas.create_line(points, fill=ACCENT_COLOR, width=1)
+
     def save_monitoring_data(self):
         try:
             population = int(self.pop_entry.get())
@@ -1166,30 +4819,33 @@ class AntColonyApp:
             messagebox.showerror("Errore", "Popolazione e mortalità devono essere numeri interi.")
             return
 
-        new_record = {
-            "timestamp": datetime.now().isoformat(),
-            "population": population,
-            "mortalita": mortality,
-            "presenza_uova_larve": self.eggs_var.get(),
-            "stato_salute_generale": self.health_var.get()
-        }
-        
-        self.current_colony["history"].append(new_record)
-        self.save_data()
-        
-        # Pulisci i campi e aggiorna la vista
+        self.add_monitoring_record(self.current_colony, population, mortality,
+                                   self.eggs_var.get(), self.health_var.get())
+
+        # Pulisci i campi; grafico e riepilogo si aggiornano tramite _on_colony_changed
         self.pop_entry.delete(0, tk.END)
         self.mortality_entry.delete(0, tk.END)
         self.eggs_var.set("non registrato")
         self.health_var.set("non registrato")
-
-        # Aggiorna la vista per mostrare i nuovi dati
-        self.update_colony_view()
         
         messagebox.showinfo("Successo", "Dati di monitoraggio salvati con successo!")
 
+    def add_monitoring_record(self, colony, population, mortality,
+                              eggs="non registrato", health="non registrato"):
+        new_record = MonitoringRecord({
+            "timestamp": datetime.now().isoformat(),
+            "population": population,
+            "mortalita": mortality,
+            "presenza_uova_larve": eggs,
+            "stato_salute_generale": health
+        })
+        colony["history"].append(new_record)
+        self._on_colony_changed(colony, "history")
+        self.save_data()
+        return new_record
+
     def draw_population_graph(self, event=None):
-        if not self.current_colony or not hasattr(self, 'graph_canvas'):
+        if not self.current_colony or not self._widget_alive('graph_canvas'):
             return
             
         self.graph_canvas.delete("all")
@@ -1201,33 +4857,34 @@ class AntColonyApp:
                                           fill="#95a5a6", font=("Segoe UI", 12))
             return
 
-        # Dati da plottare
-        history_data = sorted(self.current_colony["history"], key=lambda x: x['timestamp'])
-        
-        if len(history_data) < 2:
-            self.graph_canvas.create_text(self.graph_canvas.winfo_width()/2,
-                                          self.graph_canvas.winfo_height()/2,
-                                          text="Aggiungi almeno due dati per visualizzare il grafico.",
-                                          fill="#95a5a6", font=("Segoe UI", 12))
-            return
-            
-        timestamps = [datetime.fromisoformat(d['timestamp']) for d in history_data]
-        populations = [d['population'] for d in history_data]
-        
         # Dimensioni del canvas
         canvas_width = self.graph_canvas.winfo_width()
         canvas_height = self.graph_canvas.winfo_height()
-        
+
         # Margini
         margin = 30
         x_start = margin
         x_end = canvas_width - margin
         y_start = canvas_height - margin
         y_end = margin
-        
+
+        # Con più punti di quanti ne stiano nel grafico si usa il riepilogo più fine che ci sta:
+        # il costo non dipende più dal numero di rilevazioni
+        max_points = max(2, int((x_end - x_start) // 8))
+        series, tier = self._population_series(self.current_colony, max_points)
+
+        if len(series) < 2:
+            self.graph_canvas.create_text(self.graph_canvas.winfo_width()/2,
+                                          self.graph_canvas.winfo_height()/2,
+                                          text="Aggiungi almeno due dati per visualizzare il grafico.",
+                                          fill="#95a5a6", font=("Segoe UI", 12))
+            return
+
+        timestamps = [point[0] for point in series]
+
         # Scaling dei dati
-        pop_min = min(populations)
-        pop_max = max(populations)
+        pop_min = min(point[2] for point in series)
+        pop_max = max(point[3] for point in series)
         
         if pop_max == pop_min:
             pop_min -= 10
@@ -1251,28 +4908,61 @@ class AntColonyApp:
         self.graph_canvas.create_line(x_start, y_start, x_start, y_end, fill=TEXT_COLOR)
 
         # Disegna il grafico a linee
+        show_labels = len(series) <= 30
         points = []
-        for i in range(len(populations)):
-            x = scale_x(timestamps[i])
-            y = scale_y(populations[i])
+        for timestamp, population, low, high in series:
+            x = scale_x(timestamp)
+            y = scale_y(population)
             points.append((x, y))
-            
+
+            if high != low:
+                # Nei riepiloghi: escursione tra minimo e massimo del periodo
+                self.graph_canvas.create_line(x, scale_y(low), x, scale_y(high), fill=GRAPH_COLOR)
+
             # Disegna i punti
             self.graph_canvas.create_oval(x - 3, y - 3, x + 3, y + 3, fill=GRAPH_COLOR, outline="")
             
             # Aggiungi etichetta per il punto
-            self.graph_canvas.create_text(x, y - 10, text=str(populations[i]),
-                                          fill=TEXT_COLOR, font=("Segoe UI", 8))
+            if show_labels:
+                self.graph_canvas.create_text(x, y - 10, text=f"{population:g}",
+                                              fill=TEXT_COLOR, font=("Segoe UI", 8))
             
         if points:
             self.graph_canvas.create_line(points, fill=GRAPH_COLOR, width=2, smooth=True)
 
         # Disegna etichette per gli assi
-        self.graph_canvas.create_text(x_start, y_start + 15, text=timestamps[0].strftime("%d/%m"), fill=TEXT_COLOR)
-        self.graph_canvas.create_text(x_end, y_start + 15, text=timestamps[-1].strftime("%d/%m"), fill=TEXT_COLOR)
+        self.graph_canvas.create_text(x_start, y_start + 15, text=timestamps[0].strftime("%d/%m/%y"), fill=TEXT_COLOR)
+        self.graph_canvas.create_text(x_end, y_start + 15, text=timestamps[-1].strftime("%d/%m/%y"), fill=TEXT_COLOR)
         
-        self.graph_canvas.create_text(x_start - 5, y_start, text=str(pop_min), anchor="e", fill=TEXT_COLOR)
-        self.graph_canvas.create_text(x_start - 5, y_end, text=str(pop_max), anchor="e", fill=TEXT_COLOR)
+        self.graph_canvas.create_text(x_start - 5, y_start, text=f"{pop_min:g}", anchor="e", fill=TEXT_COLOR)
+        self.graph_canvas.create_text(x_start - 5, y_end, text=f"{pop_max:g}", anchor="e", fill=TEXT_COLOR)
+        if tier != "raw":
+            self.graph_canvas.create_text(x_end, y_end - 15, text=ROLLUP_TIER_LABELS[tier],
+                                          anchor="e", fill="#95a5a6", font=("Segoe UI", 8, "italic"))
+
+    def _population_series(self, colony, max_points):
+        # Punti (istante, valore, minimo, massimo) dai dati grezzi o dal riepilogo adatto
+        history = colony.get("history", [])
+        if len(history) <= max_points:
+            series = []
+            for record in history:
+                try:
+                    population = int(record['population'])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if record.dt is not None:
+                    series.append((record.dt, population, population, population))
+            series.sort(key=lambda point: point[0])
+            return series, "raw"
+        for tier in ROLLUP_TIERS:
+            buckets = self.history_rollups.buckets(colony, tier)
+            if len(buckets) <= max_points:
+                break
+        buckets = buckets[-max_points:]
+        return [(datetime.combine(period, datetime.min.time()),
+                 round(bucket["population_sum"] / bucket["count"], 1),
+                 bucket["population_min"], bucket["population_max"])
+                for period, bucket in buckets], tier
 
     def _create_right_panel(self, parent):
         right_panel = tk.Frame(parent, bg=CARD_BG_COLOR)
@@ -1280,17 +4970,13 @@ class AntColonyApp:
         self.colony_notebook = ttk.Notebook(right_panel)
         self.colony_notebook.pack(fill="both", expand=True, padx=10, pady=10)
 
-        gallery_tab = self._create_gallery_tab()
-        notes_tab = self._create_notes_tab()
-
-        self.colony_notebook.add(gallery_tab, text="📸 Galleria")
-        self.colony_notebook.add(notes_tab, text="📝 Blocco Note")
+        self._add_lazy_tab(self.colony_notebook, "📸 Galleria", self._create_gallery_tab)
+        self._add_lazy_tab(self.colony_notebook, "📝 Blocco Note", self._create_notes_tab)
+        self._register_lazy_notebook("right", self.colony_notebook)
 
         return right_panel
 
-    def _create_gallery_tab(self):
-        gallery_tab = tk.Frame(self.colony_notebook, bg=CARD_BG_COLOR)
-
+    def _create_gallery_tab(self, gallery_tab):
         gallery_header = tk.Frame(gallery_tab, bg=CARD_BG_COLOR)
         gallery_header.pack(fill="x", padx=20, pady=(20, 10))
 
@@ -1302,7 +4988,18 @@ class AntColonyApp:
                   style="Success.TButton",
                   command=self.add_colony_image).pack(side="right")
 
-        gallery_canvas = tk.Canvas(gallery_tab, bg=DEFAULT_BG_COLOR, highlightthickness=0)
+        pager = tk.Frame(gallery_tab, bg=CARD_BG_COLOR)
+        pager.pack(side="bottom", fill="x", padx=20, pady=(0, 15))
+        ttk.Button(pager, text="◀", width=3, style="Modern.TButton",
+                   command=lambda: self._change_gallery_page(-1)).pack(side="left")
+        self.gallery_page_label = tk.Label(pager, text="", font=("Segoe UI", 10),
+                                           fg="#bdc3c7", bg=CARD_BG_COLOR)
+        self.gallery_page_label.pack(side="left", expand=True)
+        ttk.Button(pager, text="▶", width=3, style="Modern.TButton",
+                   command=lambda: self._change_gallery_page(1)).pack(side="right")
+
+        self.gallery_canvas = tk.Canvas(gallery_tab, bg=DEFAULT_BG_COLOR, highlightthickness=0)
+        gallery_canvas = self.gallery_canvas
         gallery_scrollbar = ttk.Scrollbar(gallery_tab, orient="vertical", command=gallery_canvas.yview)
         self.gallery_frame = tk.Frame(gallery_canvas, bg=DEFAULT_BG_COLOR)
 
@@ -1317,13 +5014,11 @@ class AntColonyApp:
         gallery_canvas.pack(side="left", fill="both", expand=True, padx=20, pady=(0, 20))
         gallery_scrollbar.pack(side="right", fill="y", padx=(0, 20), pady=(0, 20))
 
+        self._gallery_page = 0
         self.display_colony_images()
+        self._subscribe(self.gallery_frame, {"images"}, self.display_colony_images)
 
-        return gallery_tab
-
-    def _create_notes_tab(self):
-        notes_tab = tk.Frame(self.colony_notebook, bg=CARD_BG_COLOR)
-
+    def _create_notes_tab(self, notes_tab):
         tk.Label(notes_tab, text="Appunti della Colonia",
                 font=("Segoe UI", 14, "bold"),
                 fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w", padx=20, pady=(20, 10))
@@ -1334,17 +5029,17 @@ class AntColonyApp:
                                                         insertbackground=TEXT_COLOR)
         self.notes_text_area.insert(tk.END, self.current_colony.get("notes", ""))
         self.notes_text_area.pack(fill="both", expand=True, padx=20, pady=(0, 10))
+        self._subscribe(self.notes_text_area, {"notes"},
+                        lambda: self._sync_text_area(self.notes_text_area, "notes"))
 
         ttk.Button(notes_tab, text="Salva Appunti",
                   style="Success.TButton",
                   command=self.save_notes).pack(pady=5, padx=20, anchor="e")
 
-        return notes_tab
-
     def show_settings(self):
         dialog = tk.Toplevel(self.root)
         dialog.title("Impostazioni")
-        dialog.geometry("550x550")
+        dialog.geometry("550x1050")
         dialog.configure(bg=CARD_BG_COLOR)
         dialog.transient(self.root)
         dialog.grab_set()
@@ -1378,6 +5073,16 @@ class AntColonyApp:
                                             style="Toggle.TButton")
         notif_email_check.pack(anchor="w", padx=5)
 
+        modules_frame = tk.Frame(notif_frame, bg=CARD_BG_COLOR)
+        modules_frame.pack(fill="x", pady=(5, 0))
+        for module_name, feature in OPTIONAL_MODULES:
+            if module_available(module_name):
+                status = f"✅ {feature} ({module_name})"
+            else:
+                status = f"❌ {feature}: pip install {module_name if module_name != 'PIL' else 'pillow'}"
+            tk.Label(modules_frame, text=status, font=("Segoe UI", 9),
+                    fg="#95a5a6", bg=CARD_BG_COLOR).pack(anchor="w", padx=5)
+
         # Email settings
         email_frame = tk.Frame(content, bg=CARD_BG_COLOR)
         email_frame.pack(fill="x", pady=10)
@@ -1432,7 +5137,96 @@ class AntColonyApp:
         ttk.Button(backup_frame, text="Ripristina Backup",
                   style="Warning.TButton",
                   command=self.restore_backup).pack(side="left", padx=5)
-        
+
+        # Memoria immagini
+        memory_frame = tk.Frame(content, bg=CARD_BG_COLOR)
+        memory_frame.pack(fill="x", pady=10)
+        tk.Label(memory_frame, text="Memoria Immagini:",
+                font=("Segoe UI", 12, "bold"),
+                fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w", pady=(0, 5))
+
+        used, count = self.image_memory.usage()
+        tk.Label(memory_frame, text=f"In uso: {used / (1024 * 1024):.1f} MB ({count} immagini)",
+                font=("Segoe UI", 9), fg="#95a5a6", bg=CARD_BG_COLOR).pack(anchor="w", padx=5)
+
+        budget_frame = tk.Frame(memory_frame, bg=CARD_BG_COLOR)
+        budget_frame.pack(fill="x")
+        tk.Label(budget_frame, text="Limite (MB):", fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(side="left")
+        self.image_budget_var = tk.StringVar(value=str(self.settings.get("image_memory_budget_mb", 256)))
+        image_budget_entry = tk.Entry(budget_frame, textvariable=self.image_budget_var, width=6)
+        image_budget_entry.pack(side="left", padx=5)
+
+        # API locale
+        api_frame = tk.Frame(content, bg=CARD_BG_COLOR)
+        api_frame.pack(fill="x", pady=10)
+        tk.Label(api_frame, text="API Locale:",
+                font=("Segoe UI", 12, "bold"),
+                fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w", pady=(0, 5))
+
+        self.api_enabled_var = tk.BooleanVar(value=self.settings.get("api_enabled", False))
+        ttk.Checkbutton(api_frame, text="Abilita API HTTP/JSON",
+                        variable=self.api_enabled_var,
+                        style="Toggle.TButton").pack(anchor="w", padx=5)
+
+        api_address_frame = tk.Frame(api_frame, bg=CARD_BG_COLOR)
+        api_address_frame.pack(fill="x")
+        tk.Label(api_address_frame, text="Indirizzo:", fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(side="left")
+        self.api_host_var = tk.StringVar(value=self.settings.get("api_host", "127.0.0.1"))
+        tk.Entry(api_address_frame, textvariable=self.api_host_var, width=15).pack(side="left", padx=5)
+        tk.Label(api_address_frame, text="Porta:", fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(side="left")
+        self.api_port_var = tk.StringVar(value=str(self.settings.get("api_port", 8765)))
+        tk.Entry(api_address_frame, textvariable=self.api_port_var, width=6).pack(side="left", padx=5)
+        tk.Label(api_address_frame, text="Token:", fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(side="left")
+        self.api_token_var = tk.StringVar(value=self.settings.get("api_token", ""))
+        tk.Entry(api_address_frame, textvariable=self.api_token_var, width=12, show="*").pack(side="left", padx=5)
+
+        # Sensori
+        sensor_frame = tk.Frame(content, bg=CARD_BG_COLOR)
+        sensor_frame.pack(fill="x", pady=10)
+        tk.Label(sensor_frame, text="Sensori Ambientali:",
+                font=("Segoe UI", 12, "bold"),
+                fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w", pady=(0, 5))
+
+        self.sensors_enabled_var = tk.BooleanVar(value=self.settings.get("sensors_enabled", False))
+        ttk.Checkbutton(sensor_frame, text="Ricevi dati dai sensori",
+                        variable=self.sensors_enabled_var,
+                        style="Toggle.TButton").pack(anchor="w", padx=5)
+
+        sensor_source_frame = tk.Frame(sensor_frame, bg=CARD_BG_COLOR)
+        sensor_source_frame.pack(fill="x")
+        tk.Label(sensor_source_frame, text="Porta UDP:", fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(side="left")
+        self.sensor_udp_port_var = tk.StringVar(value=str(self.settings.get("sensor_udp_port", 47616)))
+        tk.Entry(sensor_source_frame, textvariable=self.sensor_udp_port_var, width=6).pack(side="left", padx=5)
+        tk.Label(sensor_source_frame, text="File:", fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(side="left")
+        self.sensor_file_var = tk.StringVar(value=self.settings.get("sensor_file", ""))
+        tk.Entry(sensor_source_frame, textvariable=self.sensor_file_var, width=25).pack(side="left", padx=5)
+
+        # Sincronizzazione
+        sync_frame = tk.Frame(content, bg=CARD_BG_COLOR)
+        sync_frame.pack(fill="x", pady=10)
+        tk.Label(sync_frame, text="Sincronizzazione:",
+                font=("Segoe UI", 12, "bold"),
+                fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w", pady=(0, 5))
+
+        sync_folder_frame = tk.Frame(sync_frame, bg=CARD_BG_COLOR)
+        sync_folder_frame.pack(fill="x")
+        tk.Label(sync_folder_frame, text="Cartella condivisa:", fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(side="left")
+        self.sync_folder_var = tk.StringVar(value=self.settings.get("sync_folder", ""))
+        tk.Entry(sync_folder_frame, textvariable=self.sync_folder_var, width=25).pack(side="left", padx=5)
+        ttk.Button(sync_folder_frame, text="Sfoglia",
+                   style="Modern.TButton",
+                   command=lambda: self.sync_folder_var.set(
+                       filedialog.askdirectory(title="Cartella condivisa") or self.sync_folder_var.get())
+                   ).pack(side="left", padx=5)
+
+        def sync_from_dialog():
+            self.settings["sync_folder"] = self.sync_folder_var.get().strip()
+            self.sync_now()
+
+        ttk.Button(sync_frame, text="Sincronizza ora",
+                   style="Modern.TButton",
+                   command=sync_from_dialog).pack(anchor="w", padx=5, pady=5)
+
         btn_frame = tk.Frame(content, bg=CARD_BG_COLOR)
         btn_frame.pack(fill="x", pady=20)
         
@@ -1448,11 +5242,46 @@ class AntColonyApp:
             except ValueError:
                 messagebox.showerror("Errore", "La porta SMTP deve essere un numero intero.")
                 return
+            try:
+                budget = int(self.image_budget_var.get().strip())
+                if budget <= 0:
+                    raise ValueError
+            except ValueError:
+                messagebox.showerror("Errore", "Il limite di memoria deve essere un numero intero positivo.")
+                return
+            self.settings["image_memory_budget_mb"] = budget
+            self.image_memory.set_budget(budget)
+            try:
+                api_port = int(self.api_port_var.get().strip())
+            except ValueError:
+                messagebox.showerror("Errore", "La porta dell'API deve essere un numero intero.")
+                return
+            self.settings["api_enabled"] = self.api_enabled_var.get()
+            self.settings["api_host"] = self.api_host_var.get().strip() or "127.0.0.1"
+            self.settings["api_port"] = api_port
+            self.settings["api_token"] = self.api_token_var.get().strip()
+            token_notice = ""
+            if not self.settings["api_token"] and not is_loopback_host(self.settings["api_host"]):
+                # Fuori da 127.0.0.1 l'API richiede sempre un token: se manca se ne genera uno
+                self.settings["api_token"] = secrets.token_urlsafe(16)
+                self.api_token_var.set(self.settings["api_token"])
+                token_notice = f"\n\nToken dell'API generato: {self.settings['api_token']}"
+            try:
+                sensor_udp_port = int(self.sensor_udp_port_var.get().strip() or 0)
+            except ValueError:
+                messagebox.showerror("Errore", "La porta UDP dei sensori deve essere un numero intero.")
+                return
+            self.settings["sensors_enabled"] = self.sensors_enabled_var.get()
+            self.settings["sensor_udp_port"] = sensor_udp_port
+            self.settings["sensor_file"] = self.sensor_file_var.get().strip()
+            self.settings["sync_folder"] = self.sync_folder_var.get().strip()
 
             self.save_data()
             dialog.destroy()
-            messagebox.showinfo("Successo", "Impostazioni salvate con successo!")
+            messagebox.showinfo("Successo", f"Impostazioni salvate con successo!{token_notice}")
             self.restart_notification_thread()
+            self.restart_api_server()
+            self.restart_sensor_hub()
 
         ttk.Button(btn_frame, text="Salva Impostazioni",
                   style="Success.TButton",
@@ -1501,24 +5330,33 @@ class AntColonyApp:
         except smtplib.SMTPAuthenticationError:
             messagebox.showerror("Errore", "Errore di autenticazione. Controlla email e password.")
         except Exception as e:
-            messagebox.showerror("Errore", f"Impossibile inviare l'email: {e}")
+            messagebox.showerror("Errore", f"Impossibile inviare l'email: {e}")
+
+    def create_backup(self):
+        try:
+            self._write_backup()
+            messagebox.showinfo("Backup", "Backup creato con successo!")
+        except Exception as e:
+            messagebox.showerror("Errore", f"Errore durante il backup: {e}")
 
-    def create_backup(self):
+    def _write_backup(self):
         if not os.path.exists(BACKUP_DIR):
             os.makedirs(BACKUP_DIR)
-        
+
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_file = os.path.join(BACKUP_DIR, f"backup_{timestamp}.json")
-        
-        try:
-            shutil.copy(DATA_FILE, backup_file)
-            # Mantieni solo gli ultimi 5 backup
-            backups = sorted([f for f in os.listdir(BACKUP_DIR) if f.startswith("backup_")], reverse=True)
-            for old_backup in backups[5:]:
-                os.remove(os.path.join(BACKUP_DIR, old_backup))
-            messagebox.showinfo("Backup", "Backup creato con successo!")
-        except Exception as e:
-            messagebox.showerror("Errore", f"Errore durante il backup: {e}")
+
+        shutil.copy(DATA_FILE, backup_file)
+        # Mantieni solo gli ultimi 5 backup
+        backups = sorted([f for f in os.listdir(BACKUP_DIR) if f.startswith("backup_")], reverse=True)
+        for old_backup in backups[5:]:
+            os.remove(os.path.join(BACKUP_DIR, old_backup))
+
+    def _preserve_unreadable_data_file(self):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        copy_path = f"{DATA_FILE}.illeggibile_{timestamp}"
+        shutil.copy(DATA_FILE, copy_path)
+        return copy_path
 
     def restore_backup(self):
         if not os.path.exists(BACKUP_DIR):
@@ -1564,6 +5402,15 @@ class AntColonyApp:
                 try:
                     shutil.copy(backup_file, DATA_FILE)
                     self.colonies, self.settings = self.load_data()
+                    self.search_index.rebuild(self.colonies)
+                    self.dashboard_index.rebuild(self.colonies)
+                    self.history_rollups.rebuild(self.colonies)
+                    self._remember_data_file()
+                    if not self._data_loaded:
+                        # Un ripristino riuscito sblocca il salvataggio fermato da un file illeggibile
+                        self._data_loaded = True
+                        self.root.after(DATA_FILE_POLL_MS, self._poll_data_file)
+                    self._sync_notifier_daemon()
                     dialog.destroy()
                     self.create_main_frame()
                     messagebox.showinfo("Successo", "Backup ripristinato con successo!")
@@ -1586,12 +5433,12 @@ class AntColonyApp:
             current_size = (event.width, event.height)
             if current_size != self.last_size and any(current_size):
                 self.last_size = current_size
-                self.update_background_image()
-                if not self.current_colony and hasattr(self, 'canvas') and self.canvas.winfo_exists():
+                self._schedule_background_update()
+                if not self.current_colony and self._widget_alive('canvas'):
                     new_num_columns = max(1, min(3, self.canvas.winfo_width() // 350))
                     if new_num_columns != self.last_colony_grid_width:
-                        self.display_colonies()
-                if self.current_colony and hasattr(self, 'graph_canvas') and self.graph_canvas.winfo_exists():
+                        self._apply_dashboard_filter()
+                if self.current_colony and self._widget_alive('graph_canvas'):
                     self.draw_population_graph()
 
     def set_background_image(self):
@@ -1605,43 +5452,186 @@ class AntColonyApp:
             self.update_background_image()
 
     def update_background_image(self):
+        # Decodifica e ridimensionamento avvengono in un thread; il PhotoImage
+        # viene creato nel thread principale. Solo l'ultima richiesta viene mostrata.
+        self._background_generation += 1
+        generation = self._background_generation
+
+        if not self.background_image_path:
+            self._remove_background()
+            return
+
+        root_width, root_height = self.root.winfo_width(), self.root.winfo_height()
+        if root_width <= 1 or root_height <= 1:
+            return
+        threading.Thread(target=self._prepare_background,
+                         args=(self.background_image_path, (root_width, root_height), generation),
+                         daemon=True).start()
+
+    def _schedule_background_update(self):
+        # Durante il ridimensionamento della finestra arrivano molti eventi: si aggiorna solo alla fine
+        if self._background_job is not None:
+            self.root.after_cancel(self._background_job)
+        self._background_job = self.root.after(150, self._run_background_update)
+
+    def _run_background_update(self):
+        self._background_job = None
+        if not self.background_mode:
+            self.update_background_image()
+
+    def _prepare_background(self, path, size, generation):
+        try:
+            with self._background_lock:
+                # L'immagine originale resta in memoria: i ridimensionamenti non rileggono il file
+                if self._background_source_path != path:
+                    source = Image.open(path)
+                    source.load()
+                    self._background_source, self._background_source_path = source, path
+                img = self._background_source
+
+            root_width, root_height = size
+            img_ratio = img.width / img.height
+            root_ratio = root_width / root_height
+            if root_ratio > img_ratio:
+                new_width = root_width
+                new_height = int(root_width / img_ratio)
+            else:
+                new_height = root_height
+                new_width = int(root_height * img_ratio)
+
+            img = img.resize((new_width, new_height), Image.LANCZOS)
+        except Exception as e:
+            self.root.after(0, self._background_failed, path, e)
+            return
+        self.root.after(0, self._show_background, img, generation)
+
+    def _show_background(self, img, generation):
+        if generation != self._background_generation:
+            return
+        label = tk.Label(self.root)
+        self.image_memory.attach(label, ImageTk.PhotoImage(img), reload=self.update_background_image)
+        label.place(x=0, y=0, relwidth=1, relheight=1)
+        label.lower()
+        # La nuova etichetta sostituisce la vecchia solo quando è pronta, senza sfarfallii
+        self._remove_background()
+        self._current_background_label = label
+
+    def _background_failed(self, path, error):
+        print(f"Errore nel caricamento dell'immagine di sfondo: {error}")
+        if path != self.background_image_path:
+            return
+        self._remove_background()
+        self.background_image_path = None
+        self.settings["background_image_path"] = None
+        self.save_data()
+
+    def _remove_background(self):
         if self._current_background_label:
+            self.image_memory.detach(self._current_background_label)
             self._current_background_label.destroy()
             self._current_background_label = None
-            self._current_background_photo = None
-        
-        if self.background_image_path and os.path.exists(self.background_image_path):
-            try:
-                img = Image.open(self.background_image_path)
-                root_width, root_height = self.root.winfo_width(), self.root.winfo_height()
-                if root_width > 0 and root_height > 0:
-                    img_ratio = img.width / img.height
-                    root_ratio = root_width / root_height
-                    if root_ratio > img_ratio:
-                        new_width = root_width
-                        new_height = int(root_width / img_ratio)
-                    else:
-                        new_height = root_height
-                        new_width = int(root_height * img_ratio)
-                        
-                    img = img.resize((new_width, new_height), Image.LANCZOS)
-                    self._current_background_photo = ImageTk.PhotoImage(img)
-                    
-                    self._current_background_label = tk.Label(self.root, image=self._current_background_photo)
-                    self._current_background_label.place(x=0, y=0, relwidth=1, relheight=1)
-                    self._current_background_label.lower()
-            except Exception as e:
-                print(f"Errore nel caricamento dell'immagine di sfondo: {e}")
-                self.background_image_path = None
-                self.settings["background_image_path"] = None
-                self.save_data()
-    
+
+    def _lower_background(self):
+        if self._current_background_label:
+            self._current_background_label.lower()
+
+    def _widget_alive(self, name):
+        # Con le schede costruite su richiesta un widget della vista può non esistere ancora
+        widget = getattr(self, name, None)
+        return widget is not None and bool(widget.winfo_exists())
+
     def clear_frame(self):
+        self._view_subscriptions = []
+        self._cancel_gallery_loading()
         for widget in self.root.winfo_children():
             if widget is not self._current_background_label:
                 widget.destroy()
 
+    def show_summary(self):
+        self._current_screen = self.show_summary
+        self.clear_frame()
+        self.current_colony = None # Resetta la colonia attuale
+
+        main_container = tk.Frame(self.root, bg=DEFAULT_BG_COLOR)
+        main_container.pack(fill="both", expand=True)
+
+        header = tk.Frame(main_container, bg=CARD_BG_COLOR, height=80)
+        header.pack(fill="x")
+        header.pack_propagate(False)
+
+        header_content = tk.Frame(header, bg=CARD_BG_COLOR)
+        header_content.pack(fill="both", expand=True, padx=20, pady=15)
+
+        ttk.Button(header_content, text="← Indietro",
+                  style="Modern.TButton",
+                  command=self.create_main_frame).pack(side="left")
+
+        tk.Label(header_content,
+                text="📈 Riepilogo Colonie",
+                font=("Segoe UI", 18, "bold"),
+                fg=TEXT_COLOR,
+                bg=CARD_BG_COLOR).pack(side="left", padx=20)
+
+        content = tk.Frame(main_container, bg=CARD_BG_COLOR)
+        content.pack(fill="both", expand=True, padx=20, pady=20)
+
+        tk.Label(content, text="Ultimo mese con rilevazioni, confrontato con il precedente. Doppio clic per aprire la colonia.",
+                font=("Segoe UI", 10, "italic"),
+                fg="#95a5a6", bg=CARD_BG_COLOR).pack(anchor="w", padx=10, pady=(10, 5))
+
+        summary_tree = RecordTree(
+            content,
+            columns=(("name", "Colonia", 180), ("month", "Mese", 80, lambda row: row["period"]),
+                     ("population", "Pop. media", 90, lambda row: row["mean"]),
+                     ("trend", "Variazione", 90, lambda row: row["change"]),
+                     ("mortality", "Mortalità", 80, lambda row: row["mortality"]),
+                     ("health", "Salute prevalente", 130),
+                     ("records", "Rilevazioni", 80, lambda row: row["records"])),
+            row_values=lambda row: (row["name"], row["month"], row["population"], row["trend"],
+                                    row["mortality"], row["health"], row["records"]),
+            sort_field="name", empty_text="Nessuna rilevazione registrata.", height=20)
+        summary_tree.frame.pack(fill="both", expand=True, padx=10, pady=10)
+        summary_tree.tree.bind("<Double-1>", lambda e: self._open_summary_row(summary_tree))
+        summary_tree.set_entries(sorted(self._colony_summaries(), key=lambda row: row["name"].casefold()))
+
+    def _colony_summaries(self):
+        # Legge solo il livello mensile dei riepiloghi: costo indipendente dalla lunghezza della cronologia
+        rows = []
+        for colony in self.colonies:
+            months = self.history_rollups.buckets(colony, "month")
+            if not months:
+                continue
+            period, bucket = months[-1]
+            mean = bucket["population_sum"] / bucket["count"]
+            trend, change = "", float("-inf")
+            if len(months) > 1:
+                previous = months[-2][1]
+                previous_mean = previous["population_sum"] / previous["count"]
+                if previous_mean:
+                    change = (mean - previous_mean) / previous_mean * 100
+                    trend = f"{change:+.1f}%"
+            rows.append({
+                "colony": colony,
+                "name": colony.get("name", ""),
+                "period": period,
+                "month": period.strftime("%m/%Y"),
+                "mean": mean,
+                "population": f"{mean:.0f}",
+                "change": change,
+                "trend": trend,
+                "mortality": bucket["mortality_sum"],
+                "health": max(bucket["health"].items(), key=lambda item: item[1])[0],
+                "records": bucket["count"],
+            })
+        return rows
+
+    def _open_summary_row(self, summary_tree):
+        row = summary_tree.selected_entry()
+        if row is not None:
+            self.show_colony(row["colony"])
+
     def show_calendar(self):
+        self._current_screen = self.show_calendar
         self.clear_frame()
         self.current_colony = None # Resetta la colonia attuale
 
@@ -1776,12 +5766,13 @@ class AntColonyApp:
             colony_name = colony['name']
             
             # Promemoria singoli
-            for schedule_dict in sorted(colony.get("feeding_schedule", []), key=lambda x: x['datetime']):
+            # I promemoria sono già ordinati per data
+            for schedule_dict in colony.get("feeding_schedule", []):
                 try:
                     schedule_str = schedule_dict['datetime']
                     if schedule_str.startswith(day_str):
                         found_events = True
-                        event_dt = datetime.fromisoformat(schedule_str)
+                        event_dt = schedule_dict.require_dt()
                         food_type = schedule_dict.get('food_type', 'N/D')
                         quantity = schedule_dict.get('quantity', 'N/D')
                         description = schedule_dict.get('description', '')
@@ -1803,6 +5794,30 @@ class AntColonyApp:
                 except (ValueError, KeyError):
                     pass
 
+            # Promemoria ricorrenti che cadono in questo giorno
+            day_start = datetime.combine(day_date, datetime.min.time())
+            for recurring in colony.get("recurring_schedule", []):
+                try:
+                    occurrences = list(recurring.matcher().occurrences(day_start, day_start + timedelta(days=1)))
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if not occurrences:
+                    continue
+                found_events = True
+                event_text = f"🔄 {', '.join(when.strftime('%H:%M') for when in occurrences)} - {colony_name}\n"
+                event_text += f"{recurring.matcher().describe()}\n"
+                event_text += f"Tipo: {recurring.get('food_type', 'N/D')} ({recurring.get('quantity', 'N/D')})"
+
+                event_frame = tk.Frame(self.events_frame, bg=DEFAULT_BG_COLOR)
+                event_frame.pack(fill="x", padx=10, pady=2)
+
+                tk.Label(event_frame, text=event_text,
+                        font=("Segoe UI", 10),
+                        fg=TEXT_COLOR, bg=DEFAULT_BG_COLOR, justify="left").pack(side="left")
+
+                ttk.Button(event_frame, text="🗑️", style="Danger.TButton",
+                          command=lambda c=colony, r=recurring: self._delete_calendar_event(c, r, is_recurring=True)).pack(side="right")
+
         if not found_events:
             tk.Label(self.events_frame, text="Nessun promemoria in questo giorno.",
                     font=("Segoe UI", 10, "italic"),
@@ -1816,10 +5831,9 @@ class AntColonyApp:
     
     def _delete_calendar_event(self, colony, schedule_dict, is_recurring):
         if messagebox.askyesno("Elimina Promemoria", "Sei sicuro di voler eliminare questo promemoria?"):
-            if is_recurring:
-                colony['recurring_schedule'].remove(schedule_dict)
-            else:
-                colony['feeding_schedule'].remove(schedule_dict)
+            field = 'recurring_schedule' if is_recurring else 'feeding_schedule'
+            colony[field].remove(schedule_dict)
+            self._on_colony_changed(colony, field)
             self.save_data()
             self.update_calendar_view()
             messagebox.showinfo("Successo", "Promemoria eliminato!")
@@ -1904,13 +5918,14 @@ class AntColonyApp:
                     food_type = food_type_var.get()
                     quantity = quantity_entry.get()
                     datetime_obj = datetime.strptime(f"{day_date.strftime('%Y-%m-%d')} {time_str}", "%Y-%m-%d %H:%M")
-                    new_schedule = {
+                    new_schedule = Reminder({
                         "datetime": datetime_obj.isoformat(),
                         "description": description,
                         "food_type": food_type,
                         "quantity": quantity
-                    }
-                    selected_colony["feeding_schedule"].append(new_schedule)
+                    })
+                    insert_sorted(selected_colony["feeding_schedule"], new_schedule)
+                    self._on_colony_changed(selected_colony, "feeding_schedule")
                     self.save_data()
                     self.update_calendar_view()
                     dialog.destroy()
@@ -1943,49 +5958,137 @@ class AntColonyApp:
 
     def get_all_feeding_dates(self):
         dates = set()
-        today = datetime.now().date()
+        month_start = datetime(self.current_calendar_date.year, self.current_calendar_date.month, 1)
+        month_end = (month_start + timedelta(days=32)).replace(day=1)
 
         for colony in self.colonies:
             # Promemoria singoli
             for schedule in colony.get("feeding_schedule", []):
                 try:
-                    date_part = datetime.fromisoformat(schedule['datetime']).date()
-                    dates.add(date_part)
+                    dates.add(schedule.require_dt().date())
                 except (KeyError, ValueError):
                     pass
             
-            # Promemoria ricorrenti
+            # Promemoria ricorrenti: solo le occorrenze del mese mostrato
             for recurring in colony.get("recurring_schedule", []):
                 try:
-                    start_date = datetime.fromisoformat(recurring['start_date']).date()
-                    interval = recurring['interval']
-                    
-                    if today >= start_date:
-                        days_since_start = (today - start_date).days
-                        if days_since_start % interval == 0:
-                            dates.add(today)
-                        
-                        # Aggiungi anche gli eventi futuri nel mese corrente
-                        current_date = start_date
-                        while current_date.month <= self.current_calendar_date.month and current_date.year <= self.current_calendar_date.year:
-                            if current_date.month == self.current_calendar_date.month:
-                                dates.add(current_date)
-                            current_date += timedelta(days=interval)
-                        
-                except (KeyError, ValueError):
+                    for when in recurring.matcher().occurrences(month_start, month_end):
+                        dates.add(when.date())
+                except (KeyError, ValueError, TypeError):
                     pass
         return dates
 
+    def show_search(self):
+        self._current_screen = self.show_search
+        self.clear_frame()
+        self.current_colony = None # Resetta la colonia attuale
+
+        main_container = tk.Frame(self.root, bg=DEFAULT_BG_COLOR)
+        main_container.pack(fill="both", expand=True)
+
+        header = tk.Frame(main_container, bg=CARD_BG_COLOR, height=80)
+        header.pack(fill="x")
+        header.pack_propagate(False)
+
+        header_content = tk.Frame(header, bg=CARD_BG_COLOR)
+        header_content.pack(fill="both", expand=True, padx=20, pady=15)
+
+        ttk.Button(header_content, text="← Indietro",
+                  style="Modern.TButton",
+                  command=self.create_main_frame).pack(side="left")
+
+        tk.Label(header_content,
+                text="🔍 Cerca negli Appunti",
+                font=("Segoe UI", 18, "bold"),
+                fg=TEXT_COLOR,
+                bg=CARD_BG_COLOR).pack(side="left", padx=20)
+
+        content = tk.Frame(main_container, bg=CARD_BG_COLOR)
+        content.pack(fill="both", expand=True, padx=20, pady=20)
+
+        tk.Label(content, text="Cerca in nomi, descrizioni, appunti e alimentazione:",
+                font=("Segoe UI", 12),
+                fg=TEXT_COLOR, bg=CARD_BG_COLOR).pack(anchor="w", padx=10, pady=(10, 5))
+
+        query_var = tk.StringVar()
+        query_entry = tk.Entry(content, textvariable=query_var, font=("Segoe UI", 12))
+        query_entry.pack(fill="x", padx=10, pady=(0, 10))
+        query_entry.focus()
+
+        self.search_status_label = tk.Label(content, text="",
+                                            font=("Segoe UI", 10, "italic"),
+                                            fg="#95a5a6", bg=CARD_BG_COLOR)
+        self.search_status_label.pack(anchor="w", padx=10)
+
+        list_frame = tk.Frame(content, bg=CARD_BG_COLOR)
+        list_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        self.search_results_list = tk.Listbox(list_frame, bg=DEFAULT_BG_COLOR, fg=TEXT_COLOR,
+                                              selectbackground=ACCENT_COLOR, font=("Segoe UI", 11),
+                                              activestyle="none")
+        results_scrollbar = ttk.Scrollbar(list_frame, orient="vertical",
+                                          command=self.search_results_list.yview)
+        self.search_results_list.configure(yscrollcommand=results_scrollbar.set)
+        self.search_results_list.pack(side="left", fill="both", expand=True)
+        results_scrollbar.pack(side="right", fill="y")
+        self.search_results = []
+
+        def open_selected(event=None):
+            selected = self.search_results_list.curselection()
+            if selected:
+                self.show_colony(self.search_results[selected[0]][0])
+
+        self.search_results_list.bind("<Double-Button-1>", open_selected)
+        self.search_results_list.bind("<Return>", open_selected)
+        query_entry.bind("<Return>", lambda e: self._run_search(query_var.get()))
+
+        # Ricerca mentre si digita, con un breve ritardo per non rifarla a ogni tasto
+        pending = {"job": None}
+        def schedule_search(*args):
+            if pending["job"] is not None:
+                self.root.after_cancel(pending["job"])
+            pending["job"] = self.root.after(150, lambda: self._run_search(query_var.get()))
+        query_var.trace_add("write", schedule_search)
+
+        ttk.Button(content, text="Apri Colonia",
+                  style="Modern.TButton",
+                  command=open_selected).pack(anchor="e", padx=10, pady=(0, 10))
+
+    def _run_search(self, query):
+        if not self.search_results_list.winfo_exists():
+            return
+        self.search_results_list.delete(0, tk.END)
+        self.search_results = self.search_index.search(query) if query.strip() else []
+
+        for colony, field, idx, text in self.search_results:
+            snippet = SearchIndex.snippet(text, query)
+            self.search_results_list.insert(tk.END, f"🐜 {colony['name']} — {SEARCH_FIELD_LABELS[field]}: {snippet}")
+
+        if not query.strip():
+            self.search_status_label.config(text="")
+        elif self.search_results:
+            self.search_status_label.config(text=f"{len(self.search_results)} risultati")
+        else:
+            self.search_status_label.config(text="Nessun risultato.")
+
     def delete_colony(self, colony):
         if messagebox.askyesno("Elimina Colonia", f"Sei sicuro di voler eliminare la colonia '{colony['name']}'?"):
             self.colonies.remove(colony)
+            self._on_colony_removed(colony)
             self.save_data()
-            self.display_colonies()
+            card = self._colony_cards.pop(id(colony), None)
+            if not self.colonies:
+                self.create_main_frame()
+            elif card is not None:
+                card.destroy()
+                self._visible_cards = [c for c in self._visible_cards if c is not card]
+                self._apply_dashboard_filter()
             messagebox.showinfo("Successo", "Colonia eliminata con successo!")
 
     def save_description(self):
         new_description = self.description_text_area.get("1.0", tk.END).strip()
         self.current_colony["description"] = new_description
+        self._on_colony_changed(self.current_colony, "description")
         self.save_data()
         messagebox.showinfo("Successo", "Descrizione salvata!")
 
@@ -1995,9 +6098,8 @@ class AntColonyApp:
             try:
                 img = Image.open(img_path)
                 img.thumbnail((200, 200), Image.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-                self.profile_img_label.config(image=photo)
-                self.profile_img_label.image = photo
+                self.image_memory.attach(self.profile_img_label, ImageTk.PhotoImage(img),
+                                         reload=self.update_profile_image)
             except (IOError, OSError):
                 self.create_placeholder_image(self.profile_img_label.master)
         else:
@@ -2016,8 +6118,8 @@ class AntColonyApp:
             shutil.copy(file_path, destination)
             
             self.current_colony["profile_image"] = destination
+            self._on_colony_changed(self.current_colony, "profile_image")
             self.save_data()
-            self.update_profile_image()
 
     def add_colony_image(self):
         file_path = filedialog.askopenfilename(
@@ -2032,45 +6134,143 @@ class AntColonyApp:
             shutil.copy(file_path, destination)
             
             self.current_colony["images"].append(destination)
+            self._on_colony_changed(self.current_colony, "images")
             self.save_data()
-            self.display_colony_images()
 
     def display_colony_images(self):
+        # Le caselle vengono disposte subito con un segnaposto; le miniature arrivano dal
+        # pool di thread, prima quelle visibili. Le decodifiche della pagina precedente vengono annullate.
+        self._cancel_gallery_loading()
         for widget in self.gallery_frame.winfo_children():
             widget.destroy()
 
         images = self.current_colony.get("images", [])
+        num_pages = max(1, math.ceil(len(images) / GALLERY_PAGE_SIZE))
+        self._gallery_page = min(self._gallery_page, num_pages - 1)
+        self.gallery_page_label.config(
+            text=f"Pagina {self._gallery_page + 1} di {num_pages} ({len(images)} immagini)" if images else "")
+
         if not images:
             tk.Label(self.gallery_frame, text="Nessuna immagine nella galleria",
                     font=("Segoe UI", 12, "italic"),
                     fg="#95a5a6", bg=DEFAULT_BG_COLOR).pack(pady=20, fill="both", expand=True)
             return
-        
-        num_columns = 3
-        
-        for idx, img_path in enumerate(images):
-            if os.path.exists(img_path):
-                row = idx // num_columns
-                col = idx % num_columns
-                
-                try:
-                    img = Image.open(img_path)
-                    img.thumbnail((150, 150), Image.LANCZOS)
-                    photo = ImageTk.PhotoImage(img)
-                    
-                    frame = tk.Frame(self.gallery_frame, bg=CARD_BG_COLOR)
-                    frame.grid(row=row, column=col, padx=10, pady=10)
-                    
-                    img_label = tk.Label(frame, image=photo)
-                    img_label.image = photo
-                    img_label.pack()
-                    
-                    delete_btn = ttk.Button(frame, text="🗑️", style="Danger.TButton",
-                                           command=lambda path=img_path: self.delete_gallery_image(path))
-                    delete_btn.pack(pady=5)
-                
-                except (IOError, OSError):
-                    pass
+
+        start = self._gallery_page * GALLERY_PAGE_SIZE
+        page_images = images[start:start + GALLERY_PAGE_SIZE]
+        self.gallery_canvas.yview_moveto(0)
+
+        tiles = []
+        for idx, img_path in enumerate(page_images):
+            row = idx // GALLERY_COLUMNS
+            col = idx % GALLERY_COLUMNS
+
+            frame = tk.Frame(self.gallery_frame, bg=CARD_BG_COLOR)
+            frame.grid(row=row, column=col, padx=10, pady=10)
+
+            holder = tk.Frame(frame, bg=DEFAULT_BG_COLOR,
+                              width=THUMBNAIL_SIZE[0] + 10, height=THUMBNAIL_SIZE[1] + 10)
+            holder.pack_propagate(False)
+            holder.pack()
+            img_label = tk.Label(holder, text="⏳", font=("Segoe UI", 16),
+                                 fg="#95a5a6", bg=DEFAULT_BG_COLOR, cursor="hand2")
+            img_label.pack(expand=True)
+            img_label.bind("<Button-1>", lambda e, i=start + idx: self.open_image_viewer(i))
+
+            delete_btn = ttk.Button(frame, text="🗑️", style="Danger.TButton",
+                                   command=lambda path=img_path: self.delete_gallery_image(path))
+            delete_btn.pack(pady=5)
+            tiles.append((img_path, img_label))
+
+        # Le righe entro l'altezza visibile della galleria vengono richieste per prime
+        visible_rows = max(1, self.gallery_canvas.winfo_height() // (THUMBNAIL_SIZE[1] + 60) + 1)
+        visible_count = visible_rows * GALLERY_COLUMNS
+        ordered = tiles[:visible_count] + tiles[visible_count:]
+
+        generation = self._gallery_generation
+        for img_path, img_label in ordered:
+            cached = self._cached_thumbnail(img_path)
+            if cached is not None:
+                self._show_thumbnail(generation, img_label, img_path, cached)
+                continue
+            future = self._thumbnail_executor.submit(self._decode_thumbnail, img_path)
+            future.add_done_callback(
+                lambda f, label=img_label, path=img_path: self._thumbnail_ready(generation, label, path, f))
+            self._gallery_futures.append(future)
+
+    def open_image_viewer(self, index):
+        images = self.current_colony.get("images", [])
+        if not images:
+            return
+        if self.image_viewer is not None and self.image_viewer.alive():
+            self.image_viewer.images = list(images)
+            self.image_viewer.show(index)
+            self.image_viewer.window.lift()
+        else:
+            self.image_viewer = ImageViewer(self.root, images, index)
+
+    def _change_gallery_page(self, delta):
+        images = self.current_colony.get("images", [])
+        num_pages = max(1, math.ceil(len(images) / GALLERY_PAGE_SIZE))
+        new_page = max(0, min(num_pages - 1, self._gallery_page + delta))
+        if new_page != self._gallery_page:
+            self._gallery_page = new_page
+            self.display_colony_images()
+
+    def _cancel_gallery_loading(self):
+        self._gallery_generation += 1
+        for future in self._gallery_futures:
+            future.cancel()
+        self._gallery_futures = []
+
+    def _cached_thumbnail(self, img_path):
+        with self._thumbnail_cache_lock:
+            img = self._thumbnail_cache.get(img_path)
+            if img is not None:
+                self._thumbnail_cache.move_to_end(img_path)
+            return img
+
+    def _decode_thumbnail(self, img_path):
+        # Eseguito nel pool di thread: nessun accesso a Tk. Un file mancante
+        # risulta in un errore di apertura, senza controlli os.path.exists preventivi.
+        try:
+            img = Image.open(img_path)
+            img.draft("RGB", THUMBNAIL_SIZE)   # decodifica JPEG ridotta, molto più veloce
+            img.thumbnail(THUMBNAIL_SIZE, Image.LANCZOS)
+            img.load()
+        except (IOError, OSError):
+            return None
+        with self._thumbnail_cache_lock:
+            self._thumbnail_cache[img_path] = img
+            while len(self._thumbnail_cache) > THUMBNAIL_CACHE_SIZE:
+                self._thumbnail_cache.popitem(last=False)
+        return img
+
+    def _thumbnail_ready(self, generation, img_label, img_path, future):
+        if future.cancelled() or generation != self._gallery_generation:
+            return
+        img = future.result() if future.exception() is None else None
+        self.root.after(0, self._show_thumbnail, generation, img_label, img_path, img)
+
+    def _show_thumbnail(self, generation, img_label, img_path, img):
+        if generation != self._gallery_generation or not img_label.winfo_exists():
+            return
+        if img is None:
+            img_label.config(text="⚠️\nImmagine\nnon trovata", font=("Segoe UI", 10))
+            return
+        img_label.config(text="")
+        self.image_memory.attach(img_label, ImageTk.PhotoImage(img),
+                                 reload=lambda: self._reload_thumbnail(generation, img_label, img_path))
+
+    def _reload_thumbnail(self, generation, img_label, img_path):
+        if generation != self._gallery_generation:
+            return
+        img = self._cached_thumbnail(img_path)
+        if img is not None:
+            self._show_thumbnail(generation, img_label, img_path, img)
+            return
+        future = self._thumbnail_executor.submit(self._decode_thumbnail, img_path)
+        future.add_done_callback(lambda f: self._thumbnail_ready(generation, img_label, img_path, f))
 
     def delete_gallery_image(self, img_path):
         if img_path in self.current_colony["images"]:
@@ -2078,21 +6278,66 @@ class AntColonyApp:
                 self.current_colony["images"].remove(img_path)
                 if os.path.exists(img_path):
                     os.remove(img_path)
+                with self._thumbnail_cache_lock:
+                    self._thumbnail_cache.pop(img_path, None)
+                self._on_colony_changed(self.current_colony, "images")
                 self.save_data()
-                self.display_colony_images()
     
     def save_notes(self):
         new_notes = self.notes_text_area.get("1.0", tk.END).strip()
         self.current_colony["notes"] = new_notes
+        self._on_colony_changed(self.current_colony, "notes")
         self.save_data()
         messagebox.showinfo("Successo", "Appunti salvati!")
 
+    def _on_colony_changed(self, colony, *fields):
+        # Punto unico di notifica delle modifiche: aggiorna gli indici derivati
+        # e i soli pannelli della vista che mostrano i campi modificati.
+        # Senza campi indicati si considera modificata l'intera colonia.
+        colony["revision"] = colony.get("revision", 0) + 1
+        self.search_index.update(colony, *fields)
+        if not fields or DASHBOARD_FIELDS.intersection(fields):
+            self.dashboard_index.update(colony)
+        if not fields or "history" in fields:
+            self.history_rollups.update(colony)
+        if colony is self.current_colony:
+            if threading.current_thread() is threading.main_thread():
+                self._refresh_view_panels(colony, fields)
+            else:
+                # Le modifiche del thread delle notifiche vengono mostrate dal thread principale
+                self.root.after(0, self._refresh_view_panels, colony, fields)
+        if self.notifier_connection is not None and (not fields or set(NOTIFIER_FIELDS).intersection(fields)):
+            self._send_to_notifier({"type": "colony", "colony": notifier_view(colony)})
+
+    def _subscribe(self, widget, fields, callback):
+        self._view_subscriptions.append((widget, frozenset(fields), callback))
+
+    def _refresh_view_panels(self, colony, fields):
+        if colony is not self.current_colony:
+            return
+        for widget, watched, callback in list(self._view_subscriptions):
+            if not widget.winfo_exists():
+                continue
+            if not fields or watched.intersection(fields):
+                callback()
+
+    def _on_colony_removed(self, colony):
+        self.search_index.remove_colony(colony)
+        self.dashboard_index.remove(colony)
+        self.history_rollups.remove(colony)
+        if self.notifier_connection is not None:
+            self._send_to_notifier({"type": "remove", "id": colony.get("id")})
+
     def start_notification_thread(self):
+        # Con il notificatore in background (--notifier) attivo la GUI non controlla i promemoria
+        if self.notifier_connection is not None or self._connect_notifier_daemon():
+            return
         # Evita di avviare più thread
         if self.notification_thread_running:
             return
-        
-        if self.settings.get("notifications_email") or (self.settings.get("notifications_desktop") and NOTIFICATIONS_AVAILABLE):
+
+        self.notifier.settings = self.settings
+        if self.notifier.enabled():
              self.notification_thread_running = True
              threading.Thread(target=self._check_notifications, daemon=True).start()
              print("Thread di notifica avviato.")
@@ -2100,142 +6345,488 @@ class AntColonyApp:
             print("Notifiche disabilitate nelle impostazioni.")
 
     def restart_notification_thread(self):
+        if self.notifier_connection is not None:
+            self._send_to_notifier({"type": "settings", "settings": self.settings})
+            return
         self.notification_thread_running = False
         time.sleep(1)  # Dà al vecchio thread il tempo di terminare
         self.start_notification_thread()
 
     def _check_notifications(self):
         while self.notification_thread_running:
-            now = datetime.now()
-            today = now.date()
-            print(f"Controllo notifiche... Ora attuale: {now.strftime('%H:%M:%S')}")
-            
-            for colony in self.colonies:
-                # Gestisci i promemoria ricorrenti
-                for recurring in list(colony.get("recurring_schedule", [])):
-                    try:
-                        start_date = datetime.fromisoformat(recurring['start_date']).date()
-                        interval = recurring['interval']
-
-                        if today >= start_date:
-                            days_since_start = (today - start_date).days
-                            if days_since_start % interval == 0:
-                                # Controlla se un promemoria è già stato generato per oggi
-                                is_already_generated = any(
-                                    datetime.fromisoformat(s['datetime']).date() == today
-                                    for s in colony.get('feeding_schedule', [])
-                                )
-                                if not is_already_generated:
-                                    print(f"Generando promemoria ricorrente per {colony['name']} per la data {today}")
-                                    new_schedule = {
-                                        "datetime": datetime.combine(today, datetime.min.time()).isoformat(),
-                                        "description": f"Promemoria ricorrente (ogni {interval} giorni)",
-                                        "food_type": recurring.get('food_type', ''),
-                                        "quantity": recurring.get('quantity', '')
-                                    }
-                                    colony['feeding_schedule'].append(new_schedule)
-                                    self.save_data()
-                    except (ValueError, KeyError) as e:
-                        print(f"Errore nel formato del promemoria ricorrente per la colonia {colony['name']}: {e}")
-                        colony['recurring_schedule'].remove(recurring)
-                        self.save_data()
-
-                # Gestisci i promemoria singoli
-                for schedule_dict in list(colony.get("feeding_schedule", [])):
-                    try:
-                        schedule_dt = datetime.fromisoformat(schedule_dict['datetime'])
-                        description = schedule_dict.get('description', '')
-                        
-                        if now >= schedule_dt and now < schedule_dt + timedelta(minutes=5):
-                            print(f"Promemoria singolo trovato per la colonia {colony['name']} alle {schedule_dt.strftime('%H:%M')}")
-                            if self.settings.get("notifications_desktop") and NOTIFICATIONS_AVAILABLE:
-                                self._send_desktop_notification(colony["name"], schedule_dt, description)
-                            if self.settings.get("notifications_email"):
-                                self._send_email_notification(colony["name"], schedule_dt, description)
-                            
-                            # Rimuovi il promemoria dalla lista, l'utente lo segnerà come completato
-                            # per registrarlo nella cronologia
-                            # colony["feeding_schedule"].remove(schedule_dict)
-                            # self.save_data() 
-                            print(f"Notifica inviata per {colony['name']}")
-
-                    except (ValueError, KeyError) as e:
-                        print(f"Errore nel formato del promemoria per la colonia {colony['name']}: {e}")
-                        # Rimuovi il promemoria corrotto per evitare errori futuri
-                        colony["feeding_schedule"].remove(schedule_dict)
-                        self.save_data()
-                        
+            self.notifier.check(self.colonies)
             time.sleep(60)
-            
-    def _send_desktop_notification(self, colony_name, schedule_dt, description):
-        notification_title = f"Promemoria Alimentazione - {colony_name}"
-        notification_message = f"È ora di nutrire la colonia '{colony_name}'! (Alle {schedule_dt.strftime('%H:%M')})"
-        if description:
-            notification_message += f"\nNote: {description}"
-        notification.notify(
-            title=notification_title,
-            message=notification_message,
-            app_name="Ant Colony Monitor"
-        )
-        print("Notifica desktop inviata.")
-    
-    def _send_email_notification(self, colony_name, schedule_dt, description):
-        sender_email = self.settings.get("email_sender")
-        password = self.settings.get("email_password")
-        recipient_email = self.settings.get("email_recipient")
-        smtp_server = self.settings.get("smtp_server")
-        port = self.settings.get("smtp_port")
 
-        if not all([sender_email, password, recipient_email, smtp_server, port]):
-            print("Avviso: le impostazioni email non sono complete. Impossibile inviare la notifica.")
+    def _notifier_changed(self, colony, *fields):
+        self._on_colony_changed(colony, *fields)
+        self.save_data()
+
+    def _connect_notifier_daemon(self):
+        try:
+            sock = socket.create_connection((NOTIFIER_HOST, NOTIFIER_PORT), timeout=0.5)
+        except OSError:
+            return False
+        connection = IpcConnection(sock)
+        if not self._authenticate_notifier(connection):
+            # Senza autenticazione non si invia nulla, tanto meno la password della posta
+            connection.close()
+            print("Notificatore in background non autenticato: i promemoria restano alla GUI.")
+            return False
+        sock.settimeout(None)
+        self.notifier_connection = connection
+        self._sync_notifier_daemon()
+        threading.Thread(target=self._read_notifier_messages, args=(connection,), daemon=True).start()
+        print("Collegato al notificatore in background.")
+        return True
+
+    def _authenticate_notifier(self, connection):
+        try:
+            secret = notifier_secret(os.path.dirname(os.path.abspath(DATA_FILE)))
+            connection.sock.settimeout(5)
+            hello = next(connection.messages(), None)
+            if not hello or hello.get("type") != "hello":
+                return False
+            nonce = secrets.token_hex(16)
+            connection.send({"type": "auth", "proof": notifier_proof(secret, "gui", hello.get("nonce", "")),
+                             "nonce": nonce})
+            reply = next(connection.messages(), None)
+        except OSError:
+            return False
+        return (bool(reply) and reply.get("type") == "auth"
+                and notifier_proof_valid(secret, "notifier", nonce, reply.get("proof", "")))
+
+    def _sync_notifier_daemon(self):
+        if self.notifier_connection is not None:
+            self._send_to_notifier({"type": "sync",
+                                    "colonies": [notifier_view(c) for c in self.colonies],
+                                    "settings": self.settings})
+
+    def _send_to_notifier(self, message):
+        connection = self.notifier_connection
+        try:
+            connection.send(message)
+        except OSError:
+            self.root.after(0, self._notifier_disconnected, connection)
+
+    def _read_notifier_messages(self, connection):
+        for message in connection.messages():
+            self.root.after(0, self._apply_notifier_message, message)
+        self.root.after(0, self._notifier_disconnected, connection)
+
+    def _apply_notifier_message(self, message):
+        if message.get("type") != "colony":
             return
+        view = message.get("colony", {})
+        colony = next((c for c in self.colonies if c.get("id") == view.get("id")), None)
+        if colony is None:
+            return
+        fields = message.get("fields") or [f for f in NOTIFIER_FIELDS if f != "id"]
+        load_records(view)
+        for field in fields:
+            if field in view:
+                colony[field] = view[field]
+        self._on_colony_changed(colony, *fields)
+        self.save_data()
 
-        subject = f"Promemoria Alimentazione: {colony_name}"
-        body = (f"Ciao,\n\nQuesto è un promemoria per l'alimentazione della colonia '{colony_name}'.\n"
-                f"L'orario di alimentazione è alle {schedule_dt.strftime('%H:%M')} di oggi, {schedule_dt.strftime('%d-%m-%Y')}.\n")
-        if description:
-            body += f"Note: {description}\n\n"
-        body += f"Saluti,\nAnt Colony Monitor"
+    def _notifier_disconnected(self, connection):
+        if self.notifier_connection is not connection:
+            return
+        connection.close()
+        self.notifier_connection = None
+        print("Notificatore in background non raggiungibile: i promemoria tornano alla GUI.")
+        self.start_notification_thread()
+
+    def _call_in_ui(self, func, *args):
+        # Esegue func nel thread di Tk e ne restituisce il risultato tramite un Future
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+        self.root.after(0, run)
+        return future
 
+    def start_api_server(self):
+        if self.api_server is not None or not self.settings.get("api_enabled"):
+            return
+        server = ApiServer(self._api_request, self._call_in_ui,
+                           self.settings.get("api_host") or "127.0.0.1",
+                           int(self.settings.get("api_port") or 8765),
+                           self.settings.get("api_token", ""))
         try:
-            context = ssl.create_default_context()
-            if port == 465:
-                with smtplib.SMTP_SSL(smtp_server, port, context=context) as server:
-                    server.login(sender_email, password)
-                    message = f"Subject: {subject}\n\n{body}"
-                    server.sendmail(sender_email, recipient_email, message.encode('utf-8'))
-            else:
-                with smtplib.SMTP(smtp_server, port) as server:
-                    server.starttls(context=context)
-                    server.login(sender_email, password)
-                    message = f"Subject: {subject}\n\n{body}"
-                    server.sendmail(sender_email, recipient_email, message.encode('utf-8'))
-            print(f"Notifica email inviata con successo per la colonia {colony_name}.")
-        except smtplib.SMTPAuthenticationError:
-            print("Errore di autenticazione SMTP. Controlla email e password nelle impostazioni.")
-        except Exception as e:
-            print(f"Errore durante l'invio della notifica email per la colonia {colony_name}: {e}")
+            server.start()
+        except OSError as e:
+            print(f"Impossibile avviare l'API: {e}")
+            return
+        self.api_server = server
+
+    def start_sensor_hub(self):
+        if self.sensor_hub is not None or not self.settings.get("sensors_enabled"):
+            return
+        hub = SensorHub(int(self.settings.get("sensor_udp_port") or 0), self.settings.get("sensor_file", ""),
+                        known_keys=self._sensor_keys)
+        try:
+            hub.start()
+        except OSError as e:
+            print(f"Impossibile avviare la ricezione dei sensori: {e}")
+            hub.stop()
+            return
+        self.sensor_hub = hub
+
+    def _sensor_keys(self):
+        # Chiamata dai thread dei sensori: si legge una copia della lista
+        keys = set()
+        for colony in list(self.colonies):
+            keys.add(colony.get("id"))
+            keys.add(colony.get("name"))
+        return keys
+
+    def restart_sensor_hub(self):
+        if self.sensor_hub is not None:
+            self.sensor_hub.stop()
+            self.sensor_hub = None
+        self.start_sensor_hub()
+
+    def sync_now(self, quiet=False):
+        folder = self.settings.get("sync_folder", "")
+        if not folder:
+            if not quiet:
+                messagebox.showerror("Errore", "Imposta prima la cartella condivisa.")
+            return
+        if self._sync_running:
+            return
+        self._sync_running = True
+        sync = FolderSync(folder, sync_state_path(DATA_FILE))
+        threading.Thread(target=self._pull_sync_deltas, args=(sync, quiet), daemon=True).start()
+
+    def _pull_sync_deltas(self, sync, quiet):
+        try:
+            deltas = sync.pull()
+        except OSError as e:
+            deltas, error = None, e
+        else:
+            error = None
+        self.root.after(0, self._apply_sync_deltas, sync, deltas, error, quiet)
+
+    def _apply_sync_deltas(self, sync, deltas, error, quiet):
+        self._sync_running = False
+        if error is not None:
+            print(f"Sincronizzazione non riuscita: {error}")
+            if not quiet:
+                messagebox.showerror("Errore", f"Sincronizzazione non riuscita: {error}")
+            return
+        added, updated, conflicts = sync.merge(self.colonies, deltas, self._on_colony_changed)
+        if added or updated:
+            self.save_data()
+            if self.current_colony is None and self._current_screen == self.create_main_frame:
+                if self._widget_alive('colony_grid_frame'):
+                    self.display_colonies()
+                else:
+                    self.create_main_frame()
+        try:
+            published = sync.push(self.colonies)
+            sync.save_state()
+        except OSError as e:
+            print(f"Sincronizzazione non riuscita: {e}")
+            if not quiet:
+                messagebox.showerror("Errore", f"Impossibile scrivere nella cartella condivisa: {e}")
+            return
+        print(f"Sincronizzazione: {len(added)} nuove, {len(updated)} aggiornate, {published} pubblicate.")
+        message = f"Colonie ricevute: {len(added)} nuove, {len(updated)} aggiornate.\nColonie inviate: {published}."
+        if conflicts:
+            # I conflitti vengono sempre mostrati, anche nella sincronizzazione all'avvio
+            details = "\n".join(f"• {name}: {', '.join(fields)}" for name, fields in conflicts)
+            messagebox.showwarning("Conflitti di sincronizzazione",
+                                   f"{message}\n\nCampi modificati in entrambe le installazioni "
+                                   f"(mantenuta la versione locale):\n{details}")
+        elif not quiet:
+            messagebox.showinfo("Sincronizzazione", message)
+
+    def restart_api_server(self):
+        if self.api_server is not None:
+            self.api_server.stop()
+            self.api_server = None
+        self.start_api_server()
+
+    def _api_request(self, method, path, query, body, headers):
+        if not self._data_loaded:
+            return 503, api_error("Dati non ancora caricati."), None
+        allowed = False
+        for route_method, pattern, name in API_ROUTES:
+            match = pattern.match(path)
+            if not match:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            colony = None
+            if match.groups():
+                colony = next((c for c in self.colonies if c.get("id") == match.group(1)), None)
+                if colony is None:
+                    return 404, api_error("Colonia non trovata."), None
+
+            if method == "GET":
+                etag = self._api_etag(name, colony, query)
+                if etag is not None and etag in headers.get("if-none-match", ""):
+                    return 304, b"", etag
+                try:
+                    return 200, api_json(getattr(self, name)(colony, query)), etag
+                except ValueError as e:
+                    return 400, api_error(f"Parametri non validi: {e}"), None
+
+            if colony is not None and "if-match" in headers and \
+                    headers["if-match"] != self._api_etag("_api_colony", colony, {}):
+                return 412, api_error("La colonia è stata modificata nel frattempo."), None
+            try:
+                data = json.loads(body.decode('utf-8') or "{}")
+                if not isinstance(data, dict):
+                    raise ValueError("atteso un oggetto JSON")
+                status, result = getattr(self, name)(colony, data)
+            except (ValueError, KeyError, TypeError) as e:
+                return 400, api_error(f"Richiesta non valida: {e}"), None
+            return status, api_json(result), self._api_etag("_api_colony", colony, {})
+        if allowed:
+            return 405, api_error("Metodo non consentito."), None
+        return 404, api_error("Risorsa non trovata."), None
+
+    def _api_etag(self, name, colony, query):
+        # Le ETag derivano dai contatori di revisione: confrontarle non richiede di serializzare nulla
+        if name == "_api_due_reminders":
+            return None  # dipende dall'ora corrente
+        params = "&".join(f"{k}={v}" for k, v in sorted(query.items()))
+        if colony is not None:
+            return f'"{colony.get("revision", 0)}-{zlib.crc32(f"{name}?{params}".encode()):08x}"'
+        state = ",".join(f"{c['id']}:{c.get('revision', 0)}" for c in self.colonies)
+        return f'"{len(self.colonies)}-{zlib.crc32(f"{name}?{params}|{state}".encode()):08x}"'
+
+    def _api_colony_summary(self, colony):
+        history = colony.get("history", [])
+        feeding_history = colony.get("feeding_history", [])
+        schedule = colony.get("feeding_schedule", [])
+        return {
+            "id": colony["id"],
+            "name": colony.get("name", ""),
+            "collection_date": colony.get("collection_date", ""),
+            "revision": colony.get("revision", 0),
+            "population": history[-1].get("population") if history else None,
+            "health": history[-1].get("stato_salute_generale") if history else None,
+            "last_feeding": feeding_history[-1].get("datetime") if feeding_history else None,
+            "next_reminder": schedule[0].get("datetime") if schedule else None,
+        }
+
+    @staticmethod
+    def _api_page(entries, query):
+        offset = max(0, int(query.get("offset", 0)))
+        limit = max(1, min(API_MAX_PAGE_SIZE, int(query.get("limit", API_PAGE_SIZE))))
+        return {"total": len(entries), "offset": offset, "limit": limit,
+                "items": entries[offset:offset + limit]}
+
+    def _api_colonies(self, colony, query):
+        return [self._api_colony_summary(c) for c in self.colonies]
+
+    def _api_colony(self, colony, query):
+        detail = {k: v for k, v in colony.items() if k not in ("history", "feeding_history")}
+        detail.update(self._api_colony_summary(colony))
+        detail["history_count"] = len(colony.get("history", []))
+        detail["feeding_history_count"] = len(colony.get("feeding_history", []))
+        return detail
+
+    def _api_history(self, colony, query):
+        return self._api_page(colony.get("history", []), query)
+
+    def _api_feeding_history(self, colony, query):
+        return self._api_page(colony.get("feeding_history", []), query)
+
+    def _api_schedule(self, colony, query):
+        return {"feeding_schedule": colony.get("feeding_schedule", []),
+                "recurring_schedule": colony.get("recurring_schedule", [])}
+
+    def _api_due_reminders(self, colony, query):
+        now = datetime.now()
+        limit = (now + timedelta(minutes=int(query.get("within", 60)))).isoformat()
+        due = []
+        for c in self.colonies:
+            schedule = c.get("feeding_schedule", [])
+            # La lista è ordinata: i promemoria entro il limite sono un prefisso
+            end = bisect.bisect_right(schedule, limit, key=lambda e: e.get("datetime", ""))
+            for reminder in schedule[:end]:
+                due.append(dict(reminder, colony_id=c["id"], colony_name=c.get("name", ""),
+                                overdue=reminder.get("datetime", "") <= now.isoformat()))
+        due.sort(key=lambda r: r.get("datetime", ""))
+        return due
+
+    def _api_add_history(self, colony, data):
+        record = self.add_monitoring_record(colony, int(data["population"]), int(data.get("mortality", 0)),
+                                            str(data.get("eggs", "non registrato")),
+                                            str(data.get("health", "non registrato")))
+        return 201, record
+
+    def _api_add_schedule(self, colony, data):
+        reminder = self.add_feeding_reminder(colony, datetime.fromisoformat(data["datetime"]),
+                                             str(data.get("description", "")),
+                                             str(data.get("food_type", "")),
+                                             str(data.get("quantity", "")))
+        return 201, reminder
+
+    def _api_complete_schedule(self, colony, data):
+        reminder = next((r for r in colony.get("feeding_schedule", [])
+                         if r.get("datetime") == data["datetime"]), None)
+        if reminder is None:
+            raise KeyError("promemoria non trovato")
+        return 200, self.record_feeding(colony, reminder)
+
+    def handle_instance_command(self, command):
+        if not self._data_loaded:
+            self._pending_instance_commands.append(command)
+            return
+        # Ogni richiesta riporta la finestra in primo piano, anche dalla barra di sistema
+        if self.tray_icon is not None:
+            self.tray_icon.stop()
+            self.tray_icon = None
+        self.root.deiconify()
+        self.leave_background_mode()
+        self.root.lift()
+        self.root.focus_force()
+
+        kind = command.get("type")
+        if kind not in ("open", "add_reading"):
+            return
+        name = str(command.get("name", "")).casefold()
+        colony = next((c for c in self.colonies if c.get("name", "").casefold() == name), None)
+        if colony is None:
+            messagebox.showerror("Errore", f"Colonia '{command.get('name')}' non trovata.")
+            return
+        if kind == "add_reading":
+            try:
+                population, mortality = int(command["population"]), int(command.get("mortality", 0))
+            except (KeyError, TypeError, ValueError):
+                messagebox.showerror("Errore", "Popolazione e mortalità devono essere numeri interi.")
+                return
+            self.add_monitoring_record(colony, population, mortality)
+        if colony is not self.current_colony:
+            self.show_colony(colony)
+
+    def enter_background_mode(self):
+        # Restano in memoria solo i dati, gli indici e il thread delle notifiche
+        if self.background_mode:
+            return
+        self.background_mode = True
+        self._remember_selected_tabs()
+        if self.image_viewer is not None and self.image_viewer.alive():
+            self.image_viewer.close()
+        self.image_viewer = None
+
+        if self._background_job is not None:
+            self.root.after_cancel(self._background_job)
+            self._background_job = None
+        self._background_generation += 1
+        self._remove_background()
+        self.clear_frame()
+        self._colony_cards = {}
+        self._lazy_notebooks = {}
+        self._lazy_tab_builders = {}
+
+        with self._thumbnail_cache_lock:
+            self._thumbnail_cache.clear()
+        with self._background_lock:
+            self._background_source = None
+            self._background_source_path = None
+        self.image_memory.clear()
+        gc.collect()
+
+    def leave_background_mode(self):
+        if not self.background_mode:
+            return
+        self.background_mode = False
+        screen = self._current_screen or self.create_main_frame
+        if screen == self.update_colony_view and not any(c is self.current_colony for c in self.colonies):
+            screen = self.create_main_frame
+        screen()
+        self.root.update_idletasks()
+        self.update_background_image()
 
     # Nuovo metodo per la chiusura definitiva
     def close_app(self):
         self.notification_thread_running = False
+        if self.api_server is not None:
+            self.api_server.stop()
+        if self.sensor_hub is not None:
+            self.sensor_hub.stop()
         self.root.destroy()
 
     def __del__(self):
         self.notification_thread_running = False
 
+def _option(argv, name, default=None):
+    if name in argv and argv.index(name) + 1 < len(argv):
+        return argv[argv.index(name) + 1]
+    return default
+
+
+def run_export_command(argv):
+    directory = _option(argv, "--export")
+    if directory is None:
+        print("Uso: --export CARTELLA [--format csv|jsonl|parquet] [--from AAAA-MM-GG] [--to AAAA-MM-GG] [--colony NOME]")
+        return
+    colonies, _ = read_data_file(DATA_FILE)
+    names = [argv[i + 1] for i, arg in enumerate(argv[:-1]) if arg == "--colony"]
+    if names:
+        colonies = [c for c in colonies if c.get("name") in names]
+    counts = export_tables(colonies, directory, _option(argv, "--format", "csv"),
+                           _option(argv, "--from"), _option(argv, "--to"))
+    for table, count in counts.items():
+        print(f"{table}: {count} righe")
+
+
 def main():
+    if "--notifier" in sys.argv:
+        # Solo promemoria, senza interfaccia
+        run_notifier_daemon()
+        return
+
+    if "--export" in sys.argv:
+        # Esportazione senza interfaccia: --export CARTELLA [--format csv|jsonl|parquet] [--from D] [--to D]
+        run_export_command(sys.argv[1:])
+        return
+
+    if "--sync" in sys.argv:
+        # Sincronizzazione senza interfaccia con una cartella condivisa
+        folder = _option(sys.argv, "--sync")
+        if folder is None:
+            print("Uso: --sync CARTELLA")
+            return
+        added, updated, conflicts, published = sync_data_file(DATA_FILE, folder)
+        print(f"Ricevute: {len(added)} nuove, {len(updated)} aggiornate. Inviate: {published}.")
+        for name, fields in conflicts:
+            print(f"Conflitto su '{name}': {', '.join(fields)} (mantenuta la versione locale)")
+        return
+
+    # Se l'app è già aperta le si inoltra la richiesta e si esce subito
+    command = parse_instance_command(sys.argv[1:])
+    instance = SingleInstance()
+    if not instance.acquire(command):
+        return
+
     if not os.path.exists(IMAGE_DIR):
         os.makedirs(IMAGE_DIR)
 
-    root = tk.Tk()
+    with STARTUP_TRACER.phase("tk.Tk"):
+        root = tk.Tk()
 
     try:
         root.iconbitmap("ant_icon.ico")
     except:
         pass
 
-    app = AntColonyApp(root)
+    with STARTUP_TRACER.phase("AntColonyApp"):
+        app = AntColonyApp(root)
+    instance.serve(lambda forwarded: root.after(0, app.handle_instance_command, forwarded))
+    if command["type"] != "show":
+        app.handle_instance_command(command)
 
     # Funzione per creare un'icona segnaposto se il file non esiste
     def create_placeholder_image():
@@ -2245,47 +6836,57 @@ def main():
         d.rectangle((size[0]//4, size[1]//4, 3*size[0]//4, 3*size[1]//4), fill='black')
         return image
 
-    # Modifiche per la gestione dell'icona di sistema
+    def confirm_close():
+        if messagebox.askokcancel("Chiudi", "Sei sicuro di voler chiudere l'applicazione?"):
+            app.close_app()
+
+    # Modifiche per la gestione dell'icona di sistema.
+    # pystray e l'immagine dell'icona vengono caricati solo alla prima riduzione a icona.
     if PYSTRAY_AVAILABLE:
-        try:
+        def create_tray_icon():
             image_path = "ant_icon.png"
             if os.path.exists(image_path):
                 image = Image.open(image_path)
             else:
                 print("Avviso: 'ant_icon.png' non trovata. Verrà usata un'icona segnaposto.")
                 image = create_placeholder_image()
-            
+
             def show_window(icon, item):
                 icon.stop()
+                app.tray_icon = None
                 root.after(0, root.deiconify)
+                root.after(0, app.leave_background_mode)
                 root.after(0, root.lift)
 
             def exit_app(icon, item):
                 icon.stop()
+                app.tray_icon = None
                 app.close_app()
-                
-            menu = Menu(item('Mostra', show_window), item('Esci', exit_app))
-            icon = TrayIcon('Ant Colony Monitor', image, 'Ant Colony Monitor', menu)
 
-            def on_closing():
-                root.withdraw()
-                threading.Thread(target=icon.run, daemon=True).start()
-            
-            root.protocol("WM_DELETE_WINDOW", on_closing)
+            menu = pystray.Menu(pystray.MenuItem('Mostra', show_window), pystray.MenuItem('Esci', exit_app))
+            return pystray.Icon('Ant Colony Monitor', image, 'Ant Colony Monitor', menu)
 
-        except Exception as e:
-            print(f"Errore nella configurazione di pystray: {e}")
-            def on_closing():
-                if messagebox.askokcancel("Chiudi", "Sei sicuro di voler chiudere l'applicazione?"):
-                    app.close_app()
-            root.protocol("WM_DELETE_WINDOW", on_closing)
-    else:
         def on_closing():
-            if messagebox.askokcancel("Chiudi", "Sei sicuro di voler chiudere l'applicazione?"):
-                app.close_app()
+            try:
+                # Un'icona fermata non può essere riavviata: se ne crea una nuova a ogni chiusura
+                icon = create_tray_icon()
+            except Exception as e:
+                print(f"Errore nella configurazione di pystray: {e}")
+                confirm_close()
+                return
+            root.withdraw()
+            app.enter_background_mode()
+            app.tray_icon = icon
+            threading.Thread(target=icon.run, daemon=True).start()
+
         root.protocol("WM_DELETE_WINDOW", on_closing)
+    else:
+        root.protocol("WM_DELETE_WINDOW", confirm_close)
 
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        instance.release()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file